@@ -0,0 +1 @@
+# Raiz do repositório no sys.path: os testes importam o pacote src (from src....)
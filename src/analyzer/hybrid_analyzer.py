@@ -3,55 +3,200 @@ Combina YOLO (detecção) + OCR (leitura de valores)
 O melhor dos dois mundos!
 """
 
+import numpy as np
+
 from src.detector.yolo_detector import StarRailDetector
-from src.ocr.text_extractor import TextExtractor
-import cv2
-import pytesseract
+from src.ocr.image_preprocessor import ImagePreprocessor
+from src.ocr.text_extratctor import TextExtractor
+from src.ocr.text_parser import StatParser
+from src.analyzer.screen_analyzer import ScreenAnalyzer
+from src.vision.image_io import load_image
+
+# Um bloco de linhas (recortes empilhados). A linha inteira é lida (nome +
+# valor), então a whitelist mantém letras (com os acentos do PT-BR) e '%';
+# o 'digits' do tesseract jogaria fora o nome e o '%'
+STAT_OCR_WHITELIST = ('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+                      'ÁÂÃÉÊÍÓÔÕÚÇáâãéêíóôõúç0123456789%.,+')
+STAT_OCR_CONFIG = f'--psm 6 -c tessedit_char_whitelist={STAT_OCR_WHITELIST}'
+
+# Quanto a linha do stat se estende à esquerda da caixa do valor, em alturas
+# da caixa ('Energy Regeneration Rate' tem ~13)
+LINE_REACH = 14
 
 class HybridAnalyzer:
     """Análise híbrida: YOLO encontra, OCR lê"""
     
-    def __init__(self, yolo_model_path):
+    def __init__(self, yolo_model_path, ocr_workers=None, screen_analyzer=None):
+        """
+        Args:
+            yolo_model_path: pesos do YOLO (.pt ou .onnx)
+            ocr_workers: threads do tesseract (None = padrão do TextExtractor)
+            screen_analyzer: ScreenAnalyzer; se informado, o YOLO roda só nas
+                             ROIs do layout em vez do frame inteiro. Sem ele o
+                             layout ainda é classificado (miniatura, barato)
+                             para marcar a ROI de cada stat
+        """
         self.detector = StarRailDetector(yolo_model_path)
-        self.ocr = TextExtractor()
+        self.preprocessor = ImagePreprocessor()
+        self.ocr = TextExtractor(max_workers=ocr_workers)
+        # Faixas de relíquia não valem para os totais do personagem: a
+        # checagem vira o campo 'in_range' em vez de descartar a linha
+        self.parser = StatParser(validate=False)
+        self.screen = screen_analyzer
+        self.layouts = screen_analyzer or ScreenAnalyzer()
     
-    def analyze_equipment_screen(self, screenshot_path):
+    def analyze_equipment_screen(self, screenshot, visualize_path=None):
         """
         Pipeline completo:
         1. YOLO detecta personagem e ícones de equipamento
-        2. OCR lê os valores numéricos dos stats
+        2. OCR lê as linhas de stat (nome + valor)
         3. Retorna tudo estruturado
+        
+        Args:
+            screenshot: caminho, bytes (ex: anexo do Discord) ou array BGR
+            visualize_path: se informado, salva as detecções desenhadas
+        
+        A imagem é decodificada uma única vez; detector, recortes de OCR e
+        visualização recebem o mesmo array (recortes são views, sem cópia).
         """
         
-        # 1. Detecta elementos visuais
-        detections = self.detector.detect(screenshot_path, confidence=0.7)
+        # 1. Decodifica uma vez só
+        img = load_image(screenshot)
         
-        # 2. Carrega imagem para OCR
-        img = cv2.imread(screenshot_path)
+        # 2. Detecta elementos visuais (só nas ROIs do layout, se pedido)
+        layout = self.layouts.analyze(img)
+        if self.screen is None:
+            detections = self.detector.detect(img, confidence=0.7)
+        else:
+            detections = self._detect_rois([img], [layout])[0]
         
-        # 3. Extrai valores numéricos das regiões de stats
-        stats = []
-        for stat_detection in detections.get('stat_value', []):
-            bbox = stat_detection['bbox']
-            x1, y1, x2, y2 = map(int, bbox)
-            
-            # Recorta região do stat
-            stat_region = img[y1:y2, x1:x2]
+        # 3. Lê as linhas de stat, nome + valor (uma chamada ao tesseract)
+        crops = self._stat_crops(img, detections, layout)
+        texts = self.ocr.extract_batch(crops, config=STAT_OCR_CONFIG)
+        
+        # 4. Monta resultado estruturado
+        result = self._build_result(detections, texts, layout, img.shape)
+        
+        if visualize_path:
+            self.detector.visualize(img, detections, visualize_path)
+        
+        return result
+    
+    def analyze_many(self, screenshots, batch_size=16):
+        """
+        Analisa várias screenshots de uma vez
+        
+        YOLO roda em lote (detect_batch) e o OCR de cada screenshot roda
+        em paralelo no pool do TextExtractor.
+        
+        Returns:
+            lista de resultados (mesmo formato de analyze_equipment_screen)
+        """
+        images = [load_image(s) for s in screenshots]
+        layouts = [self.layouts.analyze(img) for img in images]
+        if self.screen is None:
+            all_detections = self.detector.detect_batch(images, confidence=0.7,
+                                                        batch_size=batch_size)
+        else:
+            all_detections = self._detect_rois(images, layouts, batch_size)
+        
+        batches = [self._stat_crops(img, det, layout)
+                   for img, det, layout in zip(images, all_detections, layouts)]
+        all_texts = self.ocr.extract_many(batches, config=STAT_OCR_CONFIG)
+        
+        return [self._build_result(det, texts, layout, img.shape)
+                for img, det, texts, layout in zip(images, all_detections, all_texts, layouts)]
+    
+    def _detect_rois(self, images, layouts, batch_size=16):
+        """
+        YOLO só nos recortes (views) das ROIs, todos num mesmo lote
+        
+        Em ultrawide as ROIs ficam nas bordas: o vão do meio nunca é
+        processado. As caixas voltam para as coordenadas do frame inteiro.
+        """
+        crops, owners = [], []
+        for i, (img, layout) in enumerate(zip(images, layouts)):
+            for name in layout.rois:
+                x1, y1, x2, y2 = layout.to_pixels(name, img.shape)
+                if x2 > x1 and y2 > y1:
+                    crops.append(img[y1:y2, x1:x2])
+                    owners.append((i, x1, y1))
+        
+        results = [self.detector.empty_detections() for _ in images]
+        roi_detections = self.detector.detect_batch(crops, confidence=0.7, batch_size=batch_size)
+        
+        for (i, dx, dy), detections in zip(owners, roi_detections):
+            for class_name, items in detections.items():
+                for detection in items:
+                    x1, y1, x2, y2 = detection['bbox']
+                    detection['bbox'] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+                    cx, cy = detection['center']
+                    detection['center'] = (cx + dx, cy + dy)
+                    results[i].setdefault(class_name, []).append(detection)
+        
+        return results
+    
+    def _stat_crops(self, img, detections, layout=None):
+        """Recorta e binariza as linhas de stat (cinza/upscale uma vez por frame)"""
+        bboxes = [d['bbox'] for d in detections.get('stat_value', [])]
+        return self.preprocessor.prepare_regions(img, self._line_boxes(bboxes, img.shape, layout))
+    
+    @staticmethod
+    def _line_boxes(bboxes, shape, layout=None):
+        """
+        Caixa do valor -> linha inteira do stat (o nome fica à esquerda)
+        
+        A linha vai até LINE_REACH alturas à esquerda, sem passar do valor
+        vizinho na mesma linha (outra coluna) nem da borda da ROI do layout.
+        """
+        if not bboxes:
+            return []
+        
+        boxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        heights = boxes[:, 3] - boxes[:, 1]
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        
+        roi_boxes = []
+        if layout is not None:
+            roi_boxes = [layout.to_pixels(name, shape) for name in layout.rois]
+        
+        lines = []
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            left = max(0.0, x1 - LINE_REACH * heights[i])
             
-            # Pré-processa para OCR
-            gray = cv2.cvtColor(stat_region, cv2.COLOR_BGR2GRAY)
-            _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+            # Valores à esquerda, na mesma linha
+            same_row = (np.abs(centers_y - centers_y[i]) < heights[i] / 2) & (boxes[:, 2] <= x1)
+            if same_row.any():
+                left = max(left, boxes[same_row, 2].max())
             
-            # Lê valor
-            text = pytesseract.image_to_string(binary, config='--psm 7 digits')
+            cx, cy = (x1 + x2) / 2, centers_y[i]
+            for rx1, ry1, rx2, ry2 in roi_boxes:
+                if rx1 <= cx < rx2 and ry1 <= cy < ry2:
+                    left = max(left, rx1)
+                    break
             
-            stats.append({
+            lines.append([left, y1, x2, y2])
+        return lines
+    
+    def _build_result(self, detections, texts, layout=None, shape=None):
+        """Junta detecções e textos lidos no dict de resultado"""
+        stats = []
+        for stat_detection, text in zip(detections.get('stat_value', []), texts):
+            record = self.parser.parse_line(text.strip())
+            stat = {
                 'value': text.strip(),
-                'bbox': bbox,
+                'parsed': record._asdict() if record else None,
+                # Na faixa de relíquia 5★ (False sem nome lido ou para totais do personagem)
+                'in_range': bool(record and record.key and self.parser.in_range(record)),
+                'bbox': stat_detection['bbox'],
                 'confidence': stat_detection['confidence']
-            })
+            }
+            if layout is not None and shape is not None:
+                # ROI do layout onde a linha está ('stats' = totais do personagem)
+                x1, y1, x2, y2 = stat_detection['bbox']
+                stat['roi'] = layout.roi_at((x1 + x2) / 2, (y1 + y2) / 2, shape)
+            stats.append(stat)
         
-        # 4. Monta resultado estruturado
         result = {
             'character': detections.get('character', []),
             'equipment': detections.get('equipment_icon', []),
@@ -59,6 +204,8 @@ class HybridAnalyzer:
             'stats': stats,
             'raw_detections': detections
         }
+        if layout is not None:
+            result['layout'] = layout._asdict()
         
         return result
 """
@@ -82,8 +229,9 @@ class HybridAnalyzer:
     - LabelImg ou Roboflow
     - Marcar: personagens, equipamentos, stats
 
-□ 5. Treinar modelo
-    python train_yolo.py
+□ 5. Treinar modelo (da raiz do repositório: o script importa o pacote src)
+    python -m src.tools.synthetic_generator   (opcional: amostras sintéticas)
+    python -m src.train_yolo
 
 □ 6. Testar detecção
     python test_detector.py
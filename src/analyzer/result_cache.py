@@ -0,0 +1,344 @@
+# src/analyzer/result_cache.py
+"""
+Cache de resultados por hash perceptual da screenshot
+
+Reenvios da mesma tela geram a mesma chave, então a análise completa
+(YOLO + OCR) só roda uma vez por build. A chave inclui a versão do modelo:
+trocar o best.pt invalida tudo.
+
+O dHash da tela inteira não enxerga os números dos stats (um dígito é
+menor que uma célula da miniatura): duas builds com o mesmo layout dão o
+mesmo dHash. Por isso a chave também leva um digest das ROIs de stats e
+relíquias numa escala em que os dígitos aparecem (screen_key).
+
+Reenvios recomprimidos (JPEG) mudam alguns bits da chave; a busca
+aproximada compara os grids das ROIs bloco a bloco (tile_distance), nas
+duas camadas: os grids também vão para o SQLite.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import cv2
+import numpy as np
+
+from src.analyzer.screen_analyzer import LAYOUTS, ASPECT_RATIOS, adapt_roi, closest_aspect
+from src.vision.image_io import load_image
+
+
+# ROIs com números que distinguem builds (as da tela de equipamento cobrem
+# também a coluna de stats da tela de personagem)
+DETAIL_ROIS = ('stats', 'relics')
+# Altura de referência do frame: dígitos ficam com ~6-8 px
+DETAIL_HEIGHT = 540
+# Diferença mínima de cinza entre vizinhos para contar como borda
+DETAIL_THRESHOLD = 16
+# Lado (em células do grid) dos blocos comparados na busca aproximada
+DETAIL_TILE = 8
+
+
+def perceptual_hash(image, hash_size=16):
+    """
+    dHash: compara pixels vizinhos de uma miniatura em cinza
+
+    Robusto a recompressão/redimensionamento, barato (uma redução só).
+    Telas de build têm o mesmo layout, então o padrão é 16x16 (256 bits)
+    em vez dos 64 bits clássicos. Ainda assim não enxerga os números dos
+    stats: para chave de cache use screen_key.
+
+    Returns:
+        hash em hexadecimal (hash_size * hash_size bits)
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return np.packbits(bits).tobytes().hex()
+
+
+def detail_grids(image):
+    """
+    Bordas horizontais (|vizinho direito - pixel| > DETAIL_THRESHOLD) das
+    ROIs de stats e relíquias, com o frame reduzido para DETAIL_HEIGHT
+
+    Returns:
+        tupla de arrays 2D bool, um por ROI
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape[:2]
+    ratio = ASPECT_RATIOS[closest_aspect(w, h)]
+    scale = min(1.0, DETAIL_HEIGHT / h)
+
+    grids = []
+    for name in DETAIL_ROIS:
+        roi, anchors = LAYOUTS['equipment'][name]
+        x1, y1, x2, y2 = adapt_roi(roi, anchors, ratio)
+        crop = gray[int(y1 * h):int(round(y2 * h)), int(x1 * w):int(round(x2 * w))]
+        small = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small = small.astype(np.int16)
+        grids.append(np.abs(small[:, 1:] - small[:, :-1]) > DETAIL_THRESHOLD)
+    return tuple(grids)
+
+
+def screen_key(image):
+    """
+    Chave de cache de uma screenshot: 'dhash:digest das ROIs de stats'
+
+    Returns:
+        (chave, grids de detail_grids) — os grids servem à busca aproximada
+    """
+    grids = detail_grids(image)
+    digest = hashlib.blake2b(digest_size=16)
+    for grid in grids:
+        digest.update(np.array(grid.shape, dtype=np.int32).tobytes())
+        digest.update(np.packbits(grid).tobytes())
+    return f"{perceptual_hash(image)}:{digest.hexdigest()}", grids
+
+
+def tile_distance(grids_a, grids_b, tile=DETAIL_TILE):
+    """
+    Maior número de bits diferentes em um bloco tile x tile dos grids
+
+    Ruído de recompressão se espalha pela ROI (poucos bits por bloco);
+    um dígito trocado se concentra num bloco só.
+    """
+    worst = 0
+    for a, b in zip(grids_a, grids_b):
+        if a.shape != b.shape:
+            return np.inf
+        h, w = (a.shape[0] + tile - 1) // tile * tile, (a.shape[1] + tile - 1) // tile * tile
+        diff = np.zeros((h, w), dtype=np.uint8)
+        diff[:a.shape[0], :a.shape[1]] = a != b
+        blocks = diff.reshape(h // tile, tile, w // tile, tile).sum(axis=(1, 3))
+        worst = max(worst, int(blocks.max()) if blocks.size else 0)
+    return worst
+
+
+def pack_details(grids):
+    """Serializa os grids de detail_grids (forma + bits) para o SQLite"""
+    parts = []
+    for grid in grids:
+        parts.append(np.array(grid.shape, dtype=np.int32).tobytes())
+        parts.append(np.packbits(grid).tobytes())
+    return b''.join(parts)
+
+
+def unpack_details(blob):
+    """Inverso de pack_details"""
+    grids, offset = [], 0
+    while offset < len(blob):
+        h, w = np.frombuffer(blob, dtype=np.int32, count=2, offset=offset)
+        offset += 8
+        size = (int(h) * int(w) + 7) // 8
+        bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8, count=size, offset=offset))
+        grids.append(bits[:h * w].reshape(h, w).astype(bool))
+        offset += size
+    return tuple(grids)
+
+
+def model_version(model_path):
+    """Identifica o modelo pelo arquivo (nome + tamanho + mtime)"""
+    path = Path(model_path)
+    if not path.exists():
+        return path.name
+    stat = path.stat()
+    return f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class ResultCache:
+    """
+    LRU em memória + camada SQLite opcional
+
+    get() devolve sempre uma cópia: quem edita o resultado não altera o cache.
+    """
+
+    def __init__(self, max_entries=1024, db_path=None, max_distance=4, max_tile_distance=4):
+        """
+        Args:
+            max_entries: tamanho máximo do LRU em memória
+            db_path: arquivo SQLite para persistir entre execuções (None = só memória)
+            max_distance: bits de diferença aceitos no dHash da tela (0 = só
+                          chave idêntica). Acima de 0 liga a busca aproximada,
+                          para tolerar recompressão: além do dHash, os grids
+                          das ROIs de stats (detail_grids) não podem diferir
+                          mais que max_tile_distance bits em nenhum bloco.
+            max_tile_distance: bits diferentes aceitos por bloco de DETAIL_TILE
+                               (JPEG q70 muda até ~3; um dígito trocado, 10+)
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_tile_distance = max_tile_distance
+        self._memory = OrderedDict()
+        self._details = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " phash TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " details BLOB,"
+                " PRIMARY KEY (phash, model))"
+            )
+            # Bancos criados antes da coluna de grids
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+            if 'details' not in columns:
+                self._db.execute("ALTER TABLE results ADD COLUMN details BLOB")
+            self._db.commit()
+
+    def get(self, phash, model, details=None):
+        """
+        Resultado em cache ou None
+
+        Args:
+            phash: chave da tela (screen_key)
+            details: grids de detail_grids, necessários para a busca aproximada
+        """
+        with self._lock:
+            key = (phash, model)
+
+            if key not in self._memory and self.max_distance and details is not None:
+                key = self._nearest(phash, model, details) or key
+
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key])
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT result, details FROM results WHERE phash = ? AND model = ?",
+                    key
+                ).fetchone()
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    if self.max_distance and row[1] is not None:
+                        self._details[key] = unpack_details(row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, phash, model, result, details=None):
+        """Guarda (uma cópia do) resultado nas duas camadas"""
+        with self._lock:
+            self._remember((phash, model), copy.deepcopy(result))
+            if self.max_distance and details is not None:
+                self._details[(phash, model)] = details
+
+            if self._db is not None:
+                blob = pack_details(details) if details is not None else None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (phash, model, result, details) VALUES (?, ?, ?, ?)",
+                    (phash, model, json.dumps(result), blob)
+                )
+                self._db.commit()
+
+    def stats(self):
+        """Contadores de hit/miss"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._memory)
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            old, _ = self._memory.popitem(last=False)
+            self._details.pop(old, None)
+
+    def _nearest(self, phash, model, details):
+        """
+        Chave do mesmo modelo com dHash a até max_distance bits e ROIs de
+        stats iguais a menos de ruído (tile_distance); memória primeiro,
+        depois o SQLite
+        """
+        keys = [key for key in self._details if key[1] == model]
+        key = self._closest(phash, keys, self._details.__getitem__, details)
+        if key is not None or self._db is None:
+            return key
+
+        rows = self._db.execute(
+            "SELECT phash FROM results WHERE model = ? AND details IS NOT NULL", (model,)
+        ).fetchall()
+        keys = [(row[0], model) for row in rows if (row[0], model) not in self._details]
+        return self._closest(phash, keys, self._stored_details, details)
+
+    def _closest(self, phash, keys, load_details, details):
+        """Primeira chave (menor distância no dHash) que passa no tile_distance"""
+        if not keys:
+            return None
+
+        frame_hash = phash.split(':')[0]
+        hashes = np.frombuffer(b''.join(bytes.fromhex(key[0].split(':')[0]) for key in keys),
+                               dtype=np.uint8).reshape(len(keys), -1)
+        target = np.frombuffer(bytes.fromhex(frame_hash), dtype=np.uint8)
+        if hashes.shape[1] != target.size:
+            return None
+
+        distances = np.unpackbits(hashes ^ target, axis=1).sum(axis=1)
+
+        for i in np.argsort(distances, kind='stable'):
+            if distances[i] > self.max_distance:
+                break
+            if tile_distance(load_details(keys[i]), details) <= self.max_tile_distance:
+                return keys[i]
+        return None
+
+    def _stored_details(self, key):
+        row = self._db.execute(
+            "SELECT details FROM results WHERE phash = ? AND model = ?", key
+        ).fetchone()
+        return unpack_details(row[0])
+
+
+class CachedAnalyzer:
+    """HybridAnalyzer com cache na frente"""
+
+    def __init__(self, analyzer, cache=None, version=None):
+        """
+        Args:
+            analyzer: HybridAnalyzer (ou qualquer objeto com analyze_equipment_screen)
+            cache: ResultCache (None = LRU em memória padrão)
+            version: versão do modelo na chave (None = derivada do arquivo do modelo)
+        """
+        self.analyzer = analyzer
+        self.cache = cache or ResultCache()
+        self.version = version or model_version(analyzer.detector.model_path)
+
+    def analyze_equipment_screen(self, screenshot, visualize_path=None):
+        """Mesma interface do HybridAnalyzer; decodifica uma vez e reaproveita no miss"""
+        img = load_image(screenshot)
+        key, details = screen_key(img)
+
+        result = self.cache.get(key, self.version, details)
+        if result is None:
+            result = self.analyzer.analyze_equipment_screen(img, visualize_path)
+            self.cache.put(key, self.version, result, details)
+        elif visualize_path:
+            self.analyzer.detector.visualize(img, result['raw_detections'], visualize_path)
+
+        return result
@@ -0,0 +1,212 @@
+# src/analyzer/screen_analyzer.py
+"""
+Layout da tela: tipo de tela + proporção -> regiões de interesse (ROIs)
+
+A tela de build tem layout fixo por proporção. Em vez de rodar YOLO e
+template matching no frame inteiro, a screenshot é classificada uma vez
+(miniatura em cinza contra screenshots de referência) e o layout devolve
+ROIs normalizadas (0-1) do painel do personagem, dos cards de relíquia e
+da lista de stats. Matchers e OCR trabalham só nesses recortes.
+
+Coordenadas são calibradas em 16:9. Em telas mais largas (21:9, 32:9) a
+UI fica ancorada nas bordas e sobra espaço no meio; em telas mais altas
+(16:10, 4:3) sobra em cima/embaixo. Cada ROI diz em que borda se ancora.
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+
+REFERENCE_ASPECT = 16 / 9
+
+ASPECT_RATIOS = {
+    '4:3': 4 / 3,
+    '16:10': 16 / 10,
+    '16:9': 16 / 9,
+    '21:9': 64 / 27,
+    '32:9': 32 / 9,
+}
+
+# ROIs em 16:9: (x1, y1, x2, y2), (âncora horizontal, âncora vertical)
+LAYOUTS = {
+    'equipment': {
+        'character': ((0.00, 0.08, 0.36, 1.00), ('left', 'center')),
+        'stats': ((0.36, 0.12, 0.62, 0.92), ('center', 'center')),
+        'relics': ((0.62, 0.08, 1.00, 0.95), ('right', 'center')),
+    },
+    'character': {
+        'character': ((0.00, 0.00, 0.55, 1.00), ('left', 'center')),
+        'stats': ((0.62, 0.10, 1.00, 0.90), ('right', 'center')),
+    },
+}
+
+# Categoria do TemplateMatcher -> ROI onde ela aparece
+CATEGORY_ROIS = {'char': 'character', 'equip': 'relics'}
+
+THUMBNAIL_SIZE = (64, 36)
+
+
+def closest_aspect(width, height):
+    """Nome da proporção conhecida mais próxima ('16:9', '21:9', ...)"""
+    aspect = width / height
+    return min(ASPECT_RATIOS, key=lambda name: abs(np.log(ASPECT_RATIOS[name] / aspect)))
+
+
+def adapt_roi(roi, anchors, aspect):
+    """ROI calibrada em 16:9 -> coordenadas normalizadas na proporção pedida"""
+    x1, y1, x2, y2 = roi
+    h_anchor, v_anchor = anchors
+
+    if aspect >= REFERENCE_ASPECT:
+        fraction = REFERENCE_ASPECT / aspect  # largura útil (altura manda)
+        x1, x2 = (_anchor(x, h_anchor, fraction) for x in (x1, x2))
+    else:
+        fraction = aspect / REFERENCE_ASPECT  # altura útil (largura manda)
+        y1, y2 = (_anchor(y, v_anchor, fraction) for y in (y1, y2))
+
+    return (x1, y1, x2, y2)
+
+
+def _anchor(value, anchor, fraction):
+    if anchor in ('left', 'top'):
+        return value * fraction
+    if anchor in ('right', 'bottom'):
+        return 1 - (1 - value) * fraction
+    return 0.5 + (value - 0.5) * fraction
+
+
+class ScreenLayout(NamedTuple):
+    """Layout classificado de uma screenshot"""
+    screen_type: str
+    aspect: str
+    rois: dict          # nome -> (x1, y1, x2, y2) normalizados
+
+    def to_pixels(self, name, shape):
+        """ROI em pixels (x1, y1, x2, y2) para uma imagem de shape (h, w, ...)"""
+        h, w = shape[:2]
+        x1, y1, x2, y2 = self.rois[name]
+        return (max(0, int(x1 * w)), max(0, int(y1 * h)),
+                min(w, int(round(x2 * w))), min(h, int(round(y2 * h))))
+
+    def roi_at(self, x, y, shape):
+        """Nome da primeira ROI que contém o ponto (x, y) em pixels, ou None"""
+        for name in self.rois:
+            x1, y1, x2, y2 = self.to_pixels(name, shape)
+            if x1 <= x < x2 and y1 <= y < y2:
+                return name
+        return None
+
+    def crop(self, image, name):
+        """Recorte (view, sem cópia) de uma ROI"""
+        x1, y1, x2, y2 = self.to_pixels(name, image.shape)
+        return image[y1:y2, x1:x2]
+
+    def union(self, shape, names=None):
+        """Menor retângulo em pixels que cobre as ROIs pedidas (todas por padrão)"""
+        boxes = np.array([self.to_pixels(n, shape) for n in (names or self.rois)])
+        return (int(boxes[:, 0].min()), int(boxes[:, 1].min()),
+                int(boxes[:, 2].max()), int(boxes[:, 3].max()))
+
+    def search_regions(self):
+        """Regiões por categoria no formato de TemplateMatcher.search_regions"""
+        return {category: [self.rois[name]]
+                for category, name in CATEGORY_ROIS.items() if name in self.rois}
+
+    def apply(self, template_matcher):
+        """Restringe a busca do TemplateMatcher às ROIs deste layout"""
+        for category, regions in self.search_regions().items():
+            template_matcher.set_search_regions(category, regions)
+
+
+class ScreenAnalyzer:
+    """Classifica tipo de tela e proporção, devolvendo o ScreenLayout"""
+
+    def __init__(self, references_dir='data/templates/screens', default_type='equipment',
+                 threshold=0.5):
+        """
+        Args:
+            references_dir: screenshots de referência, <tipo_de_tela>*.png
+                            (ex: equipment.png, character_1.png)
+            default_type: tipo usado sem referências ou sem match confiável
+            threshold: correlação mínima com a miniatura de referência
+        """
+        if default_type not in LAYOUTS:
+            raise ValueError(f"Tipo de tela desconhecido: {default_type}")
+
+        self.references_dir = Path(references_dir)
+        self.default_type = default_type
+        self.threshold = threshold
+
+        self.reference_types = []
+        self.references = None
+        self._layouts = {}
+
+    def load_references(self):
+        """Miniaturas das screenshots de referência (uma vez)"""
+        types, thumbs = [], []
+        for img_file in sorted(self.references_dir.glob('*.png')):
+            screen_type = img_file.stem.split('_')[0]
+            img = cv2.imread(str(img_file))
+            if screen_type not in LAYOUTS or img is None:
+                continue
+            types.append(screen_type)
+            thumbs.append(self._thumbnail(img))
+
+        self.reference_types = types
+        if not thumbs:
+            # Sem referências: classify() cai sempre em default_type
+            self.references = np.zeros((0, THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1]), np.float32)
+            return self
+
+        self.references = np.array(thumbs).reshape(len(thumbs), -1)
+        return self
+
+    def analyze(self, image):
+        """
+        Args:
+            image: screenshot BGR (ou cinza)
+
+        Returns:
+            ScreenLayout
+        """
+        h, w = image.shape[:2]
+        return self.layout(self.classify(image), closest_aspect(w, h))
+
+    def classify(self, image):
+        """Tipo de tela pela miniatura mais parecida (correlação normalizada)"""
+        if self.references is None:
+            self.load_references()
+        if not len(self.reference_types):
+            return self.default_type
+
+        scores = self.references @ self._thumbnail(image).ravel() / self.references.shape[1]
+        best = int(np.argmax(scores))
+        return self.reference_types[best] if scores[best] >= self.threshold else self.default_type
+
+    def layout(self, screen_type, aspect):
+        """ROIs de (tipo de tela, proporção), calculadas uma vez por combinação"""
+        key = (screen_type, aspect)
+        if key not in self._layouts:
+            ratio = ASPECT_RATIOS[aspect]
+            rois = {name: adapt_roi(roi, anchors, ratio)
+                    for name, (roi, anchors) in LAYOUTS[screen_type].items()}
+            self._layouts[key] = ScreenLayout(screen_type, aspect, rois)
+        return self._layouts[key]
+
+    def _thumbnail(self, image):
+        """Área 16:9 da UI em miniatura cinza, média 0 e desvio 1"""
+        h, w = image.shape[:2]
+        if w / h > REFERENCE_ASPECT:
+            # Ultrawide: laterais (ancoradas) lado a lado, sem o vão do meio
+            side = int(round(h * REFERENCE_ASPECT / 2))
+            image = np.hstack([image[:, :side], image[:, w - side:]])
+        elif w / h < REFERENCE_ASPECT:
+            cut = (h - int(round(w / REFERENCE_ASPECT))) // 2
+            image = image[cut:h - cut]
+
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+        return (thumb - thumb.mean()) / (thumb.std() + 1e-6)
@@ -0,0 +1,193 @@
+# src/bot/analysis_service.py
+"""
+Front-end assíncrono do bot
+
+Recebe screenshots numa fila limitada e despacha para um pool de
+processos. Cada processo mantém um HybridAnalyzer quente (detector YOLO
++ OCR carregados uma vez), então uploads em rajada usam todos os núcleos
+em vez de enfileirar atrás de uma única análise lenta.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
+
+
+# Analyzer do processo worker (criado uma vez pelo initializer)
+_worker_analyzer = None
+
+
+def _init_worker(model_path, analyzer_factory):
+    """Roda uma vez em cada processo do pool: carrega modelo e OCR"""
+    global _worker_analyzer
+
+    if analyzer_factory is None:
+        from src.analyzer.hybrid_analyzer import HybridAnalyzer
+        analyzer_factory = HybridAnalyzer
+
+    _worker_analyzer = analyzer_factory(model_path)
+
+
+def _analyze_in_worker(screenshot):
+    """Executado no worker: screenshot em bytes/caminho -> resultado"""
+    return _worker_analyzer.analyze_equipment_screen(screenshot)
+
+
+def _ping():
+    return os.getpid()
+
+
+class ServiceBusy(Exception):
+    """Fila cheia: o cliente deve tentar de novo mais tarde"""
+
+
+class AnalysisService:
+    """Fila limitada + pool de processos com analyzers quentes"""
+
+    def __init__(self, model_path, workers=None, queue_size=32, timeout=60.0,
+                 analyzer_factory=None, executor=None):
+        """
+        Args:
+            model_path: modelo YOLO carregado em cada worker
+            workers: processos no pool (None = núcleos disponíveis)
+            queue_size: máximo de pedidos aguardando (backpressure)
+            timeout: tempo máximo por pedido, fila + análise (segundos).
+                     Só libera o chamador: uma análise já iniciada não é
+                     interrompida e segura o worker até terminar, então
+                     pedidos expirados não viram capacidade livre
+            analyzer_factory: callable(model_path) -> analyzer; precisa ser
+                              picklable (função de módulo). None = HybridAnalyzer
+            executor: executor pronto (ex: ThreadPoolExecutor em testes);
+                      nesse caso o initializer roda no próprio processo
+        """
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.analyzer_factory = analyzer_factory
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._dispatchers = []
+
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0,
+                      'rejected': 0, 'timed_out': 0, 'cancelled': 0}
+
+    async def start(self):
+        """Sobe o pool, aquece os workers e inicia os despachantes"""
+        loop = asyncio.get_running_loop()
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.model_path, self.analyzer_factory)
+            )
+            # Força a criação dos processos (e o carregamento dos modelos) agora
+            await asyncio.gather(*[loop.run_in_executor(self._executor, _ping)
+                                   for _ in range(self.workers)])
+        else:
+            _init_worker(self.model_path, self.analyzer_factory)
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatchers = [asyncio.create_task(self._dispatch())
+                             for _ in range(self.workers)]
+
+        print(f"✓ Serviço de análise pronto: {self.workers} workers, fila de {self.queue_size}")
+
+    async def stop(self):
+        """Cancela os despachantes e encerra o pool"""
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+        # Pedidos que ainda estavam na fila
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def submit(self, screenshot, timeout=None):
+        """
+        Analisa uma screenshot
+
+        Args:
+            screenshot: bytes (anexo) ou caminho; precisa ser picklable
+            timeout: sobrescreve o timeout padrão do serviço
+
+        Returns:
+            resultado de HybridAnalyzer.analyze_equipment_screen
+
+        Raises:
+            ServiceBusy: fila cheia
+            asyncio.TimeoutError: passou do tempo limite (se a análise já
+                começou, o worker segue ocupado com ela até o fim)
+        """
+        if self._queue is None:
+            raise RuntimeError("Serviço não iniciado: chame start() primeiro")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((screenshot, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise ServiceBusy(f"Fila cheia ({self.queue_size} pedidos aguardando)")
+
+        self.stats['submitted'] += 1
+
+        # Timeout ou cancelamento do chamador cancelam o future; o despachante
+        # descarta pedidos cancelados que ainda não saíram da fila
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timed_out'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+
+    def pending(self):
+        """Pedidos aguardando na fila"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _dispatch(self):
+        """Tira pedidos da fila e roda no pool (um por vez por despachante)"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            screenshot, future = await self._queue.get()
+            try:
+                if future.done():
+                    continue  # cancelado/expirou enquanto esperava
+
+                try:
+                    result = await loop.run_in_executor(self._executor,
+                                                        _analyze_in_worker, screenshot)
+                except asyncio.CancelledError:
+                    # Serviço parando: não deixa o chamador esperando até o timeout
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+
+                self.stats['completed'] += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,87 @@
+# src/bot/fake_client.py
+"""
+Cliente de chat falso, em processo
+
+Simula usuários mandando screenshots para o bot sem precisar de Discord:
+cada upload vira um submit no AnalysisService e a resposta volta como a
+mensagem de texto que o bot enviaria.
+"""
+
+from pathlib import Path
+import asyncio
+import time
+
+from src.bot.analysis_service import AnalysisService, ServiceBusy
+
+
+class FakeChatClient:
+    """Envia anexos para o serviço e guarda as respostas"""
+
+    def __init__(self, service):
+        self.service = service
+        self.replies = []
+
+    async def upload(self, user, attachment, timeout=None):
+        """
+        Simula um usuário mandando uma screenshot
+
+        Args:
+            user: nome do usuário
+            attachment: bytes da imagem ou caminho
+            timeout: timeout do pedido (None = padrão do serviço)
+
+        Returns:
+            texto da resposta do bot
+        """
+        start = time.perf_counter()
+        try:
+            result = await self.service.submit(attachment, timeout=timeout)
+            reply = self._format(result)
+        except ServiceBusy:
+            reply = "⏳ Muitos pedidos no momento, tente de novo em instantes."
+        except asyncio.TimeoutError:
+            reply = "⌛ A análise demorou demais, tente de novo."
+        except Exception as e:
+            reply = f"❌ Não foi possível analisar: {e}"
+
+        elapsed = time.perf_counter() - start
+        self.replies.append({'user': user, 'reply': reply, 'seconds': elapsed})
+        return reply
+
+    async def burst(self, uploads, timeout=None):
+        """
+        Vários uploads simultâneos
+
+        Args:
+            uploads: lista de (usuário, anexo)
+
+        Returns:
+            respostas na mesma ordem
+        """
+        return await asyncio.gather(*[self.upload(user, attachment, timeout)
+                                      for user, attachment in uploads])
+
+    def _format(self, result):
+        """Resumo curto do resultado, como o bot responderia"""
+        stats = ', '.join(s['value'] for s in result.get('stats', []) if s['value'])
+        return (f"✓ {len(result.get('character', []))} personagem(ns), "
+                f"{len(result.get('relics', []))} relíquia(s), "
+                f"{len(result.get('equipment', []))} equipamento(s). "
+                f"Stats: {stats or '-'}")
+
+
+async def _demo(model_path, folder):
+    async with AnalysisService(model_path) as service:
+        client = FakeChatClient(service)
+        uploads = [(f'user{i}', img.read_bytes())
+                   for i, img in enumerate(sorted(Path(folder).glob('*.png')))]
+
+        for (user, _), reply in zip(uploads, await client.burst(uploads)):
+            print(f"{user}: {reply}")
+
+        print(f"\n📊 {service.stats}")
+
+
+# Exemplo de uso
+if __name__ == '__main__':
+    asyncio.run(_demo('runs/detect/star_rail_detector/weights/best.pt', 'meus_screenshots'))
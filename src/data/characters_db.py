@@ -0,0 +1,222 @@
+# src/data/characters_db.py
+"""
+Banco embutido de personagens, light cones e sets de relíquia
+
+Carregado uma vez de um JSON (ou SQLite) local e indexado em memória:
+- lookup O(1) por id e por nome de template (stems do TemplateMatcher)
+- busca aproximada por nome via índice de trigramas, tolerante aos
+  erros típicos do OCR (mesma normalização do parser de stats)
+
+Use get_database() no processo principal antes de criar o pool de
+workers: com fork, os índices são compartilhados (somente leitura).
+"""
+
+from collections import Counter
+from pathlib import Path
+import json
+import sqlite3
+
+from src.ocr.text_parser import normalize_name
+
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'game_db.json'
+
+# Prefixos usados pelo TemplateMatcher ('char_kafka', 'equip_in_the_night')
+TEMPLATE_PREFIXES = {'character': 'char', 'light_cone': 'equip', 'relic_set': 'equip'}
+
+
+class _Record:
+    """Registro compacto (sem __dict__), campos definidos em __slots__"""
+
+    __slots__ = ()
+    KIND = None
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            value = fields.get(slot)
+            if isinstance(value, list):
+                value = tuple(value)
+            setattr(self, slot, value)
+
+    def names(self):
+        """Nome principal + aliases"""
+        return (self.name,) + (self.aliases or ())
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.id!r})"
+
+
+class Character(_Record):
+    __slots__ = ('id', 'name', 'aliases', 'element', 'path', 'rarity',
+                 'templates', 'base_stats', 'stat_weights')
+    KIND = 'character'
+
+
+class LightCone(_Record):
+    __slots__ = ('id', 'name', 'aliases', 'path', 'rarity', 'templates', 'base_stats')
+    KIND = 'light_cone'
+
+
+class RelicSet(_Record):
+    __slots__ = ('id', 'name', 'aliases', 'kind', 'templates', 'bonus_2pc', 'bonus_4pc')
+    KIND = 'relic_set'
+
+
+# Seção do arquivo -> classe do registro
+SECTIONS = {'characters': Character, 'light_cones': LightCone, 'relic_sets': RelicSet}
+
+
+def _trigrams(text):
+    """Trigramas do nome normalizado (com bordas, para nomes curtos)"""
+    padded = f'  {normalize_name(text)} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GameDatabase:
+    """Índices em memória sobre os registros do jogo"""
+
+    def __init__(self, records=()):
+        self.by_id = {kind: {} for kind in TEMPLATE_PREFIXES}
+        self.by_template = {}
+        self._by_name = {}
+        self._grams = {}
+        self._gram_index = {}
+
+        for record in records:
+            self._index(record)
+
+    @classmethod
+    def load(cls, path=DEFAULT_DB_PATH):
+        """Carrega de .json ou .db/.sqlite"""
+        path = Path(path)
+        if path.suffix.lower() in ('.db', '.sqlite', '.sqlite3'):
+            sections = cls._read_sqlite(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                sections = json.load(f)
+
+        records = [
+            SECTIONS[section](**data)
+            for section, rows in sections.items() if section in SECTIONS
+            for data in rows
+        ]
+        return cls(records)
+
+    def save_sqlite(self, path):
+        """Exporta para SQLite (uma tabela por seção, registro em JSON)"""
+        conn = sqlite3.connect(str(path))
+        try:
+            for section, record_cls in SECTIONS.items():
+                conn.execute(f"DROP TABLE IF EXISTS {section}")
+                conn.execute(f"CREATE TABLE {section} (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+                conn.executemany(
+                    f"INSERT INTO {section} (id, data) VALUES (?, ?)",
+                    [(r.id, json.dumps(r.to_dict(), ensure_ascii=False))
+                     for r in self.by_id[record_cls.KIND].values()]
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, kind, record_id):
+        """Registro por id ('character', 'kafka') ou None"""
+        return self.by_id[kind].get(record_id)
+
+    def character(self, record_id):
+        return self.by_id['character'].get(record_id)
+
+    def light_cone(self, record_id):
+        return self.by_id['light_cone'].get(record_id)
+
+    def relic_set(self, record_id):
+        return self.by_id['relic_set'].get(record_id)
+
+    def from_template(self, template_name):
+        """Registro a partir do nome do template ('char_kafka' ou só 'kafka_avatar')"""
+        return self.by_template.get(template_name)
+
+    def lookup(self, name, kind=None):
+        """Nome exato (normalizado) -> registro, O(1)"""
+        record = self._by_name.get(normalize_name(name))
+        if record is not None and (kind is None or record.KIND == kind):
+            return record
+        return None
+
+    def search(self, text, kind=None, limit=5, min_score=0.3):
+        """
+        Busca aproximada para nomes lidos pelo OCR
+
+        Candidatos vêm do índice de trigramas (só nomes que compartilham
+        algum trigrama são pontuados); score = coeficiente de Dice.
+
+        Returns:
+            lista de (registro, score), melhor primeiro
+        """
+        exact = self.lookup(text, kind)
+        if exact is not None:
+            return [(exact, 1.0)]
+
+        query = _trigrams(text)
+        if not query:
+            return []
+
+        shared = Counter()
+        for gram in query:
+            shared.update(self._gram_index.get(gram, ()))
+
+        best = {}
+        for key, count in shared.items():
+            record = self._by_name[key]
+            if kind is not None and record.KIND != kind:
+                continue
+            score = 2 * count / (len(query) + len(self._grams[key]))
+            if score >= min_score and score > best.get(record, 0):
+                best[record] = score
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def _index(self, record):
+        self.by_id[record.KIND][record.id] = record
+
+        prefix = TEMPLATE_PREFIXES[record.KIND]
+        for template in record.templates or (record.id,):
+            self.by_template.setdefault(template, record)
+            self.by_template.setdefault(f'{prefix}_{template}', record)
+
+        for name in record.names():
+            key = normalize_name(name)
+            if not key or key in self._by_name:
+                continue
+            self._by_name[key] = record
+            self._grams[key] = _trigrams(name)
+            for gram in self._grams[key]:
+                self._gram_index.setdefault(gram, []).append(key)
+
+    @staticmethod
+    def _read_sqlite(path):
+        conn = sqlite3.connect(str(path))
+        try:
+            tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            return {
+                section: [json.loads(row[0]) for row in conn.execute(f"SELECT data FROM {section}")]
+                for section in SECTIONS if section in tables
+            }
+        finally:
+            conn.close()
+
+
+# Uma instância por arquivo e por processo (herdada pelos workers via fork)
+_DATABASES = {}
+
+
+def get_database(path=DEFAULT_DB_PATH):
+    """Banco compartilhado: carrega e indexa só na primeira chamada"""
+    key = str(Path(path).resolve())
+    if key not in _DATABASES:
+        _DATABASES[key] = GameDatabase.load(path)
+    return _DATABASES[key]
@@ -0,0 +1,209 @@
+# src/detector/onnx_detector.py
+"""
+Backend ONNX Runtime (CPU) para o detector YOLO
+
+Carrega o .onnx gerado por StarRailYOLOTrainer.export_model sem puxar
+ultralytics/torch. Faz o letterbox e o NMS por conta própria, replicando
+o pré/pós-processamento do ultralytics para que as detecções batam com
+as de StarRailDetector.detect().
+"""
+
+import cv2
+import numpy as np
+
+from src.vision.image_io import load_image
+
+
+# Offset por classe no NMS (mesmo truque do ultralytics: boxes de classes
+# diferentes nunca se sobrepõem)
+MAX_WH = 7680
+
+
+def letterbox(img, new_shape=(640, 640), color=(114, 114, 114)):
+    """
+    Redimensiona mantendo proporção e completa com borda cinza
+
+    Args:
+        img: imagem BGR (H, W, 3)
+        new_shape: (altura, largura) da entrada do modelo
+        color: cor da borda
+
+    Returns:
+        (imagem com letterbox, ganho, (pad_x, pad_y))
+    """
+    h, w = img.shape[:2]
+    new_h, new_w = new_shape
+
+    gain = min(new_h / h, new_w / w)
+    unpad_w, unpad_h = int(round(w * gain)), int(round(h * gain))
+
+    dw = (new_w - unpad_w) / 2
+    dh = (new_h - unpad_h) / 2
+
+    if (w, h) != (unpad_w, unpad_h):
+        img = cv2.resize(img, (unpad_w, unpad_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right,
+                             cv2.BORDER_CONSTANT, value=color)
+
+    return img, gain, (left, top)
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.45):
+    """
+    NMS guloso com IoU vetorizado
+
+    Args:
+        boxes: array (N, 4) em xyxy
+        scores: array (N,)
+        iou_threshold: boxes com IoU acima disso são suprimidas
+
+    Returns:
+        índices mantidos, em ordem decrescente de score
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        # IoU da melhor box contra todas as restantes de uma vez
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.intp)
+
+
+class OnnxYOLOModel:
+    """Sessão ONNX Runtime de um YOLOv8 exportado"""
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Args:
+            model_path: caminho do .onnx exportado
+            num_threads: threads intra-op (None = padrão do onnxruntime)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Export com dynamic=True deixa dimensões simbólicas (str)
+        batch, _, height, width = model_input.shape
+        self.input_shape = (
+            height if isinstance(height, int) else 640,
+            width if isinstance(width, int) else 640
+        )
+        self.fixed_batch = batch if isinstance(batch, int) else None
+
+    def predict(self, images, conf=0.25, iou=0.45, max_det=300):
+        """
+        Roda inferência em uma lista de imagens
+
+        Args:
+            images: lista de caminhos, bytes e/ou arrays BGR
+            conf: threshold de confiança
+            iou: threshold de IoU do NMS
+            max_det: máximo de detecções por imagem
+
+        Returns:
+            lista de arrays (N, 6) [x1, y1, x2, y2, conf, class_id], um por imagem
+        """
+        frames = [load_image(img) for img in images]
+
+        # Modelo com batch fixo (export padrão) roda de `fixed_batch` em `fixed_batch`
+        step = self.fixed_batch or len(frames) or 1
+
+        outputs = []
+        for start in range(0, len(frames), step):
+            chunk = frames[start:start + step]
+            blob, gains = self._preprocess(chunk)
+            raw = self.session.run(None, {self.input_name: blob})[0]
+
+            for pred, frame, gain in zip(raw, chunk, gains):
+                outputs.append(self._postprocess(pred, frame.shape[:2], gain,
+                                                 conf, iou, max_det))
+
+        return outputs
+
+    def _preprocess(self, frames):
+        """Letterbox + BGR->RGB + HWC->CHW + normalização, empilhado em um batch"""
+        padded = []
+        gains = []
+        for frame in frames:
+            img, gain, _ = letterbox(frame, self.input_shape)
+            padded.append(img)
+            gains.append(gain)
+
+        # Completa o batch fixo repetindo a última imagem (saída descartada)
+        if self.fixed_batch:
+            padded += [padded[-1]] * (self.fixed_batch - len(padded))
+
+        blob = np.stack(padded)[..., ::-1].transpose(0, 3, 1, 2)
+        blob = np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+
+        return blob, gains
+
+    def _postprocess(self, pred, orig_shape, gain, conf, iou, max_det):
+        """Decodifica a saída (4 + nc, anchors) para boxes na imagem original"""
+        pred = pred.T  # (anchors, 4 + nc)
+
+        class_scores = pred[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+        mask = scores > conf
+        if not mask.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        xywh = pred[mask, :4]
+        scores = scores[mask]
+        class_ids = class_ids[mask]
+
+        boxes = np.empty_like(xywh)
+        boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+        boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+        boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+        boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+
+        # NMS por classe via offset
+        keep = non_max_suppression(boxes + class_ids[:, None] * MAX_WH, scores, iou)
+        keep = keep[:max_det]
+
+        boxes = boxes[keep]
+        scores = scores[keep]
+        class_ids = class_ids[keep]
+
+        # Desfaz letterbox (mesmo arredondamento do scale_boxes do ultralytics)
+        h, w = orig_shape
+        pad_x = round((self.input_shape[1] - w * gain) / 2 - 0.1)
+        pad_y = round((self.input_shape[0] - h * gain) / 2 - 0.1)
+
+        boxes[:, [0, 2]] -= pad_x
+        boxes[:, [1, 3]] -= pad_y
+        boxes /= gain
+
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+        return np.column_stack([boxes, scores, class_ids]).astype(np.float32)
@@ -0,0 +1,111 @@
+# src/detector/tiling.py
+"""
+Inferência em tiles para screenshots grandes (1440p ultrawide, 4K)
+
+O YOLO reduz o frame inteiro para 640px e, em 4K, os números dos stats
+viram poucos pixels. Aqui o frame é dividido em tiles sobrepostos (todos
+vão ao modelo num único lote) e as caixas são juntadas de volta:
+
+- caixas cortadas numa emenda interna (encostadas na borda do tile, mas
+  não na borda da imagem) perdem prioridade para as inteiras
+- NMS por classe com IoU e também com "contenção" (interseção sobre a
+  área da menor caixa), que remove os pedaços de objeto cortados
+"""
+
+import numpy as np
+
+from src.detector.onnx_detector import MAX_WH
+
+
+def tile_grid(height, width, tile_size=1280, overlap=0.2):
+    """
+    Tiles (x1, y1, x2, y2) cobrindo a imagem, com sobreposição
+
+    O último tile de cada eixo é alinhado à borda, então nenhum fica menor
+    que tile_size (exceto se a imagem for menor que isso).
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+    xs = _starts(width, tile_size, stride)
+    ys = _starts(height, tile_size, stride)
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in ys for x in xs]
+
+
+def _starts(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def merge_tile_boxes(rows_per_tile, tiles, shape, iou_threshold=0.45, containment=0.8,
+                     edge=2):
+    """
+    Junta as detecções dos tiles em coordenadas da imagem inteira
+
+    Args:
+        rows_per_tile: por tile, array (N, 6) [x1, y1, x2, y2, conf, cls]
+        tiles: (x1, y1, x2, y2) de cada tile (tile_grid)
+        shape: (altura, largura, ...) da imagem inteira
+        iou_threshold: IoU acima disso = mesma detecção
+        containment: interseção / área da menor caixa acima disso = mesma detecção
+        edge: distância (px) da emenda para a caixa contar como cortada
+
+    Returns:
+        array (N, 6) em ordem decrescente de confiança
+    """
+    height, width = shape[:2]
+    chunks, cut = [], []
+
+    for rows, (tx1, ty1, tx2, ty2) in zip(rows_per_tile, tiles):
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        if not len(rows):
+            continue
+
+        local = rows[:, :4]
+        # Encostada numa borda do tile que não é borda da imagem
+        touches = np.zeros(len(rows), dtype=bool)
+        if tx1 > 0:
+            touches |= local[:, 0] <= edge
+        if ty1 > 0:
+            touches |= local[:, 1] <= edge
+        if tx2 < width:
+            touches |= local[:, 2] >= (tx2 - tx1) - edge
+        if ty2 < height:
+            touches |= local[:, 3] >= (ty2 - ty1) - edge
+
+        shifted = rows.copy()
+        shifted[:, [0, 2]] += tx1
+        shifted[:, [1, 3]] += ty1
+        chunks.append(shifted)
+        cut.append(touches)
+
+    if not chunks:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    rows = np.concatenate(chunks)
+    cut = np.concatenate(cut)
+
+    # Offset por classe: caixas de classes diferentes nunca se sobrepõem
+    boxes = rows[:, :4] + rows[:, 5:6] * MAX_WH
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    # Inteiras primeiro, depois por confiança
+    order = np.lexsort((-rows[:, 4], cut))
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        contained = inter / (np.minimum(areas[i], areas[rest]) + 1e-9)
+
+        order = rest[(iou <= iou_threshold) & (contained <= containment)]
+
+    merged = rows[keep]
+    return merged[np.argsort(-merged[:, 4], kind='stable')]
@@ -3,19 +3,46 @@
 Detector de personagens e equipamentos usando YOLO
 """
 
-from ultralytics import YOLO
+from pathlib import Path
 import cv2
 import numpy as np
 
+from src.vision.image_io import load_image, is_encoded
+from src.detector.tiling import tile_grid, merge_tile_boxes
+
 class StarRailDetector:
     """Detector YOLO para Star Rail"""
     
-    def __init__(self, model_path='runs/detect/star_rail_detector/weights/best.pt'):
+    def __init__(self, model_path='runs/detect/star_rail_detector/weights/best.pt',
+                 backend=None, tile_threshold=2560, tile_size=1280, tile_overlap=0.2):
         """
         Args:
-            model_path: caminho pro modelo treinado
+            model_path: caminho pro modelo treinado (.pt ou .onnx exportado)
+            backend: 'ultralytics' ou 'onnx' (None = decide pela extensão)
+            tile_threshold: imagens com lado maior que isso (px) são
+                            processadas em tiles; None desliga
+            tile_size: lado de cada tile (px)
+            tile_overlap: sobreposição entre tiles vizinhos (fração)
         """
-        self.model = YOLO(model_path)
+        if backend is None:
+            backend = 'onnx' if Path(model_path).suffix.lower() == '.onnx' else 'ultralytics'
+        
+        if backend == 'onnx':
+            # onnxruntime puro: sem torch no processo
+            from src.detector.onnx_detector import OnnxYOLOModel
+            self.model = OnnxYOLOModel(model_path)
+        elif backend == 'ultralytics':
+            from ultralytics import YOLO
+            self.model = YOLO(model_path)
+        else:
+            raise ValueError(f"Backend desconhecido: {backend}")
+        
+        self.backend = backend
+        self.model_path = str(model_path)
+        
+        self.tile_threshold = tile_threshold
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
         
         # Mapeamento de classes
         self.class_names = {
@@ -27,67 +54,163 @@ class StarRailDetector:
             5: 'equipment_name'
         }
     
-    def detect(self, image_path, confidence=0.5):
+    def detect(self, image, confidence=0.5, tiled=None):
         """
         Detecta objetos na imagem
         
         Args:
-            image_path: caminho da screenshot
+            image: caminho da screenshot, bytes ou array BGR já decodificado
             confidence: threshold de confiança (0-1)
+            tiled: força (True) ou desliga (False) os tiles; None = pelo tamanho
         
         Returns:
             dict com detecções organizadas por tipo
         """
+        # Tiles forçados precisam do array (o tamanho da imagem define os tiles)
+        source = self._as_source(image, decode=bool(tiled))
+        
         # Roda inferência
+        if self._use_tiles(source, tiled):
+            results = [self._predict_tiled(source, confidence)]
+        else:
+            results = self._predict(source, confidence)
+        
+        # Processa resultados
+        detections = self.empty_detections()
+        
+        for rows in results:
+            self._collect_boxes(rows, detections)
+        
+        return detections
+    
+    def detect_batch(self, images, confidence=0.5, batch_size=16):
+        """
+        Detecta objetos em várias screenshots de uma vez
+        
+        Cada chamada ao modelo recebe até `batch_size` imagens, então o
+        overhead de predict() é pago uma vez por lote e não por screenshot.
+        
+        Args:
+            images: lista de caminhos, bytes e/ou arrays BGR
+            confidence: threshold de confiança (0-1)
+            batch_size: quantas imagens mandar por chamada ao modelo
+        
+        Returns:
+            lista de dicts (mesmo formato de detect()), na ordem de entrada
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size inválido: {batch_size}")
+        
+        sources = [self._as_source(img) for img in images]
+        
+        # Imagens grandes vão em tiles (cada uma já é um lote de tiles)
+        tiled = [self._use_tiles(source, None) for source in sources]
+        regular = [source for source, big in zip(sources, tiled) if not big]
+        
+        regular_results = []
+        for start in range(0, len(regular), batch_size):
+            regular_results.extend(self._predict(regular[start:start + batch_size], confidence))
+        regular_results = iter(regular_results)
+        
+        # Um result por imagem, na ordem de entrada
+        all_detections = []
+        for source, big in zip(sources, tiled):
+            rows = self._predict_tiled(source, confidence) if big else next(regular_results)
+            detections = self.empty_detections()
+            self._collect_boxes(rows, detections)
+            all_detections.append(detections)
+        
+        return all_detections
+    
+    def _as_source(self, image, decode=False):
+        """
+        Normaliza a entrada para o que o backend aceita (str ou np.ndarray)
+        Arrays passam sem cópia; bytes são decodificados uma única vez.
+        Com tiles ligados (ou decode=True), caminhos também são
+        decodificados aqui (o tamanho decide o modo).
+        """
+        if isinstance(image, np.ndarray):
+            return image
+        if decode or is_encoded(image) or self.tile_threshold:
+            return load_image(image)
+        return str(image)
+    
+    def _use_tiles(self, source, tiled):
+        if tiled is not None:
+            return tiled
+        return (self.tile_threshold is not None and isinstance(source, np.ndarray)
+                and max(source.shape[:2]) > self.tile_threshold)
+    
+    def _predict_tiled(self, image, confidence):
+        """
+        Tiles sobrepostos num único lote + NMS nas emendas
+        
+        Returns:
+            array (N, 6) em coordenadas da imagem inteira
+        """
+        tiles = tile_grid(image.shape[0], image.shape[1], self.tile_size, self.tile_overlap)
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        
+        results = self._predict(crops, confidence)
+        return merge_tile_boxes(results, tiles, image.shape, iou_threshold=0.45)
+    
+    def empty_detections(self):
+        """Dict vazio com uma lista por classe"""
+        return {class_name: [] for class_name in self.class_names.values()}
+    
+    def _predict(self, source, confidence):
+        """
+        Roda o backend e devolve, por imagem, um array (N, 6)
+        [x1, y1, x2, y2, conf, class_id]
+        """
+        if self.backend == 'onnx':
+            images = source if isinstance(source, list) else [source]
+            return self.model.predict(images, conf=confidence, iou=0.45)
+        
         results = self.model.predict(
-            source=image_path,
+            source=source,
             conf=confidence,
             iou=0.45,
+            batch=len(source) if isinstance(source, list) else 1,
             verbose=False
         )
-        
-        # Processa resultados
-        detections = {
-            'character': [],
-            'equipment_icon': [],
-            'relic_icon': [],
-            'stat_value': [],
-            'character_name': [],
-            'equipment_name': []
-        }
-        
-        for result in results:
-            boxes = result.boxes
+        return [result.boxes.data.cpu().numpy() for result in results]
+    
+    def _collect_boxes(self, rows, detections):
+        """Converte as linhas (N, 6) de uma imagem para o dict de detecções"""
+        for row in rows:
+            # Extrai informações
+            class_id = int(row[5])
+            confidence = float(row[4])
+            bbox = row[:4].tolist()  # [x1, y1, x2, y2]
             
-            for box in boxes:
-                # Extrai informações
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                bbox = box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-                
-                class_name = self.class_names.get(class_id, 'unknown')
-                
-                detection = {
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': bbox,
-                    'center': self._get_center(bbox)
-                }
-                
-                detections[class_name].append(detection)
-        
-        return detections
+            class_name = self.class_names.get(class_id, 'unknown')
+            
+            detection = {
+                'class': class_name,
+                'confidence': confidence,
+                'bbox': bbox,
+                'center': self._get_center(bbox)
+            }
+            
+            detections.setdefault(class_name, []).append(detection)
     
     def _get_center(self, bbox):
         """Calcula centro da bbox"""
         x1, y1, x2, y2 = bbox
         return ((x1 + x2) / 2, (y1 + y2) / 2)
     
-    def visualize(self, image_path, detections, output_path='detection_result.jpg'):
+    def visualize(self, image, detections, output_path='detection_result.jpg'):
         """
         Desenha detecções na imagem
+        
+        Args:
+            image: caminho, bytes ou array BGR (arrays recebidos não são alterados)
         """
-        img = cv2.imread(image_path)
+        img = load_image(image)
+        if img is image:
+            # Desenha numa cópia para não sujar o buffer compartilhado
+            img = img.copy()
         
         # Cores por classe
         colors = {
@@ -125,8 +248,11 @@ if __name__ == '__main__':
     # Inicializa detector
     detector = StarRailDetector()
     
+    # Decodifica uma vez e reaproveita em detect() e visualize()
+    img = load_image('screenshot.png')
+    
     # Detecta
-    detections = detector.detect('screenshot.png', confidence=0.6)
+    detections = detector.detect(img, confidence=0.6)
     
     # Mostra resultados
     print("\n📊 DETECÇÕES:")
@@ -137,4 +263,4 @@ if __name__ == '__main__':
                 print(f"  {i}. Confiança: {item['confidence']:.2%} | Posição: {item['center']}")
     
     # Visualiza
-    detector.visualize('screenshot.png', detections)
\ No newline at end of file
+    detector.visualize(img, detections)
\ No newline at end of file
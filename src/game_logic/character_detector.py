@@ -0,0 +1,245 @@
+# src/game_logic/character_detector.py
+"""
+Identificação do personagem em cascata, do mais barato ao mais caro
+
+1. Histograma de cor (HSV) do recorte do YOLO contra uma tabela
+   pré-calculada dos avatares: uma comparação vetorizada com todos
+2. Template matching só dentro da caixa do YOLO (TemplateMatcher)
+3. ORB contra o índice de ícones (FeatureIndex), último recurso
+
+Para no primeiro estágio com resposta confiável e registra qual estágio
+resolveu cada pedido (self.stats), junto com o tempo gasto em cada um.
+"""
+
+from pathlib import Path
+import time
+
+import cv2
+import numpy as np
+
+from src.vision.feature_matcher import file_signature, signature_arrays, stored_signature
+
+
+STAGES = ('histogram', 'template', 'features')
+
+# Histograma H x S; pixels muito escuros (fundo da UI) ficam de fora
+HIST_BINS = (30, 32)
+HIST_RANGES = (0, 180, 0, 256)
+MIN_VALUE = 40
+
+
+def color_histogram(image):
+    """Histograma H x S normalizado (soma 1) de um recorte BGR, achatado"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, (0, 0, MIN_VALUE), (180, 255, 255))
+    hist = cv2.calcHist([hsv], [0, 1], mask, list(HIST_BINS), list(HIST_RANGES)).ravel()
+    total = hist.sum()
+    return hist / total if total else hist
+
+
+class CharacterDetector:
+    """Cascata histograma -> template -> ORB sobre a caixa 'character' do YOLO"""
+
+    def __init__(self, templates_dir='data/templates/', icons_dir='icons',
+                 table_path=None, template_matcher=None, feature_index=None,
+                 database=None, hist_threshold=0.6, hist_margin=0.1,
+                 template_threshold=0.8, feature_threshold=0.1, min_matches=10,
+                 box_margin=0.15):
+        """
+        Args:
+            templates_dir: pasta com characters/*.png (avatares de referência)
+            icons_dir: catálogo do FeatureIndex (só usado no 3º estágio)
+            table_path: .npz da tabela de histogramas (padrão: templates_dir/char_histograms.npz)
+            template_matcher, feature_index: instâncias prontas (senão criadas sob demanda)
+            database: GameDatabase para mapear template -> id (None = get_database())
+            hist_threshold: interseção mínima de histograma
+            hist_margin: vantagem mínima do 1º sobre o 2º candidato do histograma
+            template_threshold: similaridade mínima do template matching
+            feature_threshold: similaridade mínima do ORB
+            min_matches: descritores mínimos em comum no ORB
+            box_margin: folga em volta da caixa do YOLO (fração do tamanho)
+        """
+        self.templates_dir = Path(templates_dir)
+        self.icons_dir = icons_dir
+        self.table_path = Path(table_path) if table_path else self.templates_dir / 'char_histograms.npz'
+        self._template_matcher = template_matcher
+        self._feature_index = feature_index
+        self._db = database
+
+        self.hist_threshold = hist_threshold
+        self.hist_margin = hist_margin
+        self.template_threshold = template_threshold
+        self.feature_threshold = feature_threshold
+        self.min_matches = min_matches
+        self.box_margin = box_margin
+
+        self.names = []
+        self.table = None
+
+        self.stats = dict.fromkeys(STAGES + ('unresolved',), 0)
+        self.timings = dict.fromkeys(STAGES, 0.0)
+
+    # Tabela de histogramas
+
+    def load_or_build(self):
+        """Carrega a tabela salva; reconstrói se a lista de avatares (nome, mtime) mudou"""
+        files = self._avatar_files()
+        signature = file_signature(files, self.templates_dir)
+        if self.table_path.exists() and stored_signature(self.table_path) == signature:
+            with np.load(self.table_path) as data:
+                self.names = data['names'].tolist()
+                self.table = data['table']
+            return self
+
+        self.build(files, signature)
+        return self
+
+    def build(self, files=None, signature=None):
+        """Histograma de cada avatar de referência, salvo em .npz"""
+        if files is None:
+            files = self._avatar_files()
+            signature = file_signature(files, self.templates_dir)
+
+        names, rows = [], []
+        for img_file in files:
+            img = cv2.imread(str(img_file))
+            if img is None:
+                continue
+            names.append(img_file.stem)
+            rows.append(color_histogram(img))
+
+        self.names = names
+        self.table = (np.vstack(rows).astype(np.float32) if rows
+                      else np.zeros((0, HIST_BINS[0] * HIST_BINS[1]), np.float32))
+
+        self.table_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(self.table_path, names=np.array(names, dtype=str), table=self.table,
+                 **signature_arrays(signature))
+        print(f"✓ Tabela de histogramas: {len(names)} personagens")
+
+    # Identificação
+
+    def identify(self, image, bbox=None):
+        """
+        Identifica o personagem
+
+        Args:
+            image: screenshot BGR
+            bbox: caixa 'character' do YOLO [x1, y1, x2, y2]; None = imagem inteira
+
+        Returns:
+            dict {'name', 'character_id', 'confidence', 'stage', 'bbox'};
+            name/stage None se nenhum estágio tiver resposta confiável
+        """
+        if self.table is None:
+            self.load_or_build()
+
+        crop = self._crop(image, bbox, margin=0.0)
+        if crop.size == 0:
+            self.stats['unresolved'] += 1
+            return self._answer(None, 0.0, None, bbox)
+
+        stages = (
+            ('histogram', lambda: self._by_histogram(crop)),
+            ('template', lambda: self._by_template(self._crop(image, bbox, self.box_margin))),
+            ('features', lambda: self._by_features(crop)),
+        )
+        for stage, run in stages:
+            start = time.perf_counter()
+            name, confidence = run()
+            self.timings[stage] += time.perf_counter() - start
+
+            if name is not None:
+                self.stats[stage] += 1
+                return self._answer(name, confidence, stage, bbox)
+
+        self.stats['unresolved'] += 1
+        return self._answer(None, 0.0, None, bbox)
+
+    def identify_detections(self, image, detections):
+        """Identifica a caixa 'character' de maior confiança de um dict do StarRailDetector"""
+        characters = detections.get('character', [])
+        if not characters:
+            self.stats['unresolved'] += 1
+            return self._answer(None, 0.0, None, None)
+
+        best = max(characters, key=lambda d: d['confidence'])
+        return self.identify(image, best['bbox'])
+
+    def _by_histogram(self, crop):
+        if not len(self.names):
+            return None, 0.0
+
+        scores = np.minimum(self.table, color_histogram(crop)).sum(axis=1)
+        order = np.argsort(-scores)
+        best = scores[order[0]]
+        second = scores[order[1]] if len(order) > 1 else 0.0
+
+        if best >= self.hist_threshold and best - second >= self.hist_margin:
+            return self.names[order[0]], float(best)
+        return None, float(best)
+
+    def _by_template(self, crop):
+        matches = self.template_matcher.match_all(crop, category='char',
+                                                  threshold=self.template_threshold,
+                                                  regions=[(0.0, 0.0, 1.0, 1.0)])
+        if matches:
+            return matches[0]['name'], float(matches[0]['confidence'])
+        return None, 0.0
+
+    def _by_features(self, crop):
+        for candidate in self.feature_index.query(crop, top_n=5):
+            category, _, name = candidate['name'].partition('/')
+            if category != 'characters':
+                continue
+            if (candidate['similarity'] >= self.feature_threshold
+                    and candidate['matches'] >= self.min_matches):
+                return name, candidate['similarity']
+            break
+        return None, 0.0
+
+    # Componentes dos estágios caros: só carregados se algum pedido chegar lá
+
+    @property
+    def template_matcher(self):
+        if self._template_matcher is None:
+            from src.vision.template_matcher import TemplateMatcher
+            self._template_matcher = TemplateMatcher(str(self.templates_dir))
+        return self._template_matcher
+
+    @property
+    def feature_index(self):
+        if self._feature_index is None:
+            from src.vision.feature_matcher import FeatureIndex
+            self._feature_index = FeatureIndex(self.icons_dir).load_or_build()
+        return self._feature_index
+
+    def _answer(self, name, confidence, stage, bbox):
+        record = None
+        if name is not None:
+            if self._db is None:
+                from src.data.characters_db import get_database
+                self._db = get_database()
+            record = self._db.from_template(name)
+
+        return {
+            'name': name,
+            'character_id': record.id if record is not None and record.KIND == 'character' else None,
+            'confidence': confidence,
+            'stage': stage,
+            'bbox': bbox,
+        }
+
+    def _crop(self, image, bbox, margin):
+        if bbox is None:
+            return image
+
+        h, w = image.shape[:2]
+        x1, y1, x2, y2 = bbox
+        dx, dy = (x2 - x1) * margin, (y2 - y1) * margin
+        x1, y1 = max(0, int(x1 - dx)), max(0, int(y1 - dy))
+        x2, y2 = min(w, int(round(x2 + dx))), min(h, int(round(y2 + dy)))
+        return image[y1:y2, x1:x2]
+
+    def _avatar_files(self):
+        return sorted((self.templates_dir / 'characters').glob('*.png'))
@@ -0,0 +1,222 @@
+# src/game_logic/equipment_parser.py
+"""
+Liga as caixas de stat lidas pelo OCR aos cards de relíquia/light cone
+
+O HybridAnalyzer devolve relíquias, equipamentos e stats em listas soltas.
+Aqui cada stat vai para o card mais próximo (pelo centro da detecção,
+o mesmo 'center' do StarRailDetector). Só stats da ROI de relíquias
+(campo 'roi', marcado pelo HybridAnalyzer) entram: os totais do painel do
+personagem (ex: "CRIT Rate 20%") caem na faixa legal de uma relíquia e
+distorceriam o vetor dela. Os centros dos cards ficam num
+grid uniforme: cada stat só olha as células vizinhas em anéis crescentes,
+sem comparar com todos os cards.
+"""
+
+from typing import NamedTuple, Optional
+import math
+
+import numpy as np
+
+from src.ocr.text_parser import STAT_KEYS, STAT_INDEX
+
+
+# Classe do YOLO -> tipo do card
+CARD_CLASSES = {'relic_icon': 'relic', 'equipment_icon': 'light_cone'}
+
+# ROI do ScreenLayout onde ficam os cards (e os stats deles)
+CARD_ROI = 'relics'
+
+
+class Card(NamedTuple):
+    """Relíquia ou light cone com os stats que pertencem a ele"""
+    kind: str             # 'relic' ou 'light_cone'
+    bbox: list
+    confidence: float
+    stats: list           # entradas de result['stats'] ({'value', 'parsed', 'in_range', 'bbox', 'confidence'})
+    name: Optional[str]   # texto de equipment_name, se lido
+
+    def stat_vector(self):
+        """
+        Stats com nome reconhecido e dentro da faixa legal -> vetor na
+        ordem de STAT_KEYS (leituras fora da faixa são erro de OCR)
+        """
+        vec = np.zeros(len(STAT_KEYS))
+        for stat in self.stats:
+            parsed = stat.get('parsed')
+            if stat.get('in_range') is False:
+                continue
+            if parsed and parsed.get('key') in STAT_INDEX:
+                vec[STAT_INDEX[parsed['key']]] += parsed['value']
+        return vec
+
+
+class ParsedBuild(NamedTuple):
+    """Build estruturada de uma screenshot"""
+    character: Optional[dict]   # melhor detecção de 'character'
+    light_cone: Optional[Card]
+    relics: list                # Cards de relíquia, ordem de leitura (cima->baixo, esq->dir)
+    unassigned: list            # stats fora da ROI de cards ou longe demais de qualquer card
+
+    def relic_vector(self):
+        """Soma dos stats das relíquias (entrada de StatCalculator)"""
+        vec = np.zeros(len(STAT_KEYS))
+        for card in self.relics:
+            vec += card.stat_vector()
+        return vec
+
+
+def _center(item):
+    if 'center' in item:
+        return item['center']
+    x1, y1, x2, y2 = item['bbox']
+    return ((x1 + x2) / 2, (y1 + y2) / 2)
+
+
+class GridIndex:
+    """Grid uniforme sobre pontos 2D para busca do vizinho mais próximo"""
+
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        for i, (x, y) in enumerate(self.points):
+            self.cells.setdefault(self._cell(x, y), []).append(i)
+
+        if self.cells:
+            keys = np.array(list(self.cells))
+            self._min, self._max = keys.min(axis=0), keys.max(axis=0)
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def nearest(self, x, y, max_distance=math.inf):
+        """
+        Returns:
+            (índice, distância) do ponto mais próximo, ou (None, inf)
+        """
+        if not self.cells:
+            return None, math.inf
+
+        cx, cy = self._cell(x, y)
+        # Anéis além deste raio já estão fora do grid
+        max_ring = int(max(abs(cx - self._min[0]), abs(cx - self._max[0]),
+                           abs(cy - self._min[1]), abs(cy - self._max[1])))
+
+        best, best_dist = None, math.inf
+        for ring in range(max_ring + 1):
+            # Tudo no anel está a pelo menos (ring - 1) células de distância
+            if (ring - 1) * self.cell_size > min(best_dist, max_distance):
+                break
+
+            for key in self._ring(cx, cy, ring):
+                for i in self.cells.get(key, ()):
+                    px, py = self.points[i]
+                    dist = math.hypot(px - x, py - y)
+                    if dist < best_dist:
+                        best, best_dist = i, dist
+
+        if best_dist > max_distance:
+            return None, math.inf
+        return best, best_dist
+
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
+
+
+class EquipmentParser:
+    """Resultado do HybridAnalyzer -> ParsedBuild"""
+
+    def __init__(self, max_distance=4.0):
+        """
+        Args:
+            max_distance: distância máxima stat -> card, em tamanhos medianos
+                          de card (stats mais longe ficam em 'unassigned')
+        """
+        self.max_distance = max_distance
+
+    def parse(self, result, names=None):
+        """
+        Args:
+            result: dict do HybridAnalyzer (analyze_equipment_screen)
+            names: textos lidos para as caixas de equipment_name (opcional,
+                   mesma ordem de raw_detections['equipment_name'])
+
+        Returns:
+            ParsedBuild
+        """
+        detections = result.get('raw_detections', {})
+
+        cards = [
+            (kind, detection)
+            for class_name, kind in CARD_CLASSES.items()
+            for detection in detections.get(class_name, [])
+        ]
+        # Ordem de leitura: linha (faixa de meia altura de card), depois coluna
+        sizes = [max(d['bbox'][2] - d['bbox'][0], d['bbox'][3] - d['bbox'][1]) for _, d in cards]
+        card_size = float(np.median(sizes)) if sizes else 1.0
+        cards.sort(key=lambda card: (round(_center(card[1])[1] / (card_size / 2)),
+                                     _center(card[1])[0]))
+
+        index = GridIndex([_center(d) for _, d in cards], cell_size=max(card_size * 2, 1.0))
+        limit = self.max_distance * card_size
+
+        assigned = [[] for _ in cards]
+        unassigned = []
+        for stat in result.get('stats', []):
+            # 'roi' vem do layout do HybridAnalyzer; resultados antigos sem a
+            # marca (ex: cache de antes dela) ficam só com a distância
+            if 'roi' in stat and stat['roi'] != CARD_ROI:
+                unassigned.append(stat)
+                continue
+
+            owner, _ = index.nearest(*_center(stat), max_distance=limit)
+            if owner is None:
+                unassigned.append(stat)
+            else:
+                assigned[owner].append(stat)
+
+        # Nomes de equipamento também vão para o card mais próximo
+        card_names = [None] * len(cards)
+        for detection, text in zip(detections.get('equipment_name', []), names or []):
+            owner, _ = index.nearest(*_center(detection), max_distance=limit)
+            if owner is not None and text and card_names[owner] is None:
+                card_names[owner] = text.strip()
+
+        built = [
+            Card(kind, detection['bbox'], detection['confidence'],
+                 sorted(stats, key=lambda s: (_center(s)[1], _center(s)[0])), name)
+            for (kind, detection), stats, name in zip(cards, assigned, card_names)
+        ]
+
+        characters = result.get('character') or detections.get('character', [])
+        light_cones = [card for card in built if card.kind == 'light_cone']
+
+        return ParsedBuild(
+            character=max(characters, key=lambda d: d['confidence']) if characters else None,
+            light_cone=max(light_cones, key=lambda c: c.confidence) if light_cones else None,
+            relics=[card for card in built if card.kind == 'relic'],
+            unassigned=unassigned,
+        )
+
+    def parse_many(self, results):
+        """Vários resultados (ex: HybridAnalyzer.analyze_many) -> lista de ParsedBuild"""
+        return [self.parse(result) for result in results]
+
+    @staticmethod
+    def relic_matrix(builds):
+        """
+        Stats das relíquias de N builds em matriz (N, len(STAT_KEYS)),
+        pronta para StatCalculator.evaluate
+        """
+        if not builds:
+            return np.zeros((0, len(STAT_KEYS)))
+        return np.vstack([build.relic_vector() for build in builds])
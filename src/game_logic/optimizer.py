@@ -0,0 +1,572 @@
+# src/game_logic/optimizer.py
+"""
+Otimizador de builds: melhor combinação de 6 relíquias do inventário
+
+Objetivo: soma ponderada dos stats (relíquias + bônus de set), com pesos
+em "valor por roll médio de substat", restrições opcionais de set
+(ex: 4 peças de um set + 2 de um plano) e de stat mínimo (ex: SPD >= 134).
+
+Força bruta é exponencial; aqui:
+1. Poda por dominância: em cada slot, dentro de cada set, só sobram as
+   relíquias dominadas por menos de top_k outras nos stats que importam
+2. Branch-and-bound nos 4 slots de caverna (cabeça, mãos, corpo, pés),
+   com limite superior = parcial + melhor restante + maior bônus possível
+3. Pares esfera+corda (planares) pré-calculados e pontuados em lote com
+   NumPy; o último slot de caverna também é avaliado vetorizado
+"""
+
+import heapq
+import numpy as np
+
+from src.ocr.text_parser import STAT_KEYS, STAT_INDEX
+from src.game_logic.stat_calculator import stat_vector, relic_vector
+
+
+SLOTS = ('head', 'hands', 'body', 'feet', 'sphere', 'rope')
+CAVERN_SLOTS = SLOTS[:4]
+PLANAR_SLOTS = SLOTS[4:]
+
+# Valor de um roll médio de substat 5★; stats que só existem como main stat
+# usam main +15 / 11.1 (mesma proporção de ATK% main vs roll)
+ROLL_VALUES = {
+    'hp': 38.103, 'atk': 19.052, 'def': 19.052,
+    'hp_pct': 3.888, 'atk_pct': 3.888, 'def_pct': 4.86,
+    'spd': 2.3, 'crit_rate': 2.916, 'crit_dmg': 5.832, 'break_effect': 5.832,
+    'effect_hit_rate': 3.888, 'effect_res': 3.888,
+    'energy_regen': 1.75, 'outgoing_healing': 3.11,
+    'physical_dmg': 3.5, 'fire_dmg': 3.5, 'ice_dmg': 3.5, 'lightning_dmg': 3.5,
+    'wind_dmg': 3.5, 'quantum_dmg': 3.5, 'imaginary_dmg': 3.5,
+}
+ROLL_VECTOR = np.array([ROLL_VALUES[key] for key in STAT_KEYS])
+
+
+def pareto_front(matrix, rank=None, depth=1):
+    """
+    Índices das linhas vencidas por menos de `depth` outras (maior = melhor)
+
+    j vence i quando é >= em todas as colunas e tem rank maior; com
+    depth=k, uma linha vencida por k outras nunca entra nas k melhores
+    builds (trocar ela por cada uma dá k builds melhores). Linhas
+    idênticas também se vencem pelo rank.
+
+    Args:
+        matrix: (N, D)
+        rank: (N,) desempate, maior vence (None = a primeira linha vence)
+        depth: top_k da busca
+    """
+    if len(matrix) <= depth:
+        return np.arange(len(matrix))
+    if rank is None:
+        rank = -np.arange(len(matrix))
+
+    ge = (matrix[:, None, :] >= matrix[None, :, :]).all(axis=2)  # ge[j, i]: j >= i
+    beats = ge & (rank[:, None] > rank[None, :])
+    return np.flatnonzero(beats.sum(axis=0) < depth)
+
+
+class BuildOptimizer:
+    """Busca podada da melhor build no inventário de relíquias"""
+
+    def __init__(self, database=None):
+        """
+        Args:
+            database: GameDatabase para os bônus de set (None = get_database())
+        """
+        if database is None:
+            from src.data.characters_db import get_database
+            database = get_database()
+        self.db = database
+        self.sessions = {}
+
+    def optimize_for(self, character_id, relics, **options):
+        """
+        Otimiza usando os pesos cadastrados do personagem
+
+        A SPD base do personagem entra nas restrições de min_stats.
+        """
+        weights = self._character_weights(character_id, options)
+        return self.optimize(relics, weights, **options)
+
+    def optimize(self, relics, weights, required_sets=None, min_stats=None,
+                 base_stats=None, top_k=1):
+        """
+        Args:
+            relics: lista de dicts {'id', 'slot', 'set', 'main', 'subs'}
+            weights: {stat: peso por roll médio}
+            required_sets: {set_id: peças mínimas} (ex: {'musketeer_of_wild_wheat': 4})
+            min_stats: {stat: mínimo no total} (ex: {'spd': 134})
+            base_stats: somado ao total só para checar min_stats
+            top_k: quantas builds devolver
+
+        Returns:
+            lista de builds (melhor primeiro):
+            {'score', 'relics': {slot: id}, 'sets': {set: peças}, 'stats': {stat: total}}
+        """
+        session = BuildSession(self.db, relics, weights, required_sets, min_stats,
+                               base_stats, top_k)
+        return session.builds
+
+    # Sessões por usuário
+
+    def open_session(self, user_id, relics, weights, **options):
+        """
+        Otimiza e guarda o estado do usuário para atualizações incrementais
+
+        Returns:
+            BuildSession (builds atuais em session.builds)
+        """
+        session = BuildSession(self.db, relics, weights, **options)
+        self.sessions[user_id] = session
+        return session
+
+    def open_session_for(self, user_id, character_id, relics, **options):
+        """open_session com os pesos cadastrados do personagem"""
+        weights = self._character_weights(character_id, options)
+        return self.open_session(user_id, relics, weights, **options)
+
+    def session(self, user_id):
+        """Sessão aberta do usuário ou None"""
+        return self.sessions.get(user_id)
+
+    def close_session(self, user_id):
+        self.sessions.pop(user_id, None)
+
+    def _character_weights(self, character_id, options):
+        character = self.db.character(character_id)
+        if character is None:
+            raise ValueError(f"Personagem desconhecido: {character_id}")
+
+        options.setdefault('base_stats', {'spd': (character.base_stats or {}).get('spd', 0)})
+        return character.stat_weights
+
+
+class BuildSession:
+    """
+    Estado de uma otimização, atualizável relíquia a relíquia
+
+    Guarda o vetor e o score de cada relíquia, a fronteira (top_k camadas
+    de Pareto) de cada (slot, set), as listas ordenadas por slot, os pares planares e as
+    top_k builds. Ao adicionar uma relíquia nova, só as builds que a usam
+    são buscadas (o slot dela fica fixo) e combinadas com as anteriores;
+    a busca completa só é refeita quando uma relíquia usada numa build
+    sai da fronteira. Empates são desfeitos pelos ids, então o resultado
+    é o mesmo de otimizar o inventário inteiro de novo.
+    """
+
+    def __init__(self, db, relics, weights, required_sets=None, min_stats=None,
+                 base_stats=None, top_k=1):
+        self.db = db
+        self.top_k = top_k
+        self.weights = stat_vector(weights) / ROLL_VECTOR
+
+        # Restrições de stat mínimo (descontando a base)
+        min_stats = min_stats or {}
+        self.constrained = np.array([STAT_INDEX[key] for key in min_stats], dtype=np.intp)
+        base = stat_vector(base_stats)
+        self.minimums = np.array([min_stats[key] for key in min_stats]) - base[self.constrained]
+
+        # Dimensões que importam para a dominância (sinal: maior = melhor)
+        direction = np.sign(self.weights)
+        direction[self.constrained] = np.where(direction[self.constrained] < 0, -1, 1)
+        self.relevant = np.flatnonzero(direction)
+        self.direction = direction[self.relevant]
+
+        # Sets vistos até agora; índice 0 = relíquia sem set
+        self.set_ids = [None]
+        self.set_index = {}
+        self.planar_sets = set()
+        self.bonus_vec = np.zeros((1, 5, len(STAT_KEYS)))
+        self.bonus_score = np.zeros((1, 5))
+
+        required_sets = required_sets or {}
+        self.required = {self._register_set(set_id): needed
+                         for set_id, needed in required_sets.items()}
+
+        self.relics = {}    # id -> relíquia (+ vetor, score, set, ordem de chegada)
+        self.members = {}   # (slot, set) -> ids, em ordem de chegada
+        self.fronts = {}    # (slot, set) -> ids não dominados
+        self.slots = dict.fromkeys(SLOTS)
+        self._seq = 0
+
+        for relic in relics:
+            self._insert(relic)
+        for key in self.members:
+            self._refresh_group(key)
+        for slot in SLOTS:
+            self._rebuild_slot(slot)
+
+        self.heap = []
+        self._full_search()
+
+    @property
+    def builds(self):
+        """Builds atuais, melhor primeiro"""
+        return [build for _, _, build in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+
+    # Atualizações
+
+    def add_relic(self, relic):
+        """
+        Adiciona uma relíquia (se o id já existe, é tratado como alteração)
+
+        Returns:
+            builds atualizadas
+        """
+        if relic['id'] in self.relics:
+            return self.update_relic(relic)
+
+        stale = self._add(relic)
+        if stale:
+            self._full_search()
+        return self.builds
+
+    def remove_relic(self, relic_id):
+        """Remove uma relíquia do inventário; devolve as builds atualizadas"""
+        if relic_id in self.relics and self._remove(relic_id):
+            self._full_search()
+        return self.builds
+
+    def update_relic(self, relic):
+        """Substitui uma relíquia (ex: upou de nível); devolve as builds atualizadas"""
+        stale = relic['id'] in self.relics and self._remove(relic['id'])
+        stale = self._add(relic, search=not stale) or stale
+        if stale:
+            self._full_search()
+        return self.builds
+
+    def _add(self, relic, search=True):
+        """Insere e busca só as builds com a relíquia nova. True = busca completa necessária"""
+        key = self._insert(relic)
+        before = set(self.fronts.get(key, ()))
+        self._refresh_group(key)
+
+        relic_id = relic['id']
+        if relic_id not in self.fronts[key]:
+            # Vencida por top_k outras: quem ela vence já era vencido por
+            # essas (transitivo), então os candidatos não mudaram
+            return False
+
+        self._rebuild_slot(key[0])
+        dropped = before - set(self.fronts[key])
+        if self._in_builds(dropped):
+            return True
+
+        if search:
+            self._fixed_search(key[0], relic_id)
+        return False
+
+    def _remove(self, relic_id):
+        """Tira a relíquia dos índices. True = busca completa necessária"""
+        entry = self.relics.pop(relic_id)
+        key = (entry['slot'], entry['set'])
+        self.members[key].remove(relic_id)
+
+        before = set(self.fronts[key])
+        if relic_id not in before:
+            # Não era candidata e quem ela vencia segue vencido pelas top_k
+            # que a venciam: nada volta
+            return False
+
+        self._refresh_group(key)
+        self._rebuild_slot(key[0])
+
+        # Relíquias que só ela dominava voltam a ser candidatas
+        revived = set(self.fronts[key]) - before
+        return bool(revived) or self._in_builds({relic_id})
+
+    def _in_builds(self, relic_ids):
+        return any(relic_id in build['relics'].values()
+                   for _, _, build in self.heap for relic_id in relic_ids)
+
+    # Índices
+
+    def _register_set(self, set_id, slot=None):
+        if set_id in self.set_index:
+            return self.set_index[set_id]
+
+        idx = len(self.set_ids)
+        self.set_ids.append(set_id)
+        self.set_index[set_id] = idx
+
+        bonus = np.zeros((1, 5, len(STAT_KEYS)))
+        record = self.db.relic_set(set_id)
+        if record is not None:
+            bonus[0, 2:] += stat_vector(record.bonus_2pc)
+            bonus[0, 4] += stat_vector(record.bonus_4pc)
+        self.bonus_vec = np.concatenate([self.bonus_vec, bonus])
+        self.bonus_score = self.bonus_vec @ self.weights
+
+        kind = record.kind if record is not None else None
+        if kind == 'planar' or (kind is None and slot in PLANAR_SLOTS):
+            self.planar_sets.add(idx)
+        return idx
+
+    def _insert(self, relic):
+        """Registra a relíquia (vetor e score calculados uma única vez)"""
+        slot = relic.get('slot')
+        if slot not in SLOTS:
+            raise ValueError(f"Slot desconhecido: {slot}")
+
+        set_idx = self._register_set(relic['set'], slot) if relic.get('set') else 0
+        vec = relic_vector(relic)
+        self._seq += 1
+        self.relics[relic['id']] = {
+            'slot': slot, 'set': set_idx, 'vec': vec,
+            'score': float(vec @ self.weights), 'seq': self._seq,
+        }
+
+        key = (slot, set_idx)
+        self.members.setdefault(key, []).append(relic['id'])
+        return key
+
+    def _refresh_group(self, key):
+        """Fronteira de um (slot, set): relíquias vencidas por menos de top_k"""
+        members = self.members.get(key, [])
+        if not members:
+            self.fronts[key] = []
+            return
+
+        projected = np.array([self.relics[m]['vec'][self.relevant] for m in members]) * self.direction
+
+        # Mesmo desempate das builds: score, depois id (maior vence)
+        order = sorted(range(len(members)),
+                       key=lambda i: (self.relics[members[i]]['score'], str(members[i])))
+        rank = np.empty(len(members), dtype=np.intp)
+        rank[order] = np.arange(len(members))
+
+        self.fronts[key] = [members[i] for i in pareto_front(projected, rank, self.top_k)]
+
+    def _rebuild_slot(self, slot):
+        """Candidatos do slot ordenados por score (empate: ordem de chegada)"""
+        ids = [relic_id for (s, _), front in self.fronts.items() if s == slot for relic_id in front]
+        if not ids:
+            self.slots[slot] = None
+        else:
+            ids.sort(key=lambda relic_id: (-self.relics[relic_id]['score'], self.relics[relic_id]['seq']))
+            self.slots[slot] = {
+                'ids': ids,
+                'vecs': np.array([self.relics[i]['vec'] for i in ids]),
+                'scores': np.array([self.relics[i]['score'] for i in ids]),
+                'sets': np.array([self.relics[i]['set'] for i in ids], dtype=np.intp),
+            }
+
+        if slot in PLANAR_SLOTS:
+            self._prepare_planar_pairs()
+
+    # Busca
+
+    def _full_search(self):
+        self.heap = []
+        self._run(self.slots, self.pairs)
+
+    def _fixed_search(self, slot, relic_id):
+        """Só as builds que usam a relíquia (slot fixo nela)"""
+        if self.pairs is None:
+            return
+
+        row = self.slots[slot]['ids'].index(relic_id)
+        view, pairs = dict(self.slots), self.pairs
+
+        if slot in PLANAR_SLOTS:
+            mask = pairs['index'][:, PLANAR_SLOTS.index(slot)] == row
+            pairs = self._pair_view({k: v[mask] for k, v in pairs.items() if k != 'stat_max'})
+        else:
+            view[slot] = {k: v[row:row + 1] for k, v in self.slots[slot].items()}
+
+        self._run(view, pairs)
+
+    def _run(self, slots, pairs):
+        if any(slots[slot] is None for slot in SLOTS) or pairs is None or not len(pairs['scores']):
+            return
+
+        self.view, self.pair_vecs, self.pair_scores = slots, pairs['vecs'], pairs['scores']
+        self.pair_index, self.pair_stat_max = pairs['index'], pairs['stat_max']
+
+        # Limites superiores dos slots de caverna que faltam (a partir de cada nível)
+        best_per_slot = [slots[slot]['scores'][0] for slot in CAVERN_SLOTS]
+        self.remaining_best = np.concatenate([np.cumsum(best_per_slot[::-1])[::-1], [0.0]])
+
+        stats_max = [slots[slot]['vecs'][:, self.constrained].max(axis=0) for slot in CAVERN_SLOTS]
+        self.remaining_stat_max = np.vstack([
+            np.sum(stats_max[i:], axis=0) if i < 4 else np.zeros(len(self.constrained))
+            for i in range(5)
+        ]) if len(self.constrained) else None
+
+        # Maior bônus possível de caverna: um set 4pc ou dois 2pc ...
+        two = np.sort(np.maximum(self.bonus_score[:, 2], 0))[::-1]
+        self.max_cavern_bonus = max(np.max(self.bonus_score[:, 4]), two[:2].sum(), 0.0)
+        self.max_cavern_bonus_vec = np.maximum(self.bonus_vec[:, 4], 0).max(axis=0) * 2
+        # ... e o maior ganho que uma peça a mais pode trazer
+        self.max_piece_bonus = max(np.diff(self.bonus_score, axis=1).max(), 0.0)
+
+        counts = np.zeros(len(self.set_ids), dtype=np.int64)
+        self._search(0, [], np.zeros(len(STAT_KEYS)), 0.0, counts, 0.0)
+
+    def _threshold(self):
+        # Folga de arredondamento: limites e totais somam na ordem diferente
+        return self.heap[0][0] - 1e-9 if len(self.heap) >= self.top_k else -np.inf
+
+    def _search(self, depth, chosen, vec, score, counts, bonus):
+        """DFS nos slots de caverna; o último nível é vetorizado"""
+        # Bônus final <= atual + ganho máximo por peça restante
+        bonus_bound = min(self.max_cavern_bonus, bonus + (4 - depth) * self.max_piece_bonus)
+
+        # Limites com '<': empates ainda podem ganhar no desempate por id
+        bound = score + self.remaining_best[depth] + bonus_bound + self.pair_scores[0]
+        if bound < self._threshold():
+            return
+
+        if len(self.constrained):
+            reachable = (vec[self.constrained] + self.remaining_stat_max[depth]
+                         + self.max_cavern_bonus_vec[self.constrained] + self.pair_stat_max)
+            if (reachable < self.minimums).any():
+                return
+
+        if not self._sets_reachable(counts, 4 - depth):
+            return
+
+        slot = self.view[CAVERN_SLOTS[depth]]
+
+        if depth == 3:
+            self._evaluate_last(chosen, vec, score, counts, slot)
+            return
+
+        for i in range(len(slot['ids'])):
+            # Candidatos em ordem decrescente: se este não passa o limite, os próximos também não
+            if score + slot['scores'][i] + self.remaining_best[depth + 1] \
+                    + bonus_bound + self.pair_scores[0] < self._threshold():
+                break
+
+            set_idx = slot['sets'][i]
+            gain = (self.bonus_score[set_idx, min(counts[set_idx] + 1, 4)]
+                    - self.bonus_score[set_idx, min(counts[set_idx], 4)])
+
+            # Mesmo limite do filho, sem o custo da chamada
+            child_bonus = min(self.max_cavern_bonus, bonus + gain + (3 - depth) * self.max_piece_bonus)
+            if score + slot['scores'][i] + self.remaining_best[depth + 1] \
+                    + child_bonus + self.pair_scores[0] < self._threshold():
+                continue
+
+            counts[set_idx] += 1
+            self._search(depth + 1, chosen + [i], vec + slot['vecs'][i],
+                         score + slot['scores'][i], counts, bonus + gain)
+            counts[set_idx] -= 1
+
+    def _evaluate_last(self, chosen, vec, score, counts, slot):
+        """Último slot de caverna: todos os candidatos pontuados de uma vez"""
+        sets = slot['sets']
+
+        # Bônus de caverna do parcial + variação causada por cada candidato
+        cavern = np.arange(len(counts))
+        base_bonus = self.bonus_score[cavern, np.minimum(counts, 4)].sum()
+        base_bonus_vec = self.bonus_vec[cavern, np.minimum(counts, 4)].sum(axis=0)
+
+        current = np.minimum(counts[sets], 4)
+        after = np.minimum(counts[sets] + 1, 4)
+        totals_score = (score + slot['scores'] + base_bonus
+                        + self.bonus_score[sets, after] - self.bonus_score[sets, current])
+        totals_vec = (vec + slot['vecs'] + base_bonus_vec
+                      + self.bonus_vec[sets, after] - self.bonus_vec[sets, current])
+
+        # Restrição de sets de caverna fechada aqui
+        feasible = np.ones(len(sets), dtype=bool)
+        for set_idx, needed in self.required.items():
+            if self._is_planar_set(set_idx):
+                continue
+            feasible &= (counts[set_idx] + (sets == set_idx)) >= needed
+
+        for i in np.argsort(-totals_score, kind='stable'):
+            if not feasible[i]:
+                continue
+            if totals_score[i] + self.pair_scores[0] < self._threshold():
+                break
+
+            for p in self._best_pairs(totals_vec[i]):
+                total = totals_score[i] + self.pair_scores[p]
+                if total < self._threshold():
+                    break
+                self._push(total, chosen + [i], totals_vec[i] + self.pair_vecs[p], p)
+
+    def _best_pairs(self, cavern_vec):
+        """Pares planares que fecham as restrições de stat, melhor primeiro (vetorizado)"""
+        if not len(self.constrained):
+            return range(len(self.pair_scores))
+
+        totals = cavern_vec[self.constrained] + self.pair_vecs[:, self.constrained]
+        ok = (totals >= self.minimums).all(axis=1)
+        return np.flatnonzero(ok)
+
+    def _push(self, total, cavern_choice, total_vec, pair):
+        picks = list(zip(CAVERN_SLOTS, cavern_choice)) + list(zip(PLANAR_SLOTS, self.pair_index[pair]))
+        relics = {slot_name: self.view[slot_name]['ids'][i] for slot_name, i in picks}
+
+        # Desempate determinístico (independe da ordem da busca)
+        key = (float(total), tuple(str(relics[slot_name]) for slot_name in SLOTS))
+        if len(self.heap) >= self.top_k and key <= self.heap[0][:2]:
+            return
+
+        build = {
+            'score': float(total),
+            'relics': relics,
+            'sets': {},
+            'stats': {k: float(v) for k, v in zip(STAT_KEYS, total_vec) if v},
+        }
+        for slot_name, i in picks:
+            set_idx = self.view[slot_name]['sets'][i]
+            if set_idx:
+                set_id = self.set_ids[set_idx]
+                build['sets'][set_id] = build['sets'].get(set_id, 0) + 1
+
+        item = key + (build,)
+        if len(self.heap) < self.top_k:
+            heapq.heappush(self.heap, item)
+        else:
+            heapq.heapreplace(self.heap, item)
+
+    # Planares
+
+    def _prepare_planar_pairs(self):
+        """Todas as combinações esfera x corda, pontuadas e ordenadas em lote"""
+        sphere, rope = self.slots['sphere'], self.slots['rope']
+        if sphere is None or rope is None:
+            self.pairs = None
+            return
+
+        vecs = sphere['vecs'][:, None, :] + rope['vecs'][None, :, :]
+        same_set = sphere['sets'][:, None] == rope['sets'][None, :]
+        vecs = vecs + np.where(same_set[..., None], self.bonus_vec[sphere['sets'], 2][:, None, :], 0)
+        vecs = vecs.reshape(-1, len(STAT_KEYS))
+
+        si, ri = np.meshgrid(np.arange(len(sphere['ids'])), np.arange(len(rope['ids'])), indexing='ij')
+        index = np.column_stack([si.ravel(), ri.ravel()])
+
+        # Restrições de set planar
+        ok = np.ones(len(index), dtype=bool)
+        for set_idx, needed in self.required.items():
+            if not self._is_planar_set(set_idx):
+                continue
+            pieces = (sphere['sets'][index[:, 0]] == set_idx).astype(int) \
+                + (rope['sets'][index[:, 1]] == set_idx)
+            ok &= pieces >= needed
+
+        vecs, index = vecs[ok], index[ok]
+        scores = vecs @ self.weights
+        order = np.argsort(-scores, kind='stable')
+
+        self.pairs = self._pair_view({'vecs': vecs[order], 'scores': scores[order],
+                                      'index': index[order]})
+
+    def _pair_view(self, pairs):
+        pairs['stat_max'] = (pairs['vecs'][:, self.constrained].max(axis=0)
+                             if len(pairs['vecs']) and len(self.constrained) else 0)
+        return pairs
+
+    def _is_planar_set(self, set_idx):
+        return set_idx in self.planar_sets
+
+    def _sets_reachable(self, counts, cavern_left):
+        """Ainda dá para completar os sets de caverna exigidos com os slots restantes?"""
+        missing = sum(max(0, needed - counts[set_idx])
+                      for set_idx, needed in self.required.items()
+                      if not self._is_planar_set(set_idx))
+        return missing <= cavern_left
@@ -0,0 +1,221 @@
+# src/game_logic/stat_calculator.py
+"""
+Cálculo de stats finais e dano esperado, vetorizado
+
+Stats são vetores de índice fixo (ordem de STAT_KEYS). N builds viram uma
+matriz (N, len(STAT_KEYS)) e tudo é calculado de uma vez:
+
+    final HP/ATK/DEF = (base personagem + base light cone) * (1 + % / 100) + flat
+    final SPD = base + flat
+    CRIT = 5% / 50% base + bônus
+    demais stats = soma dos bônus (relíquias + sets)
+
+Dano esperado = stat de escala * multiplicador * (1 + bônus de dano do
+elemento) * (1 + taxa crítica * dano crítico).
+"""
+
+import numpy as np
+
+from src.ocr.text_parser import STAT_KEYS, STAT_INDEX
+
+
+BASE_CRIT_RATE = 5.0
+BASE_CRIT_DMG = 50.0
+
+# Stats com base escalável pelo percentual correspondente
+SCALED = np.array([STAT_INDEX[key] for key in ('hp', 'atk', 'def')])
+SCALED_PCT = np.array([STAT_INDEX[f'{key}_pct'] for key in ('hp', 'atk', 'def')])
+
+SPD = STAT_INDEX['spd']
+CRIT_RATE = STAT_INDEX['crit_rate']
+CRIT_DMG = STAT_INDEX['crit_dmg']
+
+
+def stat_vector(stats):
+    """dict {stat: valor} -> vetor na ordem de STAT_KEYS"""
+    vec = np.zeros(len(STAT_KEYS))
+    for key, value in (stats or {}).items():
+        vec[STAT_INDEX[key]] += value
+    return vec
+
+
+def relic_vector(relic):
+    """
+    Vetor de stats de uma relíquia
+
+    Args:
+        relic: dict com 'main' ({stat: valor} ou (stat, valor)) e 'subs' ({stat: valor})
+    """
+    main = relic.get('main') or {}
+    if isinstance(main, (tuple, list)):
+        main = {main[0]: main[1]}
+
+    vec = stat_vector(main)
+    vec += stat_vector(relic.get('subs'))
+    return vec
+
+
+def final_stats(base, bonus):
+    """
+    Stats finais de N builds
+
+    Args:
+        base: (len(STAT_KEYS),) ou (N, len(STAT_KEYS)); só HP/ATK/DEF/SPD são lidos
+        bonus: (N, len(STAT_KEYS)) soma de relíquias e sets
+
+    Returns:
+        (N, len(STAT_KEYS)); HP/ATK/DEF/SPD finais, demais em % de bônus
+    """
+    base = np.asarray(base, dtype=np.float64)
+    bonus = np.atleast_2d(np.asarray(bonus, dtype=np.float64))
+    base = np.broadcast_to(base, bonus.shape)
+
+    final = bonus.copy()
+    final[:, SCALED] = base[:, SCALED] * (1 + bonus[:, SCALED_PCT] / 100) + bonus[:, SCALED]
+    final[:, SPD] += base[:, SPD]
+    final[:, CRIT_RATE] += BASE_CRIT_RATE
+    final[:, CRIT_DMG] += BASE_CRIT_DMG
+    return final
+
+
+def expected_damage(final, element=None, scaling='atk', multiplier=1.0, extra_dmg=0.0):
+    """
+    Dano médio de um golpe para N builds
+
+    Args:
+        final: (N, len(STAT_KEYS)) saída de final_stats
+        element: elemento do golpe ('lightning' -> lightning_dmg); None = sem bônus
+        scaling: stat de escala ('atk', 'hp' ou 'def')
+        multiplier: multiplicador da habilidade (1.0 = 100%)
+        extra_dmg: bônus de dano extra em % (traços, buffs)
+
+    Returns:
+        (N,)
+    """
+    final = np.atleast_2d(final)
+    dmg_bonus = extra_dmg + (final[:, STAT_INDEX[f'{element}_dmg']] if element else 0.0)
+    crit_rate = np.clip(final[:, CRIT_RATE], 0, 100) / 100
+
+    return (final[:, STAT_INDEX[scaling]] * multiplier
+            * (1 + dmg_bonus / 100)
+            * (1 + crit_rate * final[:, CRIT_DMG] / 100))
+
+
+class StatCalculator:
+    """Stats finais e dano esperado a partir do banco do jogo"""
+
+    def __init__(self, database=None):
+        """
+        Args:
+            database: GameDatabase (None = get_database())
+        """
+        if database is None:
+            from src.data.characters_db import get_database
+            database = get_database()
+        self.db = database
+
+        # Bônus de set em matriz: contagem de peças (N, sets) @ (sets, stats)
+        sets = list(self.db.by_id['relic_set'].values())
+        self.set_index = {record.id: i for i, record in enumerate(sets)}
+        self.bonus_2pc = np.array([stat_vector(r.bonus_2pc) for r in sets]).reshape(-1, len(STAT_KEYS))
+        self.bonus_4pc = np.array([stat_vector(r.bonus_4pc) for r in sets]).reshape(-1, len(STAT_KEYS))
+
+    def base_vector(self, character_id, light_cone_id=None):
+        """Stats base do personagem + light cone"""
+        character = self.db.character(character_id)
+        if character is None:
+            raise ValueError(f"Personagem desconhecido: {character_id}")
+
+        base = stat_vector(character.base_stats)
+        if light_cone_id is not None:
+            light_cone = self.db.light_cone(light_cone_id)
+            if light_cone is None:
+                raise ValueError(f"Light cone desconhecido: {light_cone_id}")
+            base += stat_vector(light_cone.base_stats)
+        return base
+
+    def set_bonus(self, set_counts):
+        """
+        Args:
+            set_counts: lista de {set_id: peças}, uma por build
+
+        Returns:
+            (N, len(STAT_KEYS)) bônus de set de cada build
+        """
+        counts = np.zeros((len(set_counts), len(self.set_index)))
+        for row, pieces in enumerate(set_counts):
+            for set_id, n in pieces.items():
+                if set_id in self.set_index:
+                    counts[row, self.set_index[set_id]] = n
+
+        return (counts >= 2) @ self.bonus_2pc + (counts >= 4) @ self.bonus_4pc
+
+    def bonus_matrix(self, builds):
+        """
+        Bônus de relíquias + sets de N builds
+
+        Args:
+            builds: lista de builds, cada uma uma lista de relíquias
+                    ({'set', 'main', 'subs'})
+
+        Returns:
+            (N, len(STAT_KEYS))
+        """
+        # Cada relíquia vira vetor uma vez só, mesmo repetida em várias builds
+        rows, vectors, seen = [], [], {}
+        set_counts = []
+        for row, build in enumerate(builds):
+            pieces = {}
+            for relic in build:
+                if id(relic) not in seen:
+                    seen[id(relic)] = len(vectors)
+                    vectors.append(relic_vector(relic))
+                rows.append((row, seen[id(relic)]))
+                if relic.get('set'):
+                    pieces[relic['set']] = pieces.get(relic['set'], 0) + 1
+            set_counts.append(pieces)
+
+        relics = np.zeros((len(builds), len(STAT_KEYS)))
+        if rows:
+            build_rows, relic_rows = np.array(rows).T
+            np.add.at(relics, build_rows, np.array(vectors)[relic_rows])
+
+        return relics + self.set_bonus(set_counts)
+
+    def evaluate(self, character_id, bonus, light_cone_id=None, scaling='atk', **damage_args):
+        """
+        Stats finais e dano esperado de N builds de um personagem
+
+        Args:
+            bonus: (N, len(STAT_KEYS)) de bonus_matrix (ou 'stats' do otimizador)
+            scaling, damage_args: repassados para expected_damage (elemento
+                                  padrão = o do personagem)
+
+        Returns:
+            (final (N, len(STAT_KEYS)), dano (N,))
+        """
+        final = final_stats(self.base_vector(character_id, light_cone_id), bonus)
+        damage_args.setdefault('element', self.db.character(character_id).element)
+        return final, expected_damage(final, scaling=scaling, **damage_args)
+
+    def rescore(self, character_id, builds, light_cone_id=None, **damage_args):
+        """
+        Reordena builds do BuildOptimizer por dano esperado
+
+        O 'stats' de cada build (relíquias + sets) é empilhado numa matriz e
+        avaliado de uma vez; cada build ganha 'final_stats' e 'damage'.
+
+        Returns:
+            builds, maior dano primeiro
+        """
+        if not builds:
+            return []
+
+        bonus = np.array([stat_vector(build['stats']) for build in builds])
+        final, damage = self.evaluate(character_id, bonus, light_cone_id, **damage_args)
+
+        for build, row, value in zip(builds, final, damage):
+            build['final_stats'] = {key: float(v) for key, v in zip(STAT_KEYS, row) if v}
+            build['damage'] = float(value)
+
+        return sorted(builds, key=lambda build: build['damage'], reverse=True)
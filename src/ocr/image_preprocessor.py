@@ -0,0 +1,157 @@
+# src/ocr/image_preprocessor.py
+"""
+Pré-processamento das regiões de OCR
+
+Em vez de converter e ampliar cada recorte separadamente, a área que
+cobre as regiões vira cinza uma única vez e os recortes são empilhados
+numa faixa só, ampliada com um único resize; cada região só recebe o seu
+próprio limiar (Otsu) ou um recorte da binarização adaptativa comum.
+Ampliar a faixa (e não o retângulo que cobre todas as regiões) mantém o
+custo proporcional à área dos recortes mesmo quando eles estão
+espalhados pela tela (coluna de stats + cards de relíquia).
+"""
+
+import cv2
+import numpy as np
+
+
+class ImagePreprocessor:
+    """Prepara lotes de recortes para o tesseract"""
+
+    # Borda (px) repetida em volta de cada recorte na faixa: o INTER_CUBIC
+    # não mistura recortes vizinhos
+    PAD = 4
+
+    def __init__(self, method='otsu', min_height=32, max_scale=4.0,
+                 block_size=31, offset=10):
+        """
+        Args:
+            method: 'otsu' (limiar por região) ou 'adaptive' (limiar local)
+            min_height: altura mínima de texto (px) antes de ampliar
+            max_scale: ampliação máxima
+            block_size: vizinhança do limiar adaptativo (ímpar)
+            offset: constante subtraída da média no limiar adaptativo
+        """
+        if method not in ('otsu', 'adaptive'):
+            raise ValueError(f"Método desconhecido: {method}")
+
+        self.method = method
+        self.min_height = min_height
+        self.max_scale = max_scale
+        self.block_size = block_size
+        self.offset = offset
+
+    def to_gray(self, image):
+        """BGR -> cinza (cinza passa direto)"""
+        if image.ndim == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def prepare_regions(self, image, bboxes):
+        """
+        Binariza todas as regiões de uma screenshot
+
+        Args:
+            image: screenshot BGR (ou cinza)
+            bboxes: lista de [x1, y1, x2, y2]
+
+        Returns:
+            lista de recortes binários (texto escuro em fundo branco),
+            na mesma ordem; regiões inválidas viram arrays vazios
+        """
+        if not bboxes:
+            return []
+
+        h, w = image.shape[:2]
+        boxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        boxes = np.round(boxes).astype(np.int64)
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+
+        valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        if not valid.any():
+            return [np.zeros((0, 0), dtype=np.uint8) for _ in bboxes]
+
+        # Única conversão para cinza (só o retângulo que cobre as regiões)
+        ux1, uy1 = boxes[valid, 0].min(), boxes[valid, 1].min()
+        ux2, uy2 = boxes[valid, 2].max(), boxes[valid, 3].max()
+        gray = self.to_gray(image[uy1:uy2, ux1:ux2])
+        boxes = boxes - [ux1, uy1, ux1, uy1]
+
+        # Upscale se o texto típico for pequeno demais pro tesseract
+        heights = boxes[valid, 3] - boxes[valid, 1]
+        scale = self._scale_for(float(np.median(heights)))
+
+        strip, slots = self._stack(gray, boxes, valid, scale)
+
+        shared_binary = None
+        if self.method == 'adaptive':
+            # Uma única binarização adaptativa para todas as regiões
+            shared_binary = cv2.adaptiveThreshold(
+                strip, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                self.block_size, -self.offset
+            )
+
+        crops = []
+        for slot in slots:
+            if slot is None:
+                crops.append(np.zeros((0, 0), dtype=np.uint8))
+                continue
+
+            y1, y2, x2 = slot
+            if shared_binary is not None:
+                binary = shared_binary[y1:y2, :x2]
+            else:
+                _, binary = cv2.threshold(strip[y1:y2, :x2], 0, 255,
+                                          cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+            crops.append(self._dark_on_light(binary))
+
+        return crops
+
+    def _stack(self, gray, boxes, valid, scale):
+        """
+        Recortes em cinza empilhados numa faixa, ampliada com um resize só
+
+        Returns:
+            (faixa, [(y1, y2, x2) de cada região na faixa ou None])
+        """
+        width = int((boxes[valid, 2] - boxes[valid, 0]).max())
+        pad = self.PAD if scale != 1.0 else 0
+
+        parts, slots, top = [], [], 0
+        for (x1, y1, x2, y2), ok in zip(boxes, valid):
+            if not ok:
+                slots.append(None)
+                continue
+
+            crop = gray[y1:y2, x1:x2]
+            parts.append(cv2.copyMakeBorder(crop, pad, pad, 0, width - (x2 - x1),
+                                            cv2.BORDER_REPLICATE))
+            # Posição final, já na escala da faixa ampliada
+            start = int(round((top + pad) * scale))
+            slots.append((start, start + int(round((y2 - y1) * scale)),
+                          int(round((x2 - x1) * scale))))
+            top += (y2 - y1) + 2 * pad
+
+        strip = np.vstack(parts)
+        if scale != 1.0:
+            strip = cv2.resize(strip, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+        # Arredondamento do resize: nenhuma região passa da borda da faixa
+        slots = [None if slot is None else
+                 (min(slot[0], strip.shape[0]), min(slot[1], strip.shape[0]),
+                  min(slot[2], strip.shape[1]))
+                 for slot in slots]
+        return strip, slots
+
+    def _scale_for(self, text_height):
+        if text_height <= 0 or text_height >= self.min_height:
+            return 1.0
+        return min(self.max_scale, self.min_height / text_height)
+
+    def _dark_on_light(self, binary):
+        """UI do jogo é texto claro (dourado/branco) em fundo escuro: inverte"""
+        if binary.mean() < 127:
+            return cv2.bitwise_not(binary)
+        return binary
@@ -0,0 +1,153 @@
+# src/ocr/text_extratctor.py
+"""
+Extração de texto com Tesseract
+
+Cada chamada ao pytesseract sobe um processo novo do tesseract, então
+ler os 20+ stats de uma relíquia um por um custa 20+ processos. Aqui os
+recortes de uma screenshot são empilhados numa única imagem (com offsets
+conhecidos) e lidos numa só passada; várias screenshots rodam em paralelo
+num pool limitado de threads (o trabalho pesado fica no subprocesso).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import cv2
+import numpy as np
+import pytesseract
+
+
+class TextExtractor:
+    """OCR em lote dos recortes de uma ou várias screenshots"""
+
+    def __init__(self, config='--psm 6', max_workers=None, gap=20, padding=10):
+        """
+        Args:
+            config: config padrão do tesseract (psm 6 = bloco de linhas)
+            max_workers: tamanho do pool para extract_many (None = até 4)
+            gap: espaço em branco entre recortes empilhados (px)
+            padding: margem lateral dos recortes empilhados (px)
+        """
+        self.config = config
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.gap = gap
+        self.padding = padding
+        self._pool = None
+
+    def extract_text(self, image, config=None):
+        """Lê um único recorte"""
+        return self.extract_batch([image], config)[0]
+
+    def extract_batch(self, crops, config=None):
+        """
+        Lê todos os recortes de uma screenshot numa única chamada ao tesseract
+
+        Args:
+            crops: lista de imagens (BGR ou cinza) já recortadas
+            config: config do tesseract (None = self.config)
+
+        Returns:
+            lista de strings, uma por recorte, na mesma ordem
+        """
+        texts = [''] * len(crops)
+
+        canvas, spans = self._stitch(crops)
+        if canvas is None:
+            return texts
+
+        data = pytesseract.image_to_data(
+            canvas,
+            config=config or self.config,
+            output_type=pytesseract.Output.DICT
+        )
+
+        # Início/fim vertical de cada recorte no canvas
+        valid = [i for i, span in enumerate(spans) if span is not None]
+        starts = np.array([spans[i][0] for i in valid])
+        ends = np.array([spans[i][1] for i in valid])
+
+        words = {i: [] for i in valid}
+        for n, word in enumerate(data['text']):
+            word = word.strip()
+            if not word:
+                continue
+
+            center_y = data['top'][n] + data['height'][n] / 2
+            slot = int(np.searchsorted(starts, center_y, side='right')) - 1
+            if slot < 0 or center_y > ends[slot]:
+                continue  # caiu no espaço entre recortes
+
+            line_key = (data['block_num'][n], data['par_num'][n], data['line_num'][n])
+            words[valid[slot]].append((line_key, data['left'][n], word))
+
+        for i, found in words.items():
+            found.sort()
+            texts[i] = ' '.join(word for _, _, word in found)
+
+        return texts
+
+    def extract_many(self, batches, config=None):
+        """
+        Processa várias screenshots em paralelo (pool limitado a max_workers)
+
+        Args:
+            batches: lista de listas de recortes (uma lista por screenshot)
+            config: config do tesseract
+
+        Returns:
+            lista de listas de strings, na ordem de entrada
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        return list(self._pool.map(lambda crops: self.extract_batch(crops, config), batches))
+
+    def close(self):
+        """Encerra o pool de threads"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _stitch(self, crops):
+        """
+        Empilha os recortes verticalmente num canvas branco
+
+        Returns:
+            (canvas, spans) onde spans[i] = (y_inicio, y_fim) do recorte i
+            (None para recortes vazios)
+        """
+        prepared = [self._normalize(crop) for crop in crops]
+        sizes = [img.shape for img in prepared if img is not None]
+        if not sizes:
+            return None, []
+
+        height = sum(h for h, _ in sizes) + self.gap * (len(sizes) + 1)
+        width = max(w for _, w in sizes) + 2 * self.padding
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+
+        spans = []
+        y = self.gap
+        for img in prepared:
+            if img is None:
+                spans.append(None)
+                continue
+
+            h, w = img.shape
+            canvas[y:y + h, self.padding:self.padding + w] = img
+            spans.append((y, y + h))
+            y += h + self.gap
+
+        return canvas, spans
+
+    def _normalize(self, crop):
+        """Cinza, texto escuro sobre fundo claro (o que o tesseract espera)"""
+        if crop is None or crop.size == 0:
+            return None
+
+        if crop.ndim == 3:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+
+        # UI do jogo é texto claro em fundo escuro: inverte
+        if crop.mean() < 127:
+            crop = cv2.bitwise_not(crop)
+
+        return crop
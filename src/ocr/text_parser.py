@@ -0,0 +1,204 @@
+# src/ocr/text_parser.py
+"""
+Parser das linhas de stat lidas pelo OCR
+
+Transforma texto cru ('CRIT Rate 5.8%', 'ATQ 1O.4%', '33') em registros
+tipados: nome canônico, flat vs percentual e valor. Regex pré-compilada
+e lookup O(1) num dicionário de nomes já normalizados (acentos, caixa e
+confusões típicas do OCR como 0/O e 1/l), então dá para passar o
+histórico inteiro de screenshots arquivadas.
+"""
+
+from typing import NamedTuple, Optional
+import re
+import unicodedata
+
+
+# Ordem fixa dos stats: é o índice dos vetores de stats do resto do projeto
+STAT_KEYS = (
+    'hp', 'atk', 'def',
+    'hp_pct', 'atk_pct', 'def_pct',
+    'spd', 'crit_rate', 'crit_dmg', 'break_effect',
+    'effect_hit_rate', 'effect_res', 'energy_regen', 'outgoing_healing',
+    'physical_dmg', 'fire_dmg', 'ice_dmg', 'lightning_dmg',
+    'wind_dmg', 'quantum_dmg', 'imaginary_dmg'
+)
+STAT_INDEX = {key: i for i, key in enumerate(STAT_KEYS)}
+
+# Stats que existem como flat e como percentual
+FLAT_OR_PERCENT = {'hp', 'atk', 'def'}
+
+# Stats sempre percentuais (o OCR às vezes perde o '%')
+ALWAYS_PERCENT = {
+    'crit_rate', 'crit_dmg', 'break_effect', 'effect_hit_rate', 'effect_res',
+    'energy_regen', 'outgoing_healing', 'physical_dmg', 'fire_dmg', 'ice_dmg',
+    'lightning_dmg', 'wind_dmg', 'quantum_dmg', 'imaginary_dmg'
+}
+
+# Nomes como aparecem no jogo (EN e PT-BR) -> stat base
+STAT_ALIASES = {
+    'hp': ['HP', 'PV'],
+    'atk': ['ATK', 'ATQ'],
+    'def': ['DEF'],
+    'spd': ['SPD', 'Speed', 'VEL', 'Velocidade'],
+    'crit_rate': ['CRIT Rate', 'Taxa CRIT'],
+    'crit_dmg': ['CRIT DMG', 'Dano CRIT'],
+    'break_effect': ['Break Effect', 'Efeito de Quebra'],
+    'effect_hit_rate': ['Effect Hit Rate', 'Chance de Acerto de Efeito'],
+    'effect_res': ['Effect RES', 'RES de Efeito'],
+    'energy_regen': ['Energy Regeneration Rate', 'Taxa de Regeneração de Energia'],
+    'outgoing_healing': ['Outgoing Healing Boost', 'Bônus de Cura'],
+    'physical_dmg': ['Physical DMG Boost', 'Bônus de Dano Físico'],
+    'fire_dmg': ['Fire DMG Boost', 'Bônus de Dano de Fogo'],
+    'ice_dmg': ['Ice DMG Boost', 'Bônus de Dano de Gelo'],
+    'lightning_dmg': ['Lightning DMG Boost', 'Bônus de Dano Elétrico'],
+    'wind_dmg': ['Wind DMG Boost', 'Bônus de Dano de Vento'],
+    'quantum_dmg': ['Quantum DMG Boost', 'Bônus de Dano Quântico'],
+    'imaginary_dmg': ['Imaginary DMG Boost', 'Bônus de Dano Imaginário'],
+}
+
+# Faixas legais (min, max) em relíquias 5★, nível 0 a +15, main stat e
+# substats juntos. Mínimo = 1 roll baixo de substat (como exibido, arredondado
+# pra baixo); máximo = main stat +15 ou 6 rolls altos de substat.
+RELIC_STAT_RANGES = {
+    'hp': (33.0, 705.6), 'atk': (16.0, 352.8), 'def': (16.0, 127.1),
+    'hp_pct': (3.4, 43.2), 'atk_pct': (3.4, 43.2), 'def_pct': (4.3, 54.0),
+    'spd': (2.0, 25.1), 'crit_rate': (2.5, 32.4), 'crit_dmg': (5.1, 64.8),
+    'break_effect': (5.1, 64.8), 'effect_hit_rate': (3.4, 43.2),
+    'effect_res': (3.4, 26.0), 'energy_regen': (3.1, 19.5),
+    'outgoing_healing': (5.5, 34.6), 'physical_dmg': (6.2, 38.9),
+    'fire_dmg': (6.2, 38.9), 'ice_dmg': (6.2, 38.9), 'lightning_dmg': (6.2, 38.9),
+    'wind_dmg': (6.2, 38.9), 'quantum_dmg': (6.2, 38.9), 'imaginary_dmg': (6.2, 38.9),
+}
+
+# Nome (lazy) + valor numérico no fim da linha, com letras confundíveis com dígitos
+_LINE_RE = re.compile(
+    r'^\s*(?P<name>.*?)[\s:+]*'
+    r'(?P<value>[0-9OoIl|S,.]*[0-9][0-9OoIl|S,.]*)\s*(?P<pct>%)?\s*$'
+)
+_NAME_CLEAN_RE = re.compile(r'[^a-z0-9|]')
+
+# OCR: letras lidas no lugar de dígitos (no valor) ...
+_VALUE_FIX = str.maketrans({'O': '0', 'o': '0', 'I': '1', 'l': '1', '|': '1',
+                            'S': '5'})
+# Vírgula com 1-2 dígitos depois é decimal (PT-BR, '10,4%'); com 3 é
+# separador de milhar ('HP 3,456') e sai
+_DECIMAL_COMMA_RE = re.compile(r',(?=\d{1,2}(?!\d))')
+# ... e dígitos/símbolos lidos no lugar de letras (no nome). Aplicado nos dois
+# lados (aliases e texto lido), então 'CR1T' e 'CRIT' viram a mesma chave
+_NAME_FOLD = str.maketrans({'0': 'o', '1': 'l', 'i': 'l', '|': 'l', '5': 's'})
+
+
+class StatRecord(NamedTuple):
+    """Stat lido e tipado"""
+    name: Optional[str]   # stat base ('atk'); None se a linha só tinha o número
+    key: Optional[str]    # chave em STAT_KEYS ('atk_pct'); None se sem nome
+    value: float
+    is_percent: bool
+    raw: str
+
+
+def normalize_name(text):
+    """Chave de lookup: sem acento, minúsculo, só alfanumérico, confusões dobradas"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NAME_CLEAN_RE.sub('', text).translate(_NAME_FOLD)
+
+
+# Lookup O(1): nome normalizado -> stat base
+_NAME_LOOKUP = {
+    normalize_name(alias): stat
+    for stat, aliases in STAT_ALIASES.items()
+    for alias in aliases
+}
+
+
+class StatParser:
+    """Converte linhas de OCR em StatRecord"""
+
+    def __init__(self, validate=True, ranges=None):
+        """
+        Args:
+            validate: descarta valores fora das faixas legais
+            ranges: faixas (min, max) por chave; None = RELIC_STAT_RANGES
+        """
+        self.validate = validate
+        self.ranges = ranges or RELIC_STAT_RANGES
+
+    def parse_line(self, line):
+        """
+        Args:
+            line: linha crua do OCR
+
+        Returns:
+            StatRecord ou None se a linha não for um stat válido
+        """
+        match = _LINE_RE.match(line)
+        if match is None:
+            return None
+
+        value_text = match.group('value').translate(_VALUE_FIX)
+        value_text = _DECIMAL_COMMA_RE.sub('.', value_text).replace(',', '').strip('.')
+        if value_text.count('.') > 1:
+            return None
+        try:
+            value = float(value_text)
+        except ValueError:
+            return None
+
+        has_pct = match.group('pct') is not None
+        name_text = match.group('name')
+
+        if not name_text.strip():
+            # Só o número (o OCR não leu o nome do stat)
+            return StatRecord(None, None, value, has_pct, line)
+
+        name = self._lookup_name(name_text)
+        if name is None:
+            return None
+
+        if name in ALWAYS_PERCENT:
+            is_percent = True
+        elif name in FLAT_OR_PERCENT:
+            # Flat aparece inteiro no jogo; percentual sempre com uma casa decimal
+            is_percent = has_pct or '.' in value_text
+        else:
+            is_percent = False
+
+        key = f'{name}_pct' if name in FLAT_OR_PERCENT and is_percent else name
+
+        record = StatRecord(name, key, value, is_percent, line)
+        if self.validate and not self.in_range(record):
+            return None
+
+        return record
+
+    def parse_lines(self, lines):
+        """Várias linhas -> lista de StatRecord (linhas inválidas são puladas)"""
+        parse = self.parse_line
+        return [record for record in map(parse, lines) if record is not None]
+
+    def parse_text(self, text):
+        """Bloco de texto do OCR -> lista de StatRecord"""
+        return self.parse_lines(text.splitlines())
+
+    def in_range(self, record):
+        """Valor dentro da faixa legal da chave (sem chave ou sem faixa = True)"""
+        limits = self.ranges.get(record.key)
+        if limits is None:
+            return True
+        low, high = limits
+        return low <= record.value <= high
+
+    @staticmethod
+    def _lookup_name(name_text):
+        """
+        Nome do stat; se a linha inteira não bater, descarta palavras da
+        esquerda (recorte de linha pode pegar ícone ou a coluna vizinha)
+        """
+        words = name_text.split()
+        for start in range(len(words)):
+            name = _NAME_LOOKUP.get(normalize_name(' '.join(words[start:])))
+            if name is not None:
+                return name
+        return None
@@ -8,9 +8,21 @@ Constroi dataset dos equips e chars de Star Rail
 import cv2
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
 import json
 from datetime import datetime
 import os
+import shutil
+
+from src.analyzer.result_cache import (perceptual_hash, screen_key, tile_distance,
+                                       detail_grids, pack_details, unpack_details)
+
+# Extensões de imagem aceitas em todo o pipeline
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Classe YOLO -> pasta de ícones (só as classes que viram template)
+ICON_CLASSES = {0: 'characters', 1: 'equipment', 2: 'relics'}
 
 class DatasetBuilder:
     """
@@ -50,7 +62,7 @@ class IconExtractor:
         self.dataset = dataset_builder
         self.current_image = None
         self.current_image_path = None
-        self.icons_extrated = []
+        self.icons_extracted = []
 
     def load_image(self, image_path):
         """Carrega uma imagem para extração"""
@@ -67,7 +79,7 @@ class IconExtractor:
         """Modo interativo - seleciona multiplas regiões
         
         Args:
-            category: 'charecaters'. 'equips' ou 'relics'
+            category: 'characters', 'equipment' ou 'relics'
         
         Controles:
             - Clique e arraste para selecionar a região
@@ -97,7 +109,7 @@ class IconExtractor:
             display_img = self.current_image.copy()
 
             # Mostre ícones já extraídos
-            for icon_info in self.icone_extracted:
+            for icon_info in self.icons_extracted:
                 x, y, w, h = icon_info['bbox']
                 cv2.rectangle(display_img, (x,y), (x+w, y+h), (0, 255, 0), 2)
                 cv2.putText(display_img, icon_info['name'], (x, y-10),
@@ -114,7 +126,7 @@ class IconExtractor:
             x, y, w, h = roi
 
             # Extrair a região
-            icon_region = self.current_image[y:y+h], [x:x+w]
+            icon_region = self.current_image[y:y+h, x:x+w]
 
             # Exibir preview
             cv2.imshow("Preview - Está OK? (ESC=não, ENTER=sim)", icon_region)
@@ -146,7 +158,7 @@ class IconExtractor:
                 'output_path': str(output_path),
                 'timestamp': datetime.now().isoformat()
             }
-            self.icons_extrated.append(icon_info)
+            self.icons_extracted.append(icon_info)
 
             print(f" ✓ Salvo: {output_path}")
             print(f"  Total extraído nesta sessão: {extraction_count}\n")
@@ -198,114 +210,534 @@ class IconExtractor:
         
         print(f"✓ Metadados salvos em: {metadata_path}")  
 
+    def extract_from_labels(self, labels_dir=None, workers=None, max_distance=4, min_size=8):
+        """
+        Extração em lote a partir das anotações YOLO (sem interação)
+
+        Cada label em dataset/labels tem a imagem correspondente em
+        dataset/images; as caixas de character/equipment_icon/relic_icon
+        são recortadas num pool de processos e salvas em icons/<categoria>/,
+        descartando quase-duplicatas (entre si e contra os ícones que já
+        estão na pasta) pelo hash perceptual.
+
+        Args:
+            labels_dir: pasta dos labels (padrão: dataset/labels)
+            workers: processos (None = núcleos da máquina)
+            max_distance: bits de diferença para considerar o mesmo ícone
+            min_size: lado mínimo (px) de um recorte
+
+        Returns:
+            {categoria: nº de ícones novos}
+        """
+        labels_path = Path(labels_dir) if labels_dir else self.dataset.root / 'dataset' / 'labels'
+        images_path = labels_path.parent / 'images'
+
+        jobs = []
+        for label_file in sorted(labels_path.rglob('*.txt')):
+            relative = label_file.relative_to(labels_path).with_suffix('')
+            for ext in IMAGE_EXTENSIONS:
+                img_file = images_path / relative.with_suffix(ext)
+                if img_file.exists():
+                    jobs.append((str(img_file), str(label_file), min_size, relative.as_posix()))
+                    break
+
+        # Índice por categoria, começando pelos ícones que já existem
+        indexes, metadata = {}, {}
+        for category in ICON_CLASSES.values():
+            folder = self.dataset.root / 'icons' / category
+            folder.mkdir(parents=True, exist_ok=True)
+            indexes[category] = PerceptualIndex(max_distance)
+            metadata[category] = self._load_bulk_metadata(category)
+
+            known = {entry['name']: entry.get('phash') for entry in metadata[category]}
+            for icon_file in folder.glob('*.png'):
+                phash = known.get(icon_file.stem)
+                if phash is None:
+                    img = cv2.imread(str(icon_file), cv2.IMREAD_GRAYSCALE)
+                    phash = perceptual_hash(img) if img is not None else None
+                if phash:
+                    indexes[category].add(phash, icon_file.stem)
+
+        new_icons = dict.fromkeys(ICON_CLASSES.values(), 0)
+        duplicates = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for crops in pool.map(_crop_labeled_image, jobs, chunksize=8):
+                # Resultados na ordem dos labels: a primeira ocorrência fica
+                for crop in crops:
+                    category = crop['category']
+                    similar, _ = indexes[category].nearest(crop['phash'])
+                    if similar is not None:
+                        duplicates += 1
+                        continue
+
+                    output_path = self.dataset.root / 'icons' / category / f"{crop['name']}.png"
+                    output_path.write_bytes(crop.pop('png'))
+                    indexes[category].add(crop['phash'], crop['name'])
+
+                    crop['output_path'] = str(output_path)
+                    metadata[category].append(crop)
+                    new_icons[category] += 1
+
+        for category, entries in metadata.items():
+            metadata_path = self.dataset.root / 'icons' / category / 'metadata.json'
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=1, ensure_ascii=False)
+
+        print(f"✓ {len(jobs)} imagens anotadas processadas")
+        for category, count in new_icons.items():
+            print(f"  {category}: {count} ícones novos")
+        print(f"  Quase-duplicatas descartadas: {duplicates}")
+        return new_icons
+
+    def _load_bulk_metadata(self, category):
+        metadata_path = self.dataset.root / 'icons' / category / 'metadata.json'
+        if metadata_path.exists():
+            with open(metadata_path, encoding='utf-8') as f:
+                return json.load(f)
+        return []
+
+
+def _crop_labeled_image(job):
+    """
+    Recorta as caixas de ícone de uma imagem anotada (roda no pool de processos)
+
+    Returns:
+        lista de dicts com o PNG do recorte, hash perceptual e metadados
+    """
+    image_path, label_path, min_size, relative = job
+    img = cv2.imread(image_path)
+    if img is None:
+        return []
+
+    # Subpastas diferentes podem repetir o nome (a/001.png, b/001.png): o
+    # hash do caminho relativo mantém os nomes dos recortes únicos e estáveis
+    prefix = f"{Path(relative).name}_{hashlib.sha1(relative.encode('utf-8')).hexdigest()[:8]}"
+
+    h, w = img.shape[:2]
+    crops = []
+    with open(label_path, encoding='utf-8') as f:
+        rows = [line.split() for line in f if line.strip()]
+
+    for i, fields in enumerate(rows):
+        class_id = int(float(fields[0]))
+        if class_id not in ICON_CLASSES or len(fields) < 5:
+            continue
+
+        # YOLO: centro e tamanho normalizados -> pixels
+        cx, cy, bw, bh = (float(v) for v in fields[1:5])
+        x1, y1 = max(0, int(round((cx - bw / 2) * w))), max(0, int(round((cy - bh / 2) * h)))
+        x2, y2 = min(w, int(round((cx + bw / 2) * w))), min(h, int(round((cy + bh / 2) * h)))
+        if x2 - x1 < min_size or y2 - y1 < min_size:
+            continue
+
+        region = img[y1:y2, x1:x2]
+        ok, png = cv2.imencode('.png', region)
+        if not ok:
+            continue
+
+        crops.append({
+            'name': f"{prefix}_{i:02d}",
+            'category': ICON_CLASSES[class_id],
+            'class_id': class_id,
+            'bbox': (x1, y1, x2 - x1, y2 - y1),
+            'source_image': image_path,
+            'phash': perceptual_hash(region),
+            'png': png.tobytes(),
+            'timestamp': datetime.now().isoformat(),
+        })
+
+    return crops
+
+class PerceptualIndex:
+    """
+    Índice de hashes perceptuais para achar quase-duplicatas sem varrer tudo
+
+    Multi-index hashing: o hash é dividido em max_distance + 1 pedaços;
+    dois hashes a até max_distance bits de distância têm pelo menos um
+    pedaço idêntico (casa dos pombos), então só os candidatos que
+    compartilham algum pedaço são comparados.
+    """
+
+    def __init__(self, max_distance=4, bits=256):
+        self.max_distance = max_distance
+        self.bits = bits
+
+        # Limites (bit inicial, nº de bits) de cada pedaço
+        pieces = max_distance + 1
+        edges = [round(i * bits / pieces) for i in range(pieces + 1)]
+        self._pieces = [(start, end - start) for start, end in zip(edges, edges[1:])]
+        self._tables = [{} for _ in self._pieces]
+        self._hashes = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, phash, key):
+        value = int(phash, 16)
+        self._hashes[key] = value
+        for table, piece in zip(self._tables, self._split(value)):
+            table.setdefault(piece, []).append(key)
+
+    def nearest(self, phash):
+        """
+        Returns:
+            (chave, distância) do hash mais próximo dentro de max_distance,
+            ou (None, None)
+        """
+        found = self.candidates(phash)
+        return found[0] if found else (None, None)
+
+    def candidates(self, phash):
+        """
+        Returns:
+            lista de (chave, distância) dentro de max_distance, mais próximo primeiro
+        """
+        value = int(phash, 16)
+
+        found = {}
+        for table, piece in zip(self._tables, self._split(value)):
+            for key in table.get(piece, ()):
+                if key in found:
+                    continue
+                found[key] = bin(value ^ self._hashes[key]).count('1')
+
+        return sorted(((key, distance) for key, distance in found.items()
+                       if distance <= self.max_distance), key=lambda item: item[1])
+
+    def _split(self, value):
+        return [(value >> (self.bits - start - length)) & ((1 << length) - 1)
+                for start, length in self._pieces]
+
+
+def _file_digest(path):
+    """
+    sha256 do conteúdo + hash perceptual + grids das ROIs de stats
+    (roda nas threads do pool)
+    """
+    data = Path(path).read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return sha256, None, None
+
+    key, details = screen_key(img)
+    return sha256, key.split(':')[0], details
+
+
+def link_or_copy(source, dest):
+    """
+    Hardlink; se não der (outro disco), reflink (cópia COW); senão cópia
+
+    Returns:
+        'hardlink', 'reflink' ou 'copy'
+    """
+    try:
+        os.link(source, dest)
+        return 'hardlink'
+    except OSError:
+        pass
+
+    try:
+        import fcntl
+        FICLONE = 0x40049409  # ioctl do Linux (btrfs, XFS)
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source, dest)
+        return 'reflink'
+    except (ImportError, OSError):
+        if os.path.exists(dest):
+            os.remove(dest)
+
+    shutil.copy2(source, dest)
+    return 'copy'
+
+
 class ScreenshotOrganizer:
     """Organiza e prepara screenshots para anotação"""
-    
-    def __init__(self, dataset_builder):
+
+    MANIFEST_NAME = 'import_manifest.json'
+
+    def __init__(self, dataset_builder, max_distance=4, max_tile_distance=4, workers=None):
+        """
+        Args:
+            dataset_builder: DatasetBuilder
+            max_distance: bits de diferença no hash perceptual para considerar
+                          quase-duplicata (0 = só duplicatas exatas)
+            max_tile_distance: bits diferentes aceitos por bloco das ROIs de
+                               stats (mesmo critério do ResultCache): o dHash
+                               da tela não vê os números, então duas builds no
+                               mesmo layout só se distinguem aqui
+            workers: threads para ler/hashear arquivos (None = padrão do pool)
+        """
         self.dataset = dataset_builder
-    
+        self.max_distance = max_distance
+        self.max_tile_distance = max_tile_distance
+        self.workers = workers
+
+        self.raw_path = self.dataset.root / 'raw_screenshots'
+        self.manifest_path = self.raw_path / self.MANIFEST_NAME
+        self.manifest = self._load_manifest()
+
+        # Índices reconstruídos do manifesto: sha256 -> imagem, phash -> imagem
+        self.by_sha256 = {}
+        self.phash_index = PerceptualIndex(max_distance)
+        self.details = {}   # imagem -> grids das ROIs de stats (carregados sob demanda)
+        for name, info in self.manifest['images'].items():
+            self._index_image(name, info)
+
     def import_screenshots(self, source_folder):
         """
         Importa screenshots de uma pasta
-        Renomeia e organiza automaticamente
+
+        - arquivos já vistos (mesmo caminho, tamanho e mtime) são pulados
+        - conteúdo é hasheado em paralelo (sha256 + hash perceptual)
+        - duplicatas exatas e quase-duplicatas não são importadas
+        - importados viram hardlink/reflink quando o sistema de arquivos deixa
+
+        Returns:
+            contagem por resultado ('imported', 'duplicate', 'near_duplicate', ...)
         """
         source = Path(source_folder)
-        
+
         if not source.exists():
             print(f"❌ Pasta não encontrada: {source}")
-            return
-        
-        # Extensões suportadas
-        extensions = ['.png', '.jpg', '.jpeg', '.bmp']
-        
-        imported = 0
-        for img_file in source.iterdir():
-            if img_file.suffix.lower() in extensions:
-                # Gera nome único
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                new_name = f"screenshot_{timestamp}_{imported:04d}{img_file.suffix}"
-                
-                dest = self.dataset.root / 'raw_screenshots' / new_name
-                
-                # Copia arquivo
-                import shutil
-                shutil.copy2(img_file, dest)
-                
-                imported += 1
-                print(f"✓ Importado: {img_file.name} → {new_name}")
-        
-        print(f"\n📸 Total importado: {imported} screenshots")
-    
+            return {}
+
+        files = sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+        # Só o que é novo ou mudou desde a última execução
+        pending = []
+        for img_file in files:
+            stat = img_file.stat()
+            seen = self.manifest['sources'].get(str(img_file.resolve()))
+            if seen and seen['size'] == stat.st_size and seen['mtime'] == stat.st_mtime:
+                continue
+            pending.append((img_file, stat))
+
+        counts = {'skipped': len(files) - len(pending)}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = pool.map(_file_digest, [img_file for img_file, _ in pending])
+
+            # Resultados em ordem: a primeira cópia de um conteúdo é a importada
+            for (img_file, stat), (sha256, phash, details) in zip(pending, digests):
+                entry = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256}
+                entry.update(self._import_one(img_file, sha256, phash, details))
+
+                self.manifest['sources'][str(img_file.resolve())] = entry
+                counts[entry['status']] = counts.get(entry['status'], 0) + 1
+
+        self._save_manifest()
+
+        print(f"\n📸 Total importado: {counts.get('imported', 0)} screenshots")
+        for status in ('duplicate', 'near_duplicate', 'unreadable', 'skipped'):
+            if counts.get(status):
+                print(f"   {status}: {counts[status]}")
+        return counts
+
+    def _import_one(self, img_file, sha256, phash, details):
+        """Decide o destino de um arquivo já hasheado"""
+        if phash is None:
+            return {'status': 'unreadable'}
+
+        if sha256 in self.by_sha256:
+            return {'status': 'duplicate', 'image': self.by_sha256[sha256]}
+
+        # Mesmo layout não basta: os stats também têm que bater (a menos de ruído)
+        for similar, distance in self.phash_index.candidates(phash):
+            known = self._details_of(similar)
+            if known is not None and tile_distance(known, details) <= self.max_tile_distance:
+                return {'status': 'near_duplicate', 'image': similar, 'distance': distance}
+
+        # Nome pelo conteúdo: estável entre execuções, sem colisão
+        name = f"screenshot_{sha256[:16]}{img_file.suffix.lower()}"
+        dest = self.raw_path / name
+        method = link_or_copy(img_file, dest) if not dest.exists() else 'existing'
+
+        info = {'sha256': sha256, 'phash': phash, 'details': pack_details(details).hex(),
+                'source': str(img_file)}
+        self.manifest['images'][name] = info
+        self._index_image(name, info)
+        self.details[name] = details
+
+        print(f"✓ Importado ({method}): {img_file.name} → {name}")
+        return {'status': 'imported', 'image': name, 'method': method}
+
+    def _index_image(self, name, info):
+        self.by_sha256[info['sha256']] = name
+        if info.get('phash'):
+            self.phash_index.add(info['phash'], name)
+
+    def _details_of(self, name):
+        """Grids de uma imagem importada (manifesto; antigos são recalculados do arquivo)"""
+        if name not in self.details:
+            info = self.manifest['images'][name]
+            if info.get('details'):
+                self.details[name] = unpack_details(bytes.fromhex(info['details']))
+            else:
+                img = cv2.imread(str(self.raw_path / name), cv2.IMREAD_GRAYSCALE)
+                self.details[name] = detail_grids(img) if img is not None else None
+        return self.details[name]
+
+    def _load_manifest(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'sources': {}, 'images': {}}
+
+    def _save_manifest(self):
+        """Grava o manifesto de forma atômica (arquivo temporário + replace)"""
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
     def prepare_for_annotation(self, sample_size=None):
         """
         Prepara screenshots para anotação no LabelImg/Roboflow
-        Copia para pasta dataset/images
+        Liga (hardlink/reflink, ou copia) na pasta dataset/images;
+        imagens que já estão lá são puladas
         """
-        raw_path = self.dataset.root / 'raw_screenshots'
         dest_path = self.dataset.root / 'dataset' / 'images'
-        
-        screenshots = list(raw_path.glob('*.png')) + list(raw_path.glob('*.jpg'))
-        
+
+        screenshots = sorted(p for p in self.raw_path.iterdir()
+                             if p.suffix.lower() in IMAGE_EXTENSIONS)
+
         if sample_size:
             screenshots = screenshots[:sample_size]
-        
+
+        prepared = 0
         for img_file in screenshots:
             dest = dest_path / img_file.name
-            import shutil
-            shutil.copy2(img_file, dest)
+            if dest.exists():
+                continue
+            link_or_copy(img_file, dest)
+            prepared += 1
             print(f"✓ Preparado para anotação: {img_file.name}")
-        
-        print(f"\n📋 {len(screenshots)} imagens prontas para anotação")
+
+        print(f"\n📋 {len(screenshots)} imagens prontas para anotação ({prepared} novas)")
         print(f"   Local: {dest_path}")
 
 
+def label_path_for(image_path):
+    """Label YOLO de uma imagem: mesma regra do ultralytics (/images/ -> /labels/, .txt)"""
+    parts = list(Path(image_path).parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def read_label_classes(label_path):
+    """IDs de classe de cada caixa de um arquivo de label YOLO"""
+    classes = []
+    with open(label_path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                classes.append(int(float(fields[0])))
+    return classes
+
+
+def stable_fraction(key):
+    """Número estável em [0, 1) derivado do nome (mesmo em outra máquina/execução)"""
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
 class DatasetSplitter:
-    """Divide dataset em treino/validação"""
-    
+    """
+    Divide dataset em treino/validação sem mover arquivos
+
+    A divisão é gravada como listas do YOLO (dataset/train.txt e
+    dataset/val.txt, caminhos relativos a dataset/). Imagens que já estão
+    nas listas mantêm o lado; as novas são distribuídas em ordem de hash
+    estável do nome, indo para validação sempre que o estrato delas
+    (classe mais rara presente na imagem) estiver abaixo da proporção.
+    """
+
     def __init__(self, dataset_builder):
         self.dataset = dataset_builder
-    
-    def split_dataset(self, train_ratio=0.8):
+        self.dataset_path = self.dataset.root / 'dataset'
+        self.lists = {'train': self.dataset_path / 'train.txt',
+                      'val': self.dataset_path / 'val.txt'}
+
+    def split_dataset(self, train_ratio=0.8, stratify=True):
         """
-        Divide imagens anotadas em treino/validação
-        
+        Atualiza train.txt/val.txt com as imagens anotadas
+
         Args:
             train_ratio: proporção para treino (ex: 0.8 = 80% treino, 20% validação)
+            stratify: balanceia cada estrato de classe separadamente
+
+        Returns:
+            {'train': [...], 'val': [...]} caminhos relativos (./images/...)
         """
-        images_path = self.dataset.root / 'dataset' / 'images'
-        labels_path = self.dataset.root / 'dataset' / 'labels'
-        
-        # Pega todas as imagens que têm label correspondente
-        images = []
-        for img_file in images_path.glob('*.png'):
-            label_file = labels_path / f"{img_file.stem}.txt"
+        images_path = self.dataset_path / 'images'
+
+        # Todas as imagens (qualquer extensão, inclusive em subpastas) com label
+        labeled = {}
+        for img_file in sorted(images_path.rglob('*')):
+            if img_file.suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            label_file = label_path_for(img_file)
             if label_file.exists():
-                images.append(img_file)
-        
-        # Embaralha
-        import random
-        random.shuffle(images)
-        
-        # Divide
-        split_idx = int(len(images) * train_ratio)
-        train_images = images[:split_idx]
-        val_images = images[split_idx:]
-        
-        # Move arquivos
-        import shutil
-        
-        for img in train_images:
-            label = labels_path / f"{img.stem}.txt"
-            
-            shutil.move(str(img), str(self.dataset.root / 'dataset/images/train' / img.name))
-            shutil.move(str(label), str(self.dataset.root / 'dataset/labels/train' / label.name))
-        
-        for img in val_images:
-            label = labels_path / f"{img.stem}.txt"
-            
-            shutil.move(str(img), str(self.dataset.root / 'dataset/images/val' / img.name))
-            shutil.move(str(label), str(self.dataset.root / 'dataset/labels/val' / label.name))
-        
-        print(f"✓ Dataset dividido:")
-        print(f"  Treino: {len(train_images)} imagens")
-        print(f"  Validação: {len(val_images)} imagens")
\ No newline at end of file
+                entry = './' + img_file.relative_to(self.dataset_path).as_posix()
+                labeled[entry] = read_label_classes(label_file)
+
+        # Lado já atribuído em execuções anteriores é mantido
+        previous = self._read_lists()
+        split = {entry: side for entry, side in previous.items() if entry in labeled}
+
+        # Estrato = classe mais rara (no dataset inteiro) presente na imagem
+        class_counts = {}
+        for classes in labeled.values():
+            for class_id in classes:
+                class_counts[class_id] = class_counts.get(class_id, 0) + 1
+
+        def stratum(entry):
+            classes = set(labeled[entry])
+            if not stratify or not classes:
+                return None
+            return min(classes, key=lambda c: (class_counts[c], c))
+
+        totals = {}
+        for entry, side in split.items():
+            counts = totals.setdefault(stratum(entry), {'train': 0, 'val': 0})
+            counts[side] += 1
+
+        new_entries = sorted((e for e in labeled if e not in split),
+                             key=lambda e: (stable_fraction(Path(e).stem), e))
+        for entry in new_entries:
+            counts = totals.setdefault(stratum(entry), {'train': 0, 'val': 0})
+            total = counts['train'] + counts['val'] + 1
+            side = 'val' if counts['val'] < round((1 - train_ratio) * total) else 'train'
+            split[entry] = side
+            counts[side] += 1
+
+        result = {side: sorted(e for e, s in split.items() if s == side)
+                  for side in ('train', 'val')}
+        for side, entries in result.items():
+            self._write_list(self.lists[side], entries)
+
+        print(f"✓ Dataset dividido ({len(new_entries)} imagens novas):")
+        print(f"  Treino: {len(result['train'])} imagens → {self.lists['train']}")
+        print(f"  Validação: {len(result['val'])} imagens → {self.lists['val']}")
+        return result
+
+    def _read_lists(self):
+        split = {}
+        for side, list_path in self.lists.items():
+            if list_path.exists():
+                for line in list_path.read_text(encoding='utf-8').splitlines():
+                    if line.strip():
+                        split[line.strip()] = side
+        return split
+
+    def _write_list(self, list_path, entries):
+        tmp_path = list_path.with_suffix('.tmp')
+        tmp_path.write_text(''.join(f"{entry}\n" for entry in entries), encoding='utf-8')
+        os.replace(tmp_path, list_path)
@@ -0,0 +1,249 @@
+# src/tools/synthetic_generator.py
+"""
+Gerador de dados sintéticos para o YOLO
+
+Cola os ícones extraídos (icons/characters, icons/equipment, icons/relics)
+sobre capturas de fundo da UI em posições e escalas aleatórias, e grava
+imagem + label YOLO direto. Cada shard é gerado por um processo do pool
+com semente própria (mesma semente = mesmos dados) e gravado no disco
+assim que fica pronto; shards completos são pulados ao rodar de novo.
+
+Saída:
+    synthetic/
+    ├── shard_0000/images/*.jpg
+    ├── shard_0000/labels/*.txt
+    ├── ...
+    └── images.txt   (lista de todas as imagens, para o dataset.yaml)
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import os
+
+import cv2
+import numpy as np
+
+from src.tools.dataset_buider import ICON_CLASSES, IMAGE_EXTENSIONS
+
+# Ícones carregados uma vez por processo do pool
+_ICONS = None
+_BACKGROUNDS = None
+
+
+def _init_worker(icon_files, background_files):
+    global _ICONS, _BACKGROUNDS
+    _ICONS = [(class_id, img) for class_id, img in
+              ((class_id, cv2.imread(path)) for class_id, path in icon_files)
+              if img is not None]
+    _BACKGROUNDS = list(background_files)
+
+
+def _decodes(path):
+    """O arquivo decodifica? (roda nas threads do processo principal)"""
+    return cv2.imread(path) is not None
+
+
+def _read_background(rng):
+    """
+    Fundo aleatório da lista já filtrada no processo principal
+
+    A lista é a mesma em todos os processos (mesma semente = mesmos dados);
+    um fundo que deixou de decodificar no meio da geração é erro, não
+    é descartado só neste processo.
+    """
+    path = _BACKGROUNDS[int(rng.integers(len(_BACKGROUNDS)))]
+    background = cv2.imread(path)
+    if background is None:
+        raise ValueError(f"Fundo ilegível durante a geração: {path}")
+    return background
+
+
+def _overlaps(box, boxes, max_overlap):
+    """A caixa cobre mais que max_overlap de alguma já colocada (ou vice-versa)?"""
+    x1, y1, x2, y2 = box
+    for bx1, by1, bx2, by2 in boxes:
+        iw = min(x2, bx2) - max(x1, bx1)
+        ih = min(y2, by2) - max(y1, by1)
+        if iw > 0 and ih > 0:
+            inter = iw * ih
+            smaller = min((x2 - x1) * (y2 - y1), (bx2 - bx1) * (by2 - by1))
+            if inter > max_overlap * smaller:
+                return True
+    return False
+
+
+def _compose(rng, size, icons_per_image, scale_range, max_overlap):
+    """Uma amostra: fundo + ícones colados -> (imagem, linhas do label)"""
+    width, height = size
+
+    background = _read_background(rng)
+
+    # Recorte aleatório do fundo na proporção de saída, depois resize
+    bh, bw = background.shape[:2]
+    crop_w = min(bw, int(bh * width / height))
+    crop_h = min(bh, int(crop_w * height / width))
+    x0, y0 = rng.integers(bw - crop_w + 1), rng.integers(bh - crop_h + 1)
+    canvas = cv2.resize(background[y0:y0 + crop_h, x0:x0 + crop_w], (width, height),
+                        interpolation=cv2.INTER_AREA)
+
+    # Escala de referência: ícones foram extraídos de capturas ~1080p
+    ui_scale = height / 1080
+
+    boxes, lines = [], []
+    for _ in range(rng.integers(icons_per_image[0], icons_per_image[1] + 1)):
+        class_id, icon = _ICONS[rng.integers(len(_ICONS))]
+        scale = ui_scale * rng.uniform(*scale_range)
+        ih, iw = max(4, int(icon.shape[0] * scale)), max(4, int(icon.shape[1] * scale))
+        if iw >= width or ih >= height:
+            continue
+
+        # Algumas tentativas de achar lugar sem sobrepor demais
+        for _ in range(10):
+            x, y = int(rng.integers(width - iw)), int(rng.integers(height - ih))
+            box = (x, y, x + iw, y + ih)
+            if not _overlaps(box, boxes, max_overlap):
+                break
+        else:
+            continue
+
+        patch = cv2.resize(icon, (iw, ih), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        # Variação leve de brilho/contraste por ícone
+        patch = cv2.convertScaleAbs(patch, alpha=rng.uniform(0.85, 1.15), beta=rng.uniform(-20, 20))
+        canvas[y:y + ih, x:x + iw] = patch
+
+        boxes.append(box)
+        lines.append(f"{class_id} {(x + iw / 2) / width:.6f} {(y + ih / 2) / height:.6f} "
+                     f"{iw / width:.6f} {ih / height:.6f}")
+
+    return canvas, lines
+
+
+def _generate_shard(job):
+    """Gera e grava um shard inteiro (roda no pool de processos)"""
+    shard_dir, shard_index, count, seed, size, icons_per_image, scale_range, max_overlap, quality = job
+
+    if not _ICONS:
+        raise ValueError("Nenhum ícone legível")
+
+    shard_dir = Path(shard_dir)
+    images_dir, labels_dir = shard_dir / 'images', shard_dir / 'labels'
+    images_dir.mkdir(parents=True, exist_ok=True)
+    labels_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng([seed, shard_index])
+    names = []
+    for i in range(count):
+        image, lines = _compose(rng, size, icons_per_image, scale_range, max_overlap)
+        name = f"syn_{shard_index:04d}_{i:05d}"
+        cv2.imwrite(str(images_dir / f"{name}.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        (labels_dir / f"{name}.txt").write_text('\n'.join(lines) + '\n' if lines else '')
+        names.append(str(images_dir / f"{name}.jpg"))
+
+    # Marca de shard completo (grava por último: shard interrompido é refeito)
+    (shard_dir / 'done').write_text(f"{count}\n")
+    return names
+
+
+class SyntheticGenerator:
+    """Gera amostras sintéticas rotuladas em shards, em paralelo"""
+
+    def __init__(self, icons_dir='star_rail_yolo/icons', backgrounds_dir='star_rail_yolo/backgrounds',
+                 output_dir='star_rail_yolo/synthetic', size=(1280, 720), icons_per_image=(4, 16),
+                 scale_range=(0.6, 1.4), max_overlap=0.1, quality=92):
+        """
+        Args:
+            icons_dir: pasta com characters/, equipment/ e relics/
+            backgrounds_dir: capturas da UI usadas como fundo (sem ícones, de preferência)
+            output_dir: onde os shards são gravados
+            size: (largura, altura) das imagens geradas
+            icons_per_image: (mín, máx) de ícones por imagem
+            scale_range: escala aleatória dos ícones (relativa a 1080p)
+            max_overlap: sobreposição máxima entre ícones (fração do menor)
+            quality: qualidade JPEG
+        """
+        self.icons_dir = Path(icons_dir)
+        self.backgrounds_dir = Path(backgrounds_dir)
+        self.output_dir = Path(output_dir)
+        self.size = size
+        self.icons_per_image = icons_per_image
+        self.scale_range = scale_range
+        self.max_overlap = max_overlap
+        self.quality = quality
+
+    def generate(self, total=10000, shard_size=1000, workers=None, seed=0):
+        """
+        Gera `total` amostras em shards de `shard_size`
+
+        Args:
+            workers: processos (None = núcleos da máquina)
+            seed: semente base; cada shard usa (seed, índice do shard)
+
+        Returns:
+            caminho do images.txt com todas as imagens geradas
+        """
+        icon_files = [
+            (class_id, str(path))
+            for class_id, folder in ICON_CLASSES.items()
+            for path in sorted((self.icons_dir / folder).glob('*.png'))
+        ]
+        # haveImageReader só lê o cabeçalho: barra arquivos vazios/não-imagem sem decodificar
+        background_files = sorted(str(p) for p in self.backgrounds_dir.iterdir()
+                                  if p.suffix.lower() in IMAGE_EXTENSIONS
+                                  and cv2.haveImageReader(str(p))) \
+            if self.backgrounds_dir.exists() else []
+
+        # Decodifica cada fundo uma vez aqui, antes dos shards: todos os
+        # processos sorteiam da mesma lista, independente do agendamento
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            readable = list(pool.map(_decodes, background_files))
+        for path, ok in zip(background_files, readable):
+            if not ok:
+                print(f"  ⚠️ Fundo ilegível ignorado: {path}")
+        background_files = [path for path, ok in zip(background_files, readable) if ok]
+
+        if not icon_files:
+            raise ValueError(f"Nenhum ícone em {self.icons_dir}")
+        if not background_files:
+            raise ValueError(f"Nenhum fundo legível em {self.backgrounds_dir}")
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        jobs, done = [], []
+        for shard_index, start in enumerate(range(0, total, shard_size)):
+            count = min(shard_size, total - start)
+            shard_dir = self.output_dir / f"shard_{shard_index:04d}"
+            if (shard_dir / 'done').exists():
+                done.append(shard_dir)
+                continue
+            jobs.append((str(shard_dir), shard_index, count, seed, self.size,
+                         self.icons_per_image, self.scale_range, self.max_overlap, self.quality))
+
+        print(f"🧪 {len(icon_files)} ícones, {len(background_files)} fundos; "
+              f"{len(jobs)} shards a gerar ({len(done)} já prontos)")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(icon_files, background_files)) as pool:
+            for names in pool.map(_generate_shard, jobs):
+                print(f"  ✓ shard com {len(names)} imagens")
+
+        return self.write_image_list()
+
+    def write_image_list(self):
+        """Lista de todas as imagens dos shards completos (para o dataset.yaml)"""
+        images = []
+        for shard_dir in sorted(self.output_dir.glob('shard_*')):
+            if (shard_dir / 'done').exists():
+                images.extend(sorted(str(p.resolve()) for p in (shard_dir / 'images').glob('*.jpg')))
+
+        list_path = self.output_dir / 'images.txt'
+        tmp_path = list_path.with_suffix('.tmp')
+        tmp_path.write_text(''.join(f"{path}\n" for path in images), encoding='utf-8')
+        os.replace(tmp_path, list_path)
+
+        print(f"✓ {len(images)} imagens sintéticas listadas em {list_path}")
+        return list_path
+
+
+# Exemplo de uso (da raiz do repositório): python -m src.tools.synthetic_generator
+if __name__ == '__main__':
+    SyntheticGenerator().generate(total=20000, shard_size=1000)
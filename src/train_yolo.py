@@ -5,8 +5,90 @@ Script de treinamento YOLOv8 para Star Rail
 
 from ultralytics import YOLO
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import shutil
+import cv2
+import numpy as np
 import yaml
 
+from src.tools.dataset_buider import IMAGE_EXTENSIONS, label_path_for
+
+RUN_NAME = 'star_rail_detector'
+RUNS_DIR = Path('runs/detect')
+
+
+def latest_run():
+    """
+    Pasta do treino mais recente (star_rail_detector, star_rail_detector2, ...)
+
+    Cada treino novo ganha uma pasta própria (o ultralytics incrementa o
+    nome), então o best.pt de um treino anterior nunca é sobrescrito.
+    """
+    runs = {}
+    for path in RUNS_DIR.glob(f'{RUN_NAME}*'):
+        suffix = path.name[len(RUN_NAME):]
+        if path.is_dir() and (suffix == '' or suffix.isdigit()):
+            runs[int(suffix or 1)] = path
+    return runs[max(runs)] if runs else RUNS_DIR / RUN_NAME
+
+
+def read_list(list_file):
+    """Arquivo de lista (um caminho por linha; caminhos podem ter espaços)"""
+    return [line.strip() for line in list_file.read_text(encoding='utf-8').splitlines()
+            if line.strip()]
+
+
+def cpu_profile(cores=None):
+    """
+    Workers do dataloader e batch para treino só em CPU
+
+    Com o dataset em cache as imagens não são mais decodificadas: poucos
+    workers bastam para as augmentations e o resto dos núcleos fica para
+    o torch (forward/backward).
+    """
+    cores = cores or os.cpu_count() or 1
+    return {
+        'workers': min(8, max(1, cores // 4)),
+        'batch': min(32, max(4, cores)),
+    }
+
+
+def _cache_image(job):
+    """Redimensiona uma imagem para img_size e grava .npy uint8 + label (roda no pool)"""
+    source, image_dest, img_size = job
+    source, image_dest = Path(source), Path(image_dest)
+    npy_dest = image_dest.with_suffix('.npy')
+
+    label = label_path_for(source)
+    label_dest = label_path_for(image_dest)
+    if label.exists():
+        shutil.copyfile(label, label_dest)
+    elif label_dest.exists():
+        label_dest.unlink()
+
+    # Já em cache e a origem não mudou
+    if npy_dest.exists() and npy_dest.stat().st_mtime >= source.stat().st_mtime:
+        return True
+
+    img = cv2.imread(str(source))
+    if img is None:
+        return False
+
+    # Mesma conta do ultralytics (lado maior = img_size): no treino não há resize
+    h, w = img.shape[:2]
+    r = img_size / max(h, w)
+    if r < 1:
+        img = cv2.resize(img, (min(int(np.ceil(w * r)), img_size), min(int(np.ceil(h * r)), img_size)),
+                         interpolation=cv2.INTER_AREA)
+
+    # A imagem só serve para a verificação do ultralytics; o treino lê o .npy
+    cv2.imwrite(str(image_dest), img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    np.save(npy_dest, np.ascontiguousarray(img))
+    return True
+
+
 class StarRailYOLOTrainer:
     """Gerenciador de treinamento YOLO"""
     
@@ -14,13 +96,25 @@ class StarRailYOLOTrainer:
         self.dataset_root = Path(dataset_root)
         self.model = None
         
-    def create_config(self):
-        """Cria arquivo de configuração YAML pro YOLO"""
+    def create_config(self, synthetic=True, cache_dir=None):
+        """
+        Cria arquivo de configuração YAML pro YOLO
+        
+        Args:
+            synthetic: soma ao treino as imagens do SyntheticGenerator
+                       (synthetic/images.txt), se existirem
+            cache_dir: dataset pré-redimensionado (prepare_cache); já inclui as sintéticas
+        """
+        
+        # Listas do DatasetSplitter (train.txt/val.txt), se existirem;
+        # senão as pastas images/train e images/val
+        dataset_path = Path(cache_dir) if cache_dir else self.dataset_root / 'dataset'
+        use_lists = (dataset_path / 'train.txt').exists() and (dataset_path / 'val.txt').exists()
         
         config = {
-            'path': str(self.dataset_root / 'dataset'),
-            'train': 'images/train',
-            'val': 'images/val',
+            'path': str(dataset_path),
+            'train': 'train.txt' if use_lists else 'images/train',
+            'val': 'val.txt' if use_lists else 'images/val',
             
             'names': {
                 0: 'character',
@@ -32,6 +126,12 @@ class StarRailYOLOTrainer:
             }
         }
         
+        # Sintéticas só no treino: a validação continua só com screenshots reais
+        synthetic_list = self.dataset_root / 'synthetic' / 'images.txt'
+        if synthetic and synthetic_list.exists() and not cache_dir:
+            config['train'] = [config['train'], str(synthetic_list.resolve())]
+            print(f"🧪 Usando imagens sintéticas: {synthetic_list}")
+        
         config_path = self.dataset_root / 'configs' / 'dataset.yaml'
         config_path.parent.mkdir(exist_ok=True)
         
@@ -41,17 +141,104 @@ class StarRailYOLOTrainer:
         print(f"✓ Configuração criada: {config_path}")
         return config_path
     
-    def train(self, epochs=100, img_size=640, batch_size=16, pretrained='yolov8n.pt'):
+    def source_images(self, synthetic=True):
+        """Imagens de origem por split: {'train': [...], 'val': [...]} (caminhos absolutos)"""
+        dataset_path = self.dataset_root / 'dataset'
+        splits = {}
+        for split in ('train', 'val'):
+            list_file = dataset_path / f'{split}.txt'
+            if list_file.exists():
+                lines = read_list(list_file)
+                splits[split] = [str((dataset_path / line).resolve()) for line in lines]
+            else:
+                folder = dataset_path / 'images' / split
+                splits[split] = sorted(str(p.resolve()) for p in folder.glob('*')
+                                       if p.suffix.lower() in IMAGE_EXTENSIONS)
+        
+        synthetic_list = self.dataset_root / 'synthetic' / 'images.txt'
+        if synthetic and synthetic_list.exists():
+            splits['train'] += read_list(synthetic_list)
+        
+        return splits
+    
+    def prepare_cache(self, img_size=640, synthetic=True, workers=None):
+        """
+        Dataset pré-redimensionado para img_size, em cache no disco
+        
+        Cada imagem vira um .npy uint8 já no tamanho de treino (o ultralytics
+        lê o .npy ao lado da imagem em vez de decodificar o PNG original).
+        Só imagens novas ou alteradas são reprocessadas.
+        
+        Returns:
+            pasta do cache, com train.txt e val.txt
+        """
+        cache_dir = self.dataset_root / 'cache' / str(img_size)
+        (cache_dir / 'images').mkdir(parents=True, exist_ok=True)
+        (cache_dir / 'labels').mkdir(parents=True, exist_ok=True)
+        
+        jobs, lists = [], {}
+        for split, sources in self.source_images(synthetic).items():
+            lists[split] = []
+            for source in sources:
+                # Nome achatado e estável: pastas diferentes podem repetir o nome do arquivo
+                key = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+                dest = cache_dir / 'images' / f"{key}_{Path(source).stem}.jpg"
+                jobs.append((source, str(dest), img_size))
+                lists[split].append(dest)
+        
+        print(f"📦 Cache {img_size}px: {len(jobs)} imagens")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ok = list(pool.map(_cache_image, jobs, chunksize=16))
+        
+        failed = {dest for (_, dest, _), good in zip(jobs, ok) if not good}
+        for split, dests in lists.items():
+            entries = [f"{dest.resolve()}\n" for dest in dests if str(dest) not in failed]
+            (cache_dir / f'{split}.txt').write_text(''.join(entries), encoding='utf-8')
+        
+        if failed:
+            print(f"  ⚠️ {len(failed)} imagens ilegíveis ignoradas")
+        print(f"✓ Cache pronto: {cache_dir}")
+        return cache_dir
+    
+    def train(self, epochs=100, img_size=640, batch_size=None, pretrained='yolov8n.pt',
+              device=None, workers=None, cache=None, resume=False):
         """
         Treina o modelo
         
         Args:
             epochs: número de épocas de treinamento
             img_size: tamanho da imagem (640 é padrão)
-            batch_size: tamanho do batch (ajuste conforme sua GPU)
+            batch_size: tamanho do batch (None = 16 na GPU, cpu_profile na CPU)
             pretrained: modelo base (n=nano, s=small, m=medium, l=large, x=xlarge)
+            device: 0 = GPU, 'cpu' = CPU, None = GPU se houver
+            workers: workers do dataloader (None = padrão do ultralytics; em CPU, cpu_profile)
+            cache: usa o dataset pré-redimensionado (prepare_cache); None = só em CPU
+            resume: continua do último checkpoint (last.pt) do treino mais
+                    recente, se ele parou no meio; senão começa um treino
+                    novo numa pasta nova
         """
         
+        last = latest_run() / 'weights' / 'last.pt'
+        if resume and self._resumable(last):
+            print(f"↻ Retomando treinamento de {last}")
+            self.model = YOLO(str(last))
+            results = self.model.train(resume=True)
+            print("\n✓ Treinamento concluído!")
+            return results
+        
+        if device is None:
+            import torch
+            device = 0 if torch.cuda.is_available() else 'cpu'
+        on_cpu = device == 'cpu'
+        
+        if on_cpu:
+            profile = cpu_profile()
+            batch_size = batch_size or profile['batch']
+            workers = workers or profile['workers']
+        batch_size = batch_size or 16
+        if cache is None:
+            cache = on_cpu
+        
         print(f"""
         ╔════════════════════════════════════════════════════════════╗
         ║  INICIANDO TREINAMENTO YOLO                                ║
@@ -61,8 +248,11 @@ class StarRailYOLOTrainer:
         ╚════════════════════════════════════════════════════════════╝
         """)
         
-        # Cria config
-        config_path = self.create_config()
+        # Cria config (sobre o cache pré-redimensionado, se pedido)
+        cache_dir = self.prepare_cache(img_size) if cache else None
+        config_path = self.create_config(cache_dir=cache_dir)
+        
+        train_args = {'workers': workers} if workers else {}
         
         # Carrega modelo pré-treinado
         self.model = YOLO(pretrained)
@@ -73,10 +263,12 @@ class StarRailYOLOTrainer:
             epochs=epochs,
             imgsz=img_size,
             batch=batch_size,
-            name='star_rail_detector',
+            name=RUN_NAME,  # treino novo = pasta nova (star_rail_detector2, ...)
             patience=50,  # early stopping
             save=True,
-            device=0,  # 0 = GPU, 'cpu' = CPU
+            device=device,  # 0 = GPU, 'cpu' = CPU
+            cache='disk' if cache_dir else False,  # .npy já gravados por prepare_cache
+            **train_args,
             
             # Augmentations (ajuda a generalizar)
             hsv_h=0.015,  # ajuste de matiz
@@ -91,10 +283,19 @@ class StarRailYOLOTrainer:
         )
         
         print("\n✓ Treinamento concluído!")
-        print(f"  Modelo salvo em: runs/detect/star_rail_detector/weights/best.pt")
+        print(f"  Modelo salvo em: {Path(self.model.trainer.save_dir) / 'weights' / 'best.pt'}")
         
         return results
     
+    @staticmethod
+    def _resumable(checkpoint):
+        """Checkpoint de treino interrompido? (ao terminar, o ultralytics grava epoch = -1)"""
+        if not checkpoint.exists():
+            return False
+        import torch
+        ckpt = torch.load(checkpoint, map_location='cpu', weights_only=False)
+        return ckpt.get('epoch', -1) >= 0
+    
     def validate(self):
         """Valida modelo no conjunto de validação"""
         if self.model is None:
@@ -108,21 +309,25 @@ class StarRailYOLOTrainer:
         
         return results
     
-    def export_model(self, format='onnx'):
+    def export_model(self, format='onnx', **export_args):
         """
         Exporta modelo para produção
         
         Formatos: 'onnx', 'torchscript', 'tflite', 'coreml'
+        
+        O .onnx pode ser carregado direto por StarRailDetector (backend
+        onnxruntime, sem torch). Use dynamic=True para permitir lotes
+        de tamanho variável em detect_batch().
         """
         if self.model is None:
             # Carrega melhor modelo
-            self.model = YOLO('runs/detect/star_rail_detector/weights/best.pt')
+            self.model = YOLO(str(latest_run() / 'weights' / 'best.pt'))
         
-        self.model.export(format=format)
+        self.model.export(format=format, **export_args)
         print(f"✓ Modelo exportado para {format}")
 
 
-# Script de execução
+# Script de execução (da raiz do repositório): python -m src.train_yolo
 if __name__ == '__main__':
     trainer = StarRailYOLOTrainer()
     
@@ -130,8 +335,9 @@ if __name__ == '__main__':
     trainer.train(
         epochs=100,        # Comece com 100, aumente se necessário
         img_size=640,      # Padrão YOLO
-        batch_size=16,     # Reduza se der OOM (out of memory)
-        pretrained='yolov8n.pt'  # Nano - mais rápido
+        batch_size=None,   # 16 na GPU (reduza se der OOM); na CPU, pelo nº de núcleos
+        pretrained='yolov8n.pt',  # Nano - mais rápido
+        resume=True        # Continua do last.pt se o treino anterior parou no meio
     )
     
     # Valida
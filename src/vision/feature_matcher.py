@@ -1,5 +1,32 @@
 import cv2
 import numpy as np
+from pathlib import Path
+
+# Parâmetros FLANN para descritores binários (ORB): índice LSH
+FLANN_INDEX_LSH = 6
+LSH_INDEX_PARAMS = dict(algorithm=FLANN_INDEX_LSH, table_number=6, key_size=12,
+                        multi_probe_level=1)
+
+
+def file_signature(files, root):
+    """(caminho relativo, mtime em ns) de cada arquivo de origem de um índice"""
+    return [(p.relative_to(root).as_posix(), p.stat().st_mtime_ns) for p in files]
+
+
+def stored_signature(path):
+    """Assinatura gravada num .npz (None se não houver)"""
+    with np.load(path) as data:
+        if 'sources' not in data.files:
+            return None
+        return list(zip(data['sources'].tolist(), data['mtimes'].tolist()))
+
+
+def signature_arrays(signature):
+    """Assinatura -> arrays para np.savez (sources, mtimes)"""
+    return {
+        'sources': np.array([name for name, _ in signature], dtype=str),
+        'mtimes': np.array([mtime for _, mtime in signature], dtype=np.int64),
+    }
 
 class FeatureMatcher:
     """
@@ -29,7 +56,7 @@ class FeatureMatcher:
         if desc1 is None or desc2 is None:
             return False, 0 
         
-        matches = self.match(desc1, desc2)
+        matches = self.macther.match(desc1, desc2)
         matches = sorted(matches, key=lambda x: x.distance)
 
         # Distância baixa = melhores matches
@@ -37,4 +64,148 @@ class FeatureMatcher:
 
         similarity = len(good_matches) / max(len(kp1), len(kp2))
 
-        return len(good_matches) >= min_matches, similarity
\ No newline at end of file
+        return len(good_matches) >= min_matches, similarity
+
+
+class FeatureIndex:
+    """
+    Índice de descritores ORB de todo o catálogo de ícones
+
+    Os descritores de icons/<categoria>/*.png são extraídos uma vez e
+    salvos em disco; cada consulta extrai só os da imagem nova e busca
+    no índice LSH (FLANN) em vez de comparar ícone por ícone.
+    """
+
+    def __init__(self, icons_dir='icons', index_path=None, feature_matcher=None):
+        """
+        Args:
+            icons_dir: pasta com subpastas por categoria (characters, equipment, relics)
+            index_path: arquivo .npz do índice (padrão: icons_dir/orb_index.npz)
+            feature_matcher: FeatureMatcher usado para extrair os descritores
+        """
+        self.icons_dir = Path(icons_dir)
+        self.index_path = Path(index_path) if index_path else self.icons_dir / 'orb_index.npz'
+        self.features = feature_matcher or FeatureMatcher()
+
+        self.names = []              # 'characters/kafka', ...
+        self.descriptors = None      # (total, 32) uint8, todos os ícones concatenados
+        self.owners = None           # (total,) índice em self.names de cada descritor
+        self.keypoint_counts = None  # (len(names),) keypoints por ícone
+        self.signature = []          # (arquivo, mtime) dos ícones indexados
+        self._flann = None
+
+    def load_or_build(self):
+        """
+        Carrega o índice salvo; reconstrói se a lista de ícones mudou
+        (ícone novo, removido, renomeado ou com outro mtime)
+        """
+        files = self._icon_files()
+        signature = file_signature(files, self.icons_dir)
+        if self.index_path.exists() and stored_signature(self.index_path) == signature:
+            self.load()
+            return self
+
+        self.build(files, signature)
+        return self
+
+    def build(self, files=None, signature=None):
+        """Extrai descritores de todos os ícones e salva o índice"""
+        names, chunks, owners, counts = [], [], [], []
+        if files is None:
+            files = self._icon_files()
+            signature = file_signature(files, self.icons_dir)
+
+        for img_file in files:
+            img = cv2.imread(str(img_file))
+            if img is None:
+                continue
+
+            keypoints, descriptors = self.features.extract_features(img)
+            if descriptors is None:
+                continue
+
+            owners.append(np.full(len(descriptors), len(names), dtype=np.int32))
+            chunks.append(descriptors)
+            counts.append(len(keypoints))
+            names.append(f"{img_file.parent.name}/{img_file.stem}")
+
+        self.names = names
+        self.descriptors = np.concatenate(chunks) if chunks else np.zeros((0, 32), np.uint8)
+        self.owners = np.concatenate(owners) if owners else np.zeros(0, np.int32)
+        self.keypoint_counts = np.array(counts, dtype=np.int32)
+        self.signature = signature
+        self._flann = None
+
+        self.save()
+        print(f"✓ Índice ORB: {len(names)} ícones, {len(self.descriptors)} descritores")
+
+    def save(self):
+        """Salva o índice em .npz"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(self.index_path,
+                 names=np.array(self.names, dtype=str),
+                 descriptors=self.descriptors,
+                 owners=self.owners,
+                 keypoint_counts=self.keypoint_counts,
+                 **signature_arrays(self.signature))
+
+    def load(self):
+        """Carrega o índice salvo"""
+        with np.load(self.index_path) as data:
+            self.names = data['names'].tolist()
+            self.descriptors = data['descriptors']
+            self.owners = data['owners']
+            self.keypoint_counts = data['keypoint_counts']
+        self.signature = stored_signature(self.index_path) or []
+        self._flann = None
+
+    def query(self, image, top_n=5, ratio=0.75, max_distance=50):
+        """
+        Identifica a imagem contra o catálogo inteiro
+
+        Args:
+            image: recorte BGR a identificar
+            top_n: quantos candidatos devolver
+            ratio: teste de razão de Lowe entre 1º e 2º vizinho
+            max_distance: distância Hamming máxima (mesmo critério de macth_images)
+
+        Returns:
+            lista de dicts {'name', 'similarity', 'matches'}, melhor primeiro
+        """
+        if self.descriptors is None:
+            self.load_or_build()
+        if not self.names:
+            return []
+
+        keypoints, descriptors = self.features.extract_features(image)
+        if descriptors is None:
+            return []
+
+        knn = self._matcher().knnMatch(descriptors, k=2)
+
+        # LSH pode devolver menos de 2 vizinhos para alguns descritores
+        good = [pair[0].trainIdx for pair in knn
+                if pair and pair[0].distance < max_distance
+                and (len(pair) < 2 or pair[0].distance < ratio * pair[1].distance)]
+        if not good:
+            return []
+
+        votes = np.bincount(self.owners[good], minlength=len(self.names))
+        similarity = votes / np.maximum(self.keypoint_counts, len(keypoints))
+
+        ranked = np.argsort(-similarity)[:top_n]
+        return [
+            {'name': self.names[i], 'similarity': float(similarity[i]), 'matches': int(votes[i])}
+            for i in ranked if votes[i] > 0
+        ]
+
+    def _matcher(self):
+        """FLANN LSH treinado uma vez com todos os descritores do catálogo"""
+        if self._flann is None:
+            self._flann = cv2.FlannBasedMatcher(LSH_INDEX_PARAMS, dict(checks=50))
+            self._flann.add([self.descriptors])
+            self._flann.train()
+        return self._flann
+
+    def _icon_files(self):
+        return sorted(self.icons_dir.glob('*/*.png'))
@@ -0,0 +1,47 @@
+# src/vision/image_io.py
+"""
+Decodificação única de screenshots
+
+Aceita caminho, bytes (ex: anexo do Discord) ou array já decodificado e
+sempre devolve um array BGR. Arrays passam direto, sem cópia, então todas
+as etapas do pipeline trabalham sobre o mesmo buffer.
+"""
+
+from pathlib import Path
+import cv2
+import numpy as np
+
+
+def load_image(source):
+    """
+    Converte qualquer fonte de imagem em array BGR (H, W, 3)
+
+    Args:
+        source: str/Path, bytes/bytearray/memoryview ou np.ndarray
+
+    Returns:
+        np.ndarray BGR (o próprio objeto, se já for array)
+    """
+    if isinstance(source, np.ndarray):
+        return source
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # frombuffer não copia: imdecode lê direto do buffer recebido
+        buffer = np.frombuffer(source, dtype=np.uint8)
+        img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Não foi possível decodificar a imagem recebida")
+        return img
+
+    if isinstance(source, (str, Path)):
+        img = cv2.imread(str(source))
+        if img is None:
+            raise ValueError(f"Não foi possível carregar: {source}")
+        return img
+
+    raise TypeError(f"Tipo de imagem não suportado: {type(source).__name__}")
+
+
+def is_encoded(source):
+    """True se a fonte ainda precisa ser decodificada (bytes em memória)"""
+    return isinstance(source, (bytes, bytearray, memoryview))
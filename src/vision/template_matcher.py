@@ -1,14 +1,57 @@
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 
+# Resolução em que os templates foram recortados (altura em px)
+REFERENCE_HEIGHT = 1080
+
+# Variações de escala testadas em volta da escala estimada pela resolução
+SCALE_STEPS = (0.9, 1.0, 1.1)
+
+# Escalas arredondadas para 2 casas antes de virar chave de cache (1% ~ 1 px
+# num template de 100 px); o cache guarda no máximo MAX_SCALED templates
+SCALE_DECIMALS = 2
+MAX_SCALED = 2048
+
+
+def resize_gray(image, scale):
+    """Redimensiona por fator (INTER_AREA), nunca abaixo de 1x1 px"""
+    h, w = image.shape[:2]
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
 class TemplateMatcher:
     """
     Identifica elementos da UI e HUD comparando com templates salvos
     """
 
-    def __init6__(self, templates_dir='data/templates/'):
+    def __init__(self, templates_dir='data/templates/', cache_dir=None):
+        """
+        Args:
+            templates_dir: pasta com characters/ e equipment/
+            cache_dir: se informado, usa o cache compilado (TemplateStore) em vez
+                       de decodificar todos os PNGs no start
+        """
         self.templates_dir = templates_dir
         self.templates = {}
+        self.templates_gray = {}
+
+        # Cache em disco (memmap): templates em cinza + níveis de pirâmide
+        self.store = None
+        if cache_dir is not None:
+            from src.vision.template_store import TemplateStore
+            self.store = TemplateStore(templates_dir, cache_dir)
+
+        # Regiões normalizadas (0-1) onde cada categoria aparece na UI
+        # Ex: {'char': [(0.0, 0.0, 0.35, 1.0)]}; vazio = tela inteira
+        self.search_regions = {}
+
+        # Caches de templates redimensionados e de grupos por tamanho
+        self._scaled = OrderedDict()
+        self._groups = {}
+
         self.load_templates()
 
     def load_templates(self):
@@ -29,6 +72,15 @@ class TemplateMatcher:
         import os
         from pathlib import Path
 
+        if self.store is not None:
+            # Só confere mtimes/hashes; os pixels são mapeados sob demanda.
+            # Nesse modo os templates ficam só em cinza (self.templates vazio)
+            self.store.sync()
+            self.templates_gray = self.store
+            self._scaled.clear()
+            self._groups.clear()
+            return
+
         template_path = Path(self.templates_dir)
 
         # Carregar avatar dos personagens
@@ -36,40 +88,67 @@ class TemplateMatcher:
         if char_path.exists():
             for img_file in char_path.glob('*.png'):
                 char_name = img_file.stem
-                self.templates[f'char_{char_name}'] = cv2.imgread(str(img_file))
+                self._add_template(f'char_{char_name}', cv2.imread(str(img_file)))
 
         # Carregar icones de equipamentos
         equip_path = template_path / 'equipment'
-        if equip_path.existis():
+        if equip_path.exists():
             for img_file in equip_path.glob('*.png'):
                 equip_name = img_file.stem
-                self.templates[f'equip_{equip_name}'] = cv2.imgread(str(img_file))
-    
-    def find_template(self, screenshot, template_name, threshold=0.8):
+                self._add_template(f'equip_{equip_name}', cv2.imread(str(img_file)))
+
+    def _add_template(self, template_name, image):
+        """Registra template (BGR + cinza convertido uma única vez)"""
+        if image is None:
+            return
+
+        self.templates[template_name] = image
+        self.templates_gray[template_name] = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # Invalida caches derivados
+        self._scaled.clear()
+        self._groups.clear()
+
+    def set_search_regions(self, category, regions):
+        """
+        Limita a busca de uma categoria a regiões conhecidas da UI
+
+        Args:
+            category: 'char' ou 'equip'
+            regions: lista de (x1, y1, x2, y2) normalizados (0-1)
+        """
+        self.search_regions[category] = list(regions)
+
+    def find_template(self, screenshot, template_name, threshold=0.8, pyramid=False,
+                      **pyramid_args):
         """
         Procura um template no screenshot
-        
+
         Args:
-            screenshot: imagem onde procurar
+            screenshot: imagem onde procurar (BGR ou já em cinza)
             template_name: nome do template (ex: 'char_kafka')
             threshold: similaridade (0 a 1: quanto mais alto, mais exigente)
+            pyramid: usa busca grosso-para-fino (ver find_template_pyramid)
+            **pyramid_args: repassados para find_template_pyramid
 
         Returns:
             dict com 'found', 'confidence', 'location' (x,y)
         """
 
-        if template_name not in self.templates:
+        if template_name not in self.templates_gray:
             return {'found': False, 'confidence': 0, 'location': None}
-        
-        template = self.template[template_name]
+
+        if pyramid:
+            return self.find_template_pyramid(screenshot, template_name, threshold,
+                                              **pyramid_args)
 
         # Converter para escala de cinza (rapidez e robustes)
-        screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        screenshot_gray = self._to_gray(screenshot)
+        template_gray = self.templates_gray[template_name]
 
         # Processa combinação
-        result = cv2.macthTemplate(screenshot_gray, template_gray, cv2.TM_CCOFF_NORMED)
-        
+        result = cv2.matchTemplate(screenshot_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
 
         if max_val >= threshold:
@@ -77,27 +156,236 @@ class TemplateMatcher:
                 'found': True,
                 'confidence': max_val,
                 'location': max_loc,
-                'name': template_name.replace('char_', '').replace('equip_','')
+                'name': self._display_name(template_name)
             }
-        
+
         return {'found': False, 'confidence': max_val, 'location': None}
-    
+
+    def find_template_pyramid(self, screenshot, template_name, threshold=0.8, factor=4,
+                              top_k=5, tolerance=2, scales=None):
+        """
+        Busca grosso-para-fino
+
+        1. Casa o template reduzido (1/factor) no frame reduzido
+        2. Pega os top_k candidatos da resposta grossa
+        3. Refina cada candidato em resolução cheia, só numa janela em volta
+
+        A janela de refino tem margem de factor + tolerance pixels, então o
+        resultado fica dentro de `tolerance` px da busca exaustiva sempre que
+        o pico verdadeiro estiver entre os top_k candidatos.
+
+        Args:
+            screenshot: imagem onde procurar (BGR ou cinza)
+            template_name: nome do template
+            threshold: similaridade mínima
+            factor: redução do nível grosso (4 ou 8)
+            top_k: candidatos refinados por escala
+            tolerance: margem extra (px) da janela de refino
+            scales: escalas do template a testar; None = estima pela altura
+                    do screenshot em relação a REFERENCE_HEIGHT (720p a 4K)
+
+        Returns:
+            dict com 'found', 'confidence', 'location' (x,y) e 'scale'
+        """
+        if template_name not in self.templates_gray:
+            return {'found': False, 'confidence': 0, 'location': None}
+
+        gray = self._to_gray(screenshot)
+        frame_h, frame_w = gray.shape[:2]
+
+        if scales is None:
+            base = frame_h / REFERENCE_HEIGHT
+            scales = [base * step for step in SCALE_STEPS]
+
+        # Nível grosso do frame: calculado uma vez para todas as escalas
+        coarse = resize_gray(gray, 1 / factor)
+
+        best = {'found': False, 'confidence': 0, 'location': None}
+
+        for scale in scales:
+            template = self._scaled_template(template_name, scale)
+            th, tw = template.shape[:2]
+            if th == 0 or tw == 0 or th > frame_h or tw > frame_w:
+                continue
+
+            coarse_template = self._scaled_template(template_name, scale / factor)
+            cth, ctw = coarse_template.shape[:2]
+
+            if cth < 4 or ctw < 4 or cth > coarse.shape[0] or ctw > coarse.shape[1]:
+                # Template pequeno demais pro nível grosso: busca exaustiva
+                candidates = [(0, 0, frame_w, frame_h)]
+            else:
+                response = cv2.matchTemplate(coarse, coarse_template, cv2.TM_CCOEFF_NORMED)
+                margin = factor + tolerance
+                candidates = [
+                    (cx * factor - margin, cy * factor - margin,
+                     cx * factor + tw + margin, cy * factor + th + margin)
+                    for cx, cy in self._top_peaks(response, top_k, ctw, cth)
+                ]
+
+            for x1, y1, x2, y2 in candidates:
+                x1, y1 = max(0, x1), max(0, y1)
+                x2, y2 = min(frame_w, x2), min(frame_h, y2)
+                if x2 - x1 < tw or y2 - y1 < th:
+                    continue
+
+                window = gray[y1:y2, x1:x2]
+                result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, (px, py) = cv2.minMaxLoc(result)
+
+                if max_val > best['confidence']:
+                    best = {
+                        'found': max_val >= threshold,
+                        'confidence': max_val,
+                        'location': (x1 + px, y1 + py),
+                        'scale': scale
+                    }
+
+        if not best['found']:
+            return {'found': False, 'confidence': best['confidence'], 'location': None}
+
+        best['name'] = self._display_name(template_name)
+        return best
+
+    def _top_peaks(self, response, top_k, width, height):
+        """Top-k picos da resposta, apagando a vizinhança de cada pico encontrado"""
+        response = response.copy()
+        peaks = []
+        for _ in range(top_k):
+            _, max_val, _, (x, y) = cv2.minMaxLoc(response)
+            if max_val <= -1:
+                break
+            peaks.append((x, y))
+            response[max(0, y - height // 2):y + height // 2 + 1,
+                     max(0, x - width // 2):x + width // 2 + 1] = -1
+        return peaks
+
     def find_all_matches(self, screenshot, category='char', threshold=0.8):
         """
         Procura todos os templates de uma categoria
         Identificando quais personagens e itens aparecem na tela
         """
-        
-        matches=[]
-
-        for template_name in self.templates.keys():
-            if template_name.startswith(category + '_'):
-                result = self.find_template(screenshot, template_name, threshold)
-                if result['found']:
-                    matches.append(result)
-        
+        return self.match_all(screenshot, category=category, threshold=threshold)
+
+    def match_all(self, screenshot, category=None, threshold=0.8, scale=1.0, regions=None):
+        """
+        Procura todos os templates numa única passada
+
+        O screenshot é convertido para cinza (e reduzido, se scale < 1) uma
+        vez só; templates do mesmo tamanho são avaliados juntos e a busca
+        fica restrita às regiões da UI onde a categoria aparece.
+
+        Args:
+            screenshot: imagem onde procurar (BGR ou cinza)
+            category: 'char', 'equip' ou None (todas)
+            threshold: similaridade mínima
+            scale: fator de redução do frame e dos templates (ex: 0.5)
+            regions: lista de (x1, y1, x2, y2) normalizados; None = search_regions
+
+        Returns:
+            lista de matches (mesmo formato de find_template), maior confiança primeiro
+        """
+        gray = self._to_gray(screenshot)
+        if scale != 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        if regions is None:
+            regions = self.search_regions.get(category) or [(0.0, 0.0, 1.0, 1.0)]
+        rois = self._resolve_regions(regions, gray.shape)
+
+        best = {}
+        for (th, tw), names in self._size_groups(category, scale).items():
+            templates = [self._scaled_template(name, scale) for name in names]
+
+            for x1, y1, x2, y2 in rois:
+                roi = gray[y1:y2, x1:x2]
+                if roi.shape[0] < th or roi.shape[1] < tw:
+                    continue
+
+                # Mesmo tamanho de template = mesmo tamanho de saída:
+                # um único buffer de resposta reaproveitado pelo grupo todo
+                response = np.empty((roi.shape[0] - th + 1, roi.shape[1] - tw + 1),
+                                    dtype=np.float32)
+
+                for name, template in zip(names, templates):
+                    cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED, result=response)
+                    _, confidence, _, (px, py) = cv2.minMaxLoc(response)
+
+                    if confidence < threshold:
+                        continue
+                    if name in best and best[name]['confidence'] >= confidence:
+                        continue
+
+                    best[name] = {
+                        'found': True,
+                        'confidence': confidence,
+                        'location': (int(round((x1 + px) / scale)),
+                                     int(round((y1 + py) / scale))),
+                        'name': self._display_name(name)
+                    }
+
         # Ordenar por maior match
-        matches.sort(key=lambda x: x['confidence'], reverse=True)
+        matches = sorted(best.values(), key=lambda x: x['confidence'], reverse=True)
 
         return matches
 
+    def _to_gray(self, image):
+        """Converte para cinza (arrays já em cinza passam direto)"""
+        if image.ndim == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def _display_name(self, template_name):
+        return template_name.replace('char_', '').replace('equip_', '')
+
+    def _scaled_template(self, template_name, scale):
+        """Template em cinza no fator de escala pedido (cacheado)"""
+        if scale == 1.0:
+            return self.templates_gray[template_name]
+
+        # Níveis 1/factor já vêm prontos do cache compilado
+        if self.store is not None:
+            factor = 1 / scale
+            if abs(factor - round(factor)) < 1e-6:
+                level = self.store.level(template_name, round(factor))
+                if level is not None:
+                    return level
+
+        # Escala arredondada: resoluções parecidas reaproveitam o mesmo template
+        scale = round(scale, SCALE_DECIMALS)
+        key = (template_name, scale)
+        if key in self._scaled:
+            self._scaled.move_to_end(key)
+            return self._scaled[key]
+
+        template = resize_gray(self.templates_gray[template_name], scale)
+        self._scaled[key] = template
+        if len(self._scaled) > MAX_SCALED:
+            self._scaled.popitem(last=False)
+        return template
+
+    def _size_groups(self, category, scale):
+        """Agrupa os templates da categoria por (altura, largura) já escalados"""
+        key = (category, round(scale, SCALE_DECIMALS))
+        if key not in self._groups:
+            groups = {}
+            for template_name in self.templates_gray:
+                if category and not template_name.startswith(category + '_'):
+                    continue
+                template = self._scaled_template(template_name, scale)
+                if template.size == 0:
+                    continue
+                groups.setdefault(template.shape[:2], []).append(template_name)
+            self._groups[key] = groups
+        return self._groups[key]
+
+    def _resolve_regions(self, regions, shape):
+        """Regiões normalizadas -> pixels (x1, y1, x2, y2) dentro do frame"""
+        h, w = shape[:2]
+        rois = []
+        for x1, y1, x2, y2 in regions:
+            px1, py1 = max(0, int(x1 * w)), max(0, int(y1 * h))
+            px2, py2 = min(w, int(round(x2 * w))), min(h, int(round(y2 * h)))
+            if px2 > px1 and py2 > py1:
+                rois.append((px1, py1, px2, py2))
+        return rois
@@ -0,0 +1,259 @@
+# src/vision/template_store.py
+"""
+Cache compilado dos templates em disco
+
+Todos os templates (já em cinza, com os níveis de pirâmide) ficam num
+único arquivo binário aberto via memmap, com um manifesto JSON indexado
+por mtime/tamanho/hash do PNG de origem. Nada é decodificado no start:
+o arquivo só é mapeado no primeiro acesso, e processos forkados
+compartilham as mesmas páginas. Ícones novos ou alterados são
+recompilados de forma incremental.
+
+Cada recompilação grava um arquivo de dados novo (nome com versão) e só
+então troca o manifesto, que aponta para ele: dois processos sincronizando
+juntos nunca deixam um manifesto com offsets de outro arquivo.
+"""
+
+from collections.abc import Mapping
+from pathlib import Path
+import hashlib
+import json
+import os
+import uuid
+import cv2
+import numpy as np
+
+from src.vision.template_matcher import resize_gray
+
+
+# Subpasta -> prefixo do nome do template (mesmo esquema do TemplateMatcher)
+CATEGORIES = {'characters': 'char', 'equipment': 'equip'}
+
+
+class TemplateStore(Mapping):
+    """
+    Templates em cinza servidos direto de um arquivo memory-mapped
+
+    Funciona como um dict somente-leitura nome -> template (nível 1);
+    outros níveis da pirâmide via level(nome, factor).
+    """
+
+    DATA_PREFIX = 'templates-'
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, templates_dir='data/templates/', cache_dir=None, factors=(1, 4, 8)):
+        """
+        Args:
+            templates_dir: pasta com characters/ e equipment/
+            cache_dir: onde salvar o cache (padrão: templates_dir/.cache)
+            factors: fatores de redução pré-calculados (1 = resolução original)
+        """
+        self.templates_dir = Path(templates_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.templates_dir / '.cache'
+        self.factors = tuple(sorted(set(int(f) for f in factors) | {1}))
+
+        self.entries = {}
+        self.failed = {}        # PNGs que não decodificam (não são refeitos até mudar)
+        self.data_file = None   # arquivo de dados apontado pelo manifesto
+        self._data = None
+        self._load_manifest()
+
+    def sync(self):
+        """
+        Atualiza o cache com o estado atual da pasta de templates
+
+        Só recompila PNGs novos ou alterados (mtime/tamanho diferentes e
+        hash diferente); os demais são copiados do cache anterior.
+
+        Returns:
+            número de templates recompilados
+        """
+        sources = self._scan_sources()
+
+        entries = {}
+        failed = {}
+        changed = []
+        for name, path in sources.items():
+            stat = path.stat()
+            old = self.entries.get(name)
+
+            broken = self.failed.get(name)
+            if broken and broken['mtime'] == stat.st_mtime and broken['size'] == stat.st_size:
+                failed[name] = broken
+                continue
+
+            if old and old['mtime'] == stat.st_mtime and old['size'] == stat.st_size:
+                entries[name] = old
+                continue
+
+            digest = self._hash_file(path)
+            if old and old['sha1'] == digest:
+                entries[name] = dict(old, mtime=stat.st_mtime, size=stat.st_size)
+                continue
+
+            entries[name] = {
+                'file': str(path.relative_to(self.templates_dir)),
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+                'sha1': digest
+            }
+            changed.append(name)
+
+        data_path = self.cache_dir / self.data_file if self.data_file else None
+        if not changed and entries.keys() == self.entries.keys() and data_path and data_path.exists():
+            # Nada mudou no conteúdo; só persiste mtimes atualizados
+            if entries != self.entries or failed != self.failed:
+                self.entries, self.failed = entries, failed
+                self._write_manifest()
+            return 0
+
+        self.failed = failed
+        self._rebuild(entries, set(changed))
+        print(f"✓ Cache de templates: {len(changed)} recompilados, {len(self.entries)} no total")
+        if self.failed:
+            print(f"⚠️  {len(self.failed)} templates ilegíveis ignorados: {', '.join(sorted(self.failed))}")
+        return len(changed)
+
+    def level(self, name, factor=1):
+        """
+        Template em cinza no nível pedido (view do memmap, somente leitura)
+
+        Returns:
+            np.ndarray (h, w) ou None se o nome/nível não existir
+        """
+        entry = self.entries.get(name)
+        if entry is None or int(factor) not in self.factors:
+            return None
+
+        offset, h, w = entry['levels'][self.factors.index(int(factor))]
+        data = self._memmap()
+        return data[offset:offset + h * w].reshape(h, w)
+
+    # Interface de Mapping (nível 1)
+
+    def __getitem__(self, name):
+        template = self.level(name)
+        if template is None:
+            raise KeyError(name)
+        return template
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def _load_manifest(self):
+        manifest_path = self.cache_dir / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            return
+
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if tuple(manifest.get('factors', ())) == self.factors and manifest.get('data'):
+            self.entries = manifest['entries']
+            self.failed = manifest.get('failed', {})
+            self.data_file = manifest['data']
+
+    def _memmap(self):
+        """Abre o arquivo de dados no primeiro acesso"""
+        if self._data is None:
+            try:
+                self._data = np.memmap(self.cache_dir / self.data_file, dtype=np.uint8, mode='r')
+            except FileNotFoundError:
+                # Outro processo recompilou e apagou a versão que o manifesto lido apontava
+                self._load_manifest()
+                self._data = np.memmap(self.cache_dir / self.data_file, dtype=np.uint8, mode='r')
+        return self._data
+
+    def _scan_sources(self):
+        sources = {}
+        for folder, prefix in CATEGORIES.items():
+            for img_file in sorted((self.templates_dir / folder).glob('*.png')):
+                sources[f'{prefix}_{img_file.stem}'] = img_file
+        return sources
+
+    def _hash_file(self, path):
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _compile(self, path):
+        """PNG -> lista de níveis em cinza"""
+        img = cv2.imread(str(self.templates_dir / path))
+        if img is None:
+            return []
+
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        levels = []
+        for factor in self.factors:
+            if factor == 1:
+                levels.append(gray)
+            else:
+                levels.append(resize_gray(gray, 1 / factor))
+        return levels
+
+    def _rebuild(self, entries, changed):
+        """Grava um arquivo de dados novo reaproveitando blocos inalterados"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_file = f'{self.DATA_PREFIX}{uuid.uuid4().hex}.bin'
+        tmp_path = self.cache_dir / (data_file + '.tmp')
+
+        old_file = self.data_file
+        old_data = None
+        if self.entries and old_file and (self.cache_dir / old_file).exists():
+            old_data = self._memmap()
+
+        offset = 0
+        compiled = {}
+        with open(tmp_path, 'wb') as out:
+            for name, entry in entries.items():
+                if name in changed or old_data is None or 'levels' not in entry:
+                    blocks = self._compile(entry['file'])
+                    if not blocks:
+                        self.failed[name] = entry
+                        continue
+                else:
+                    blocks = [
+                        old_data[start:start + h * w].reshape(h, w)
+                        for start, h, w in entry['levels']
+                    ]
+
+                levels = []
+                for block in blocks:
+                    h, w = block.shape[:2]
+                    out.write(np.ascontiguousarray(block, dtype=np.uint8).tobytes())
+                    levels.append([offset, h, w])
+                    offset += h * w
+
+                compiled[name] = dict(entry, levels=levels)
+
+        self._data = None
+        os.replace(tmp_path, self.cache_dir / data_file)
+
+        self.entries = compiled
+        self.data_file = data_file
+        self._write_manifest()
+
+        # Processos que já mapearam a versão antiga continuam com o inode antigo
+        # (no Windows o arquivo ainda aberto não sai; fica para a próxima)
+        if old_file and old_file != data_file:
+            try:
+                (self.cache_dir / old_file).unlink()
+            except OSError:
+                pass
+
+    def _write_manifest(self):
+        manifest_path = self.cache_dir / self.MANIFEST_FILE
+        tmp_path = manifest_path.with_name(f'{manifest_path.name}.{uuid.uuid4().hex}.tmp')
+        manifest = {
+            'factors': list(self.factors),
+            'data': self.data_file,
+            'entries': self.entries,
+            'failed': self.failed,
+        }
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
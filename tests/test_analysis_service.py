@@ -0,0 +1,119 @@
+# tests/test_analysis_service.py
+"""
+AnalysisService pelo FakeChatClient
+
+Pool de threads injetado e analyzer falso (bloqueia num Event), então a
+fila, o backpressure, o timeout e o stop() são testados sem YOLO nem
+processos.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+
+import pytest
+
+from src.bot.analysis_service import AnalysisService
+from src.bot.fake_client import FakeChatClient
+
+
+class SlowAnalyzer:
+    """Só responde quando o teste liberar o Event"""
+
+    release = threading.Event()
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def analyze_equipment_screen(self, screenshot):
+        self.release.wait(timeout=5)
+        return {'character': [], 'relics': [], 'equipment': [],
+                'stats': [{'value': screenshot}]}
+
+
+@pytest.fixture
+def executor():
+    SlowAnalyzer.release.clear()
+    pool = ThreadPoolExecutor(max_workers=1)
+    yield pool
+    SlowAnalyzer.release.set()
+    pool.shutdown(wait=True)
+
+
+def make_service(executor, **options):
+    return AnalysisService('fake.pt', workers=1, analyzer_factory=SlowAnalyzer,
+                           executor=executor, **options)
+
+
+async def until(condition, timeout=2.0):
+    """Espera o loop chegar num estado (despachante pegou o pedido, etc.)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, 'estado esperado não chegou'
+        await asyncio.sleep(0.005)
+
+
+def test_full_queue_rejects_with_service_busy(executor):
+    async def scenario():
+        async with make_service(executor, queue_size=1) as service:
+            client = FakeChatClient(service)
+
+            running = asyncio.create_task(client.upload('a', 'shot-a'))
+            await until(lambda: service.stats['submitted'] == 1 and service.pending() == 0)
+            queued = asyncio.create_task(client.upload('b', 'shot-b'))
+            await until(lambda: service.pending() == 1)
+
+            reply = await client.upload('c', 'shot-c')
+            assert reply.startswith('⏳')
+            assert service.stats['rejected'] == 1
+
+            SlowAnalyzer.release.set()
+            assert 'shot-a' in await running
+            assert 'shot-b' in await queued
+            assert service.stats['completed'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_slow_job_times_out_and_keeps_worker_busy(executor):
+    async def scenario():
+        async with make_service(executor) as service:
+            client = FakeChatClient(service)
+
+            reply = await client.upload('a', 'shot-a', timeout=0.05)
+            assert reply.startswith('⌛')
+            assert service.stats['timed_out'] == 1
+
+            # O chamador desistiu, mas a análise continua ocupando o worker
+            queued = asyncio.create_task(client.upload('b', 'shot-b'))
+            await until(lambda: service.stats['submitted'] == 2)
+            await asyncio.sleep(0.05)
+            assert service.pending() == 1
+
+            SlowAnalyzer.release.set()
+            assert 'shot-b' in await queued
+
+    asyncio.run(scenario())
+
+
+def test_stop_cancels_running_and_queued_requests(executor):
+    async def scenario():
+        service = make_service(executor)
+        await service.start()
+        client = FakeChatClient(service)
+
+        running = asyncio.create_task(client.upload('a', 'shot-a'))
+        await until(lambda: service.stats['submitted'] == 1 and service.pending() == 0)
+        queued = asyncio.create_task(client.upload('b', 'shot-b'))
+        await until(lambda: service.pending() == 1)
+
+        await service.stop()
+
+        for task in (running, queued):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert service.stats['cancelled'] == 2
+        assert service.stats['completed'] == 0
+
+    asyncio.run(scenario())
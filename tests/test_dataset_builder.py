@@ -0,0 +1,86 @@
+# tests/test_dataset_builder.py
+"""
+Deduplicação do ScreenshotOrganizer
+
+O dHash da tela inteira não vê os números dos stats: duas builds no mesmo
+layout ficam a ~1 bit. Só recompressão da mesma tela pode ser descartada.
+Na extração de ícones, nomes repetidos em subpastas não podem se sobrescrever.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.analyzer.result_cache import perceptual_hash
+from src.tools.dataset_buider import DatasetBuilder, IconExtractor, ScreenshotOrganizer
+
+
+def build_screen(values):
+    """Tela 1440p sintética: mesmo layout, stats com os valores dados"""
+    img = np.full((1440, 2560, 3), 35, dtype=np.uint8)
+    cv2.rectangle(img, (60, 160), (860, 1360), (90, 70, 60), -1)           # personagem
+    for i in range(6):                                                       # cards de relíquia
+        x, y = 1640 + (i % 2) * 440, 180 + (i // 2) * 380
+        cv2.rectangle(img, (x, y), (x + 400, y + 340), (60, 60, 80), -1)
+    for i, value in enumerate(values):                                       # coluna de stats
+        y = 260 + i * 90
+        cv2.putText(img, 'CRIT Rate', (960, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (220, 220, 220), 2)
+        cv2.putText(img, value, (1380, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (220, 220, 220), 2)
+    return img
+
+
+@pytest.fixture
+def organizer(tmp_path):
+    return ScreenshotOrganizer(DatasetBuilder(tmp_path / 'dataset'), workers=2)
+
+
+def test_different_builds_on_same_layout_are_kept(tmp_path, organizer):
+    source = tmp_path / 'inbox'
+    source.mkdir()
+    first = build_screen(['64.2%', '132.0%', '145', '3214'])
+    second = build_screen(['61.8%', '132.0%', '145', '3214'])
+    cv2.imwrite(str(source / 'a.png'), first)
+    cv2.imwrite(str(source / 'b.png'), second)
+
+    # Pré-condição: o dHash da tela sozinho as confundiria
+    distance = bin(int(perceptual_hash(first), 16) ^ int(perceptual_hash(second), 16)).count('1')
+    assert distance <= organizer.max_distance
+
+    counts = organizer.import_screenshots(source)
+    assert counts.get('imported') == 2
+    assert not counts.get('near_duplicate')
+
+
+def test_recompressed_resend_is_near_duplicate(tmp_path, organizer):
+    source = tmp_path / 'inbox'
+    source.mkdir()
+    screen = build_screen(['64.2%', '132.0%', '145', '3214'])
+    cv2.imwrite(str(source / 'a.png'), screen)
+    cv2.imwrite(str(source / 'b.jpg'), screen, [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+    counts = organizer.import_screenshots(source)
+    assert counts.get('imported') == 1
+    assert counts.get('near_duplicate') == 1
+
+    # Manifesto recarregado (grids vindos do JSON) dá o mesmo veredito
+    cv2.imwrite(str(source / 'c.jpg'), screen, [cv2.IMWRITE_JPEG_QUALITY, 75])
+    reloaded = ScreenshotOrganizer(organizer.dataset, workers=2)
+    assert reloaded.import_screenshots(source).get('near_duplicate') == 1
+
+
+def test_icons_from_same_stem_in_different_folders_are_kept(tmp_path):
+    dataset = DatasetBuilder(tmp_path / 'dataset')
+    root = dataset.root / 'dataset'
+    rng = np.random.default_rng(0)
+
+    for folder in ('a', 'b'):
+        (root / 'images' / folder).mkdir(parents=True)
+        (root / 'labels' / folder).mkdir(parents=True)
+        # Ícone diferente em cada pasta (ruído: hashes bem distantes)
+        img = rng.integers(0, 255, (200, 200, 3), dtype=np.uint8)
+        cv2.imwrite(str(root / 'images' / folder / '001.png'), img)
+        (root / 'labels' / folder / '001.txt').write_text('2 0.5 0.5 0.4 0.4\n')
+
+    counts = IconExtractor(dataset).extract_from_labels(workers=1)
+    assert counts['relics'] == 2
+    assert len(list((dataset.root / 'icons' / 'relics').glob('*.png'))) == 2
@@ -0,0 +1,88 @@
+# tests/test_equipment_parser.py
+"""
+EquipmentParser: stats vão para o card certo
+
+Totais do painel do personagem (coluna de stats) ficam ao lado dos cards
+de relíquia e muitas vezes dentro da faixa legal de uma substat; não
+podem entrar no vetor da relíquia.
+"""
+
+import numpy as np
+
+from src.analyzer.hybrid_analyzer import HybridAnalyzer
+from src.analyzer.screen_analyzer import ScreenAnalyzer
+from src.game_logic.equipment_parser import EquipmentParser
+from src.ocr.image_preprocessor import ImagePreprocessor
+from src.ocr.text_parser import STAT_INDEX, StatParser
+
+
+SHAPE = (1440, 2560, 3)
+
+
+def analyzer_result(detections, texts, layout=None):
+    """_build_result do HybridAnalyzer sem carregar YOLO/tesseract"""
+    analyzer = object.__new__(HybridAnalyzer)
+    analyzer.parser = StatParser(validate=False)
+    return analyzer._build_result(detections, texts, layout, SHAPE)
+
+
+def detection(bbox, confidence=0.9):
+    x1, y1, x2, y2 = bbox
+    return {'bbox': list(bbox), 'center': ((x1 + x2) / 2, (y1 + y2) / 2), 'confidence': confidence}
+
+
+# Relíquia logo depois da borda da ROI de relíquias (x = 0.62 * 2560 ~ 1587);
+# o total do personagem fica na coluna de stats, a menos de um card dela
+DETECTIONS = {
+    'relic_icon': [detection((1600, 300, 1720, 420))],
+    'stat_value': [
+        detection((1300, 340, 1560, 372)),   # painel do personagem
+        detection((1730, 320, 1990, 352)),   # substats da relíquia
+        detection((1730, 370, 1990, 402)),
+    ],
+}
+TEXTS = ['CRIT Rate 20%', 'CRIT Rate 3.2%', 'CRIT DMG 6.4%']
+
+
+def test_character_total_stays_out_of_relic():
+    layout = ScreenAnalyzer(references_dir='does/not/exist').layout('equipment', '16:9')
+    result = analyzer_result(DETECTIONS, TEXTS, layout)
+
+    # Pré-condição: o total cabe na faixa legal de uma substat
+    assert result['stats'][0]['in_range']
+
+    build = EquipmentParser().parse(result)
+    (relic,) = build.relics
+    assert [s['value'] for s in relic.stats] == TEXTS[1:]
+    assert [s['value'] for s in build.unassigned] == TEXTS[:1]
+
+    vec = build.relic_vector()
+    assert vec[STAT_INDEX['crit_rate']] == 3.2
+    assert vec[STAT_INDEX['crit_dmg']] == 6.4
+
+
+class StubDetector:
+    def detect(self, image, confidence=0.5):
+        return {name: [dict(d) for d in items] for name, items in DETECTIONS.items()}
+
+
+class StubOCR:
+    def extract_batch(self, crops, config=''):
+        return list(TEXTS)
+
+
+def test_default_analyzer_tags_rois_without_screen_analyzer():
+    """Caminho padrão (YOLO no frame inteiro): o total continua fora da relíquia"""
+    analyzer = object.__new__(HybridAnalyzer)
+    analyzer.detector, analyzer.ocr = StubDetector(), StubOCR()
+    analyzer.preprocessor = ImagePreprocessor()
+    analyzer.parser = StatParser(validate=False)
+    analyzer.screen = None
+    analyzer.layouts = ScreenAnalyzer(references_dir='does/not/exist')
+
+    result = analyzer.analyze_equipment_screen(np.zeros(SHAPE, dtype=np.uint8))
+    assert [s['roi'] for s in result['stats']] == ['stats', 'relics', 'relics']
+
+    build = EquipmentParser().parse(result)
+    assert [s['value'] for s in build.relics[0].stats] == TEXTS[1:]
+    assert [s['value'] for s in build.unassigned] == TEXTS[:1]
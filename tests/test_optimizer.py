@@ -0,0 +1,217 @@
+# tests/test_optimizer.py
+"""
+BuildOptimizer contra força bruta e BuildSession contra recálculo completo
+
+Protege a lógica de poda (limites do branch-and-bound, fronteiras de
+Pareto, pares planares): qualquer mudança que corte uma build válida
+aparece aqui como diferença de score.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from src.data.characters_db import get_database
+from src.game_logic.optimizer import SLOTS, ROLL_VALUES, ROLL_VECTOR, BuildOptimizer
+from src.game_logic.stat_calculator import stat_vector, relic_vector
+from src.ocr.text_parser import STAT_INDEX, STAT_KEYS
+
+
+MAIN_STATS = {
+    'head': ['hp'],
+    'hands': ['atk'],
+    'body': ['crit_rate', 'crit_dmg', 'atk_pct', 'hp_pct', 'effect_hit_rate'],
+    'feet': ['spd', 'atk_pct', 'hp_pct'],
+    'sphere': ['atk_pct', 'quantum_dmg', 'lightning_dmg', 'hp_pct'],
+    'rope': ['atk_pct', 'energy_regen', 'break_effect'],
+}
+SUB_STATS = ['hp', 'atk', 'def', 'hp_pct', 'atk_pct', 'def_pct', 'spd',
+             'crit_rate', 'crit_dmg', 'break_effect', 'effect_hit_rate', 'effect_res']
+
+CONSTRAINTS = [
+    {},
+    {'required_sets': {'band_of_sizzling_thunder': 2}},
+    {'min_stats': {'spd': 12}},
+    {'required_sets': {'space_sealing_station': 2}, 'min_stats': {'spd': 6}},
+]
+
+
+@pytest.fixture(scope='module')
+def db():
+    return get_database()
+
+
+def random_relics(db, count, seed, prefix='r'):
+    """Inventário aleatório, mas válido: main stat do slot, 4 substats distintos"""
+    rng = random.Random(seed)
+    sets = list(db.by_id['relic_set'].values())
+    cavern = [s.id for s in sets if s.kind == 'cavern']
+    planar = [s.id for s in sets if s.kind == 'planar']
+
+    relics = []
+    for i in range(count):
+        slot = rng.choice(SLOTS)
+        main = rng.choice(MAIN_STATS[slot])
+        subs = rng.sample([s for s in SUB_STATS if s != main], 4)
+        relics.append({
+            'id': f'{prefix}{i}',
+            'slot': slot,
+            'set': rng.choice(planar if slot in ('sphere', 'rope') else cavern),
+            'main': {main: ROLL_VALUES[main] * 11},
+            'subs': {k: round(ROLL_VALUES[k] * rng.uniform(1, 3), 1) for k in subs},
+        })
+    return relics
+
+
+def dense_relics(count, seed, prefix='d'):
+    """Um set de caverna e um planar, poucos stats e valores: muita dominância"""
+    rng = random.Random(seed)
+    relics = []
+    for i in range(count):
+        slot = SLOTS[i % len(SLOTS)]
+        main = MAIN_STATS[slot][0]
+        relics.append({
+            'id': f'{prefix}{i}',
+            'slot': slot,
+            'set': 'space_sealing_station' if slot in ('sphere', 'rope') else 'band_of_sizzling_thunder',
+            'main': {main: ROLL_VALUES[main] * 11},
+            'subs': {k: ROLL_VALUES[k] * rng.randint(1, 3) for k in ('crit_rate', 'crit_dmg', 'spd')},
+        })
+    return relics
+
+
+def brute_force_scores(db, relics, weights, required_sets=None, min_stats=None):
+    """Score de todas as combinações válidas, maior primeiro"""
+    required_sets, min_stats = required_sets or {}, min_stats or {}
+    weight_vec = stat_vector(weights) / ROLL_VECTOR
+    by_slot = [[r for r in relics if r['slot'] == slot] for slot in SLOTS]
+
+    scores = []
+    for combo in itertools.product(*by_slot):
+        vec = sum(relic_vector(r) for r in combo)
+        counts = {}
+        for relic in combo:
+            counts[relic['set']] = counts.get(relic['set'], 0) + 1
+        if any(counts.get(set_id, 0) < pieces for set_id, pieces in required_sets.items()):
+            continue
+        for set_id, pieces in counts.items():
+            relic_set = db.relic_set(set_id)
+            if pieces >= 2:
+                vec = vec + stat_vector(relic_set.bonus_2pc)
+            if pieces >= 4:
+                vec = vec + stat_vector(relic_set.bonus_4pc)
+        if any(vec[STAT_INDEX[k]] < minimum for k, minimum in min_stats.items()):
+            continue
+        scores.append(float(vec @ weight_vec))
+    return sorted(scores, reverse=True)
+
+
+def summary(builds):
+    return [(round(b['score'], 9), b['relics']) for b in builds]
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('constraints', CONSTRAINTS)
+def test_optimize_matches_brute_force(db, seed, constraints):
+    relics = random_relics(db, 30, seed)
+    # Pesos aleatórios em todos os stats: bônus de set também pesam na poda
+    rng = random.Random(seed)
+    weights = {key: rng.uniform(0, 1) for key in STAT_KEYS}
+
+    builds = BuildOptimizer(db).optimize(relics, weights, top_k=3, **constraints)
+    expected = brute_force_scores(db, relics, weights, **constraints)[:3]
+
+    assert [b['score'] for b in builds] == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize('top_k', (2, 5))
+@pytest.mark.parametrize('constraints', [{}, {'min_stats': {'spd': 15}}])
+def test_dense_inventory_matches_brute_force(db, top_k, constraints):
+    relics = dense_relics(36, top_k)
+    weights = {'crit_rate': 1.0, 'crit_dmg': 1.0, 'spd': 0.5}
+
+    session = BuildOptimizer(db).open_session('user', relics, weights, top_k=top_k, **constraints)
+    expected = brute_force_scores(db, relics, weights, **constraints)[:top_k]
+
+    # A poda tem que ter cortado algo, senão o teste não prova nada
+    assert sum(map(len, session.fronts.values())) < len(relics)
+    assert [b['score'] for b in session.builds] == pytest.approx(expected, abs=1e-6)
+
+
+def test_identical_relics_tie_break_by_id(db):
+    relics = dense_relics(6, 0)
+    twins = [dict(relics[0], id=relic_id) for relic_id in ('h1', 'h2', 'h3')]
+    weights = {'crit_rate': 1.0, 'crit_dmg': 1.0}
+
+    optimizer = BuildOptimizer(db)
+    forward = optimizer.optimize(relics[1:] + twins, weights, top_k=2)
+    backward = optimizer.optimize(relics[1:] + twins[::-1], weights, top_k=2)
+
+    assert summary(forward) == summary(backward)
+    assert [b['relics']['head'] for b in forward] == ['h3', 'h2']
+
+
+@pytest.mark.parametrize('top_k', (1, 2, 3))
+def test_dense_session_updates_match_full_recompute(db, top_k):
+    rng = random.Random(top_k)
+    inventory = dense_relics(18, top_k)
+    extra = dense_relics(18, 50 + top_k, prefix='x')
+    weights = {'crit_rate': 1.0, 'crit_dmg': 1.0, 'spd': 0.5}
+
+    optimizer = BuildOptimizer(db)
+    session = optimizer.open_session('user', inventory, weights, top_k=top_k)
+
+    for step in range(30):
+        if rng.random() < 0.5:
+            relic = extra.pop()
+            session.add_relic(relic)
+            inventory.append(relic)
+        else:
+            # Inclui relíquias dominadas: tirar uma delas não pode mudar nada
+            victim = rng.choice(inventory)['id']
+            session.remove_relic(victim)
+            inventory = [r for r in inventory if r['id'] != victim]
+
+        full = optimizer.optimize(inventory, weights, top_k=top_k)
+        assert summary(session.builds) == summary(full), f'passo {step}'
+        expected = brute_force_scores(db, inventory, weights)[:top_k]
+        assert [b['score'] for b in full] == pytest.approx(expected, abs=1e-6), f'passo {step}'
+
+
+@pytest.mark.parametrize('top_k', (1, 3))
+@pytest.mark.parametrize('constraints', [
+    {},
+    {'required_sets': {'band_of_sizzling_thunder': 4, 'space_sealing_station': 2}},
+    {'min_stats': {'spd': 20}},
+])
+def test_session_updates_match_full_recompute(db, top_k, constraints):
+    rng = random.Random(top_k)
+    inventory = random_relics(db, 200, top_k)
+    extra = random_relics(db, 60, 100 + top_k, prefix='x')
+
+    optimizer = BuildOptimizer(db)
+    session = optimizer.open_session_for('user', 'kafka', inventory, top_k=top_k, **constraints)
+
+    for step in range(30):
+        op = rng.random()
+        if op < 0.5:
+            relic = dict(extra.pop(), id=f'n{step}')
+            session.add_relic(relic)
+            inventory.append(relic)
+        elif op < 0.75:
+            # Metade das vezes remove uma peça da melhor build (força nova busca)
+            if session.builds and rng.random() < 0.5:
+                victim = rng.choice(list(session.builds[0]['relics'].values()))
+            else:
+                victim = rng.choice(inventory)['id']
+            session.remove_relic(victim)
+            inventory = [r for r in inventory if r['id'] != victim]
+        else:
+            victim = rng.choice(inventory)['id']
+            relic = dict(extra.pop(), id=victim)
+            session.update_relic(relic)
+            inventory = [r for r in inventory if r['id'] != victim] + [relic]
+
+        full = optimizer.optimize_for('kafka', inventory, top_k=top_k, **constraints)
+        assert summary(session.builds) == summary(full), f'passo {step}'
@@ -0,0 +1,93 @@
+# tests/test_result_cache.py
+"""
+ResultCache: reenvios recomprimidos acertam, builds diferentes erram
+
+A busca aproximada (dHash + tile_distance) roda nas duas camadas; o
+SQLite precisa guardar os grids para o acerto sobreviver a um restart.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.analyzer.result_cache import ResultCache, screen_key
+
+
+MODEL = 'best.pt:1:1'
+
+
+def build_screen(values):
+    """Tela 1440p sintética: mesmo layout, stats com os valores dados"""
+    img = np.full((1440, 2560, 3), 35, dtype=np.uint8)
+    cv2.rectangle(img, (60, 160), (860, 1360), (90, 70, 60), -1)
+    for i in range(6):
+        x, y = 1640 + (i % 2) * 440, 180 + (i // 2) * 380
+        cv2.rectangle(img, (x, y), (x + 400, y + 340), (60, 60, 80), -1)
+    for i, value in enumerate(values):
+        y = 260 + i * 90
+        cv2.putText(img, 'CRIT Rate', (960, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (220, 220, 220), 2)
+        cv2.putText(img, value, (1380, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (220, 220, 220), 2)
+    return img
+
+
+def jpeg(img, quality):
+    ok, data = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+SCREEN = build_screen(['64.2%', '132.0%', '145', '3214'])
+RESULT = {'stats': [{'value': 'CRIT Rate 64.2%'}]}
+
+
+@pytest.fixture
+def cache():
+    key, details = screen_key(SCREEN)
+    cache = ResultCache()
+    cache.put(key, MODEL, RESULT, details)
+    return cache
+
+
+@pytest.mark.parametrize('quality', (95, 85, 70))
+def test_recompressed_resend_hits(cache, quality):
+    key, details = screen_key(jpeg(SCREEN, quality))
+    assert cache.get(key, MODEL, details) == RESULT
+    assert cache.stats()['hits'] == 1
+
+
+def test_different_build_same_layout_misses(cache):
+    key, details = screen_key(build_screen(['61.8%', '132.0%', '145', '3214']))
+    assert cache.get(key, MODEL, details) is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (0, 1)
+
+
+def test_other_model_misses(cache):
+    key, details = screen_key(SCREEN)
+    assert cache.get(key, 'other.pt:1:1', details) is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = tmp_path / 'results.db'
+    key, details = screen_key(SCREEN)
+    first = ResultCache(db_path=db_path)
+    first.put(key, MODEL, RESULT, details)
+    first.close()
+
+    reopened = ResultCache(db_path=db_path)
+    resent_key, resent_details = screen_key(jpeg(SCREEN, 85))
+    assert resent_key != key
+    assert reopened.get(resent_key, MODEL, resent_details) == RESULT
+
+    other_key, other_details = screen_key(build_screen(['61.8%', '132.0%', '145', '3214']))
+    assert reopened.get(other_key, MODEL, other_details) is None
+
+    stats = reopened.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses']) == (1, 1, 1)
+    reopened.close()
+
+
+def test_hits_are_copies(cache):
+    key, details = screen_key(SCREEN)
+    cache.get(key, MODEL, details)['stats'].append({'value': 'lixo'})
+    assert cache.get(key, MODEL, details) == RESULT
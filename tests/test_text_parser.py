@@ -0,0 +1,62 @@
+# tests/test_text_parser.py
+"""StatParser.parse_line: linhas cruas do OCR -> StatRecord"""
+
+import pytest
+
+from src.ocr.text_parser import StatParser
+
+
+@pytest.fixture
+def parser():
+    return StatParser()
+
+
+@pytest.mark.parametrize('line, key, value', [
+    ('CRIT Rate 5.8%', 'crit_rate', 5.8),
+    ('CRIT Rate 5.8', 'crit_rate', 5.8),        # '%' perdido: stat sempre percentual
+    ('ATK 7.3', 'atk_pct', 7.3),                # '%' perdido: casa decimal = percentual
+    ('ATK 42', 'atk', 42.0),
+    ('CRIT DMG 1O.4%', 'crit_dmg', 10.4),       # O no lugar de 0
+    ('CRIT DMG l1.7%', 'crit_dmg', 11.7),       # l no lugar de 1
+    ('CR1T Rate 3.2%', 'crit_rate', 3.2),       # 1 no lugar de I, no nome
+    ('ATQ 10,4%', 'atk_pct', 10.4),             # alias PT-BR, vírgula decimal
+    ('Taxa CRIT 2,9%', 'crit_rate', 2.9),
+    ('Velocidade 4', 'spd', 4.0),
+])
+def test_parse_line(parser, line, key, value):
+    record = parser.parse_line(line)
+    assert record is not None
+    assert (record.key, record.value) == (key, pytest.approx(value))
+
+
+def test_only_number_has_no_key(parser):
+    record = parser.parse_line('33')
+    assert (record.name, record.key, record.value) == (None, None, 33.0)
+
+
+@pytest.mark.parametrize('line', [
+    'CRIT Rate 99.0%',   # acima do máximo de uma relíquia
+    'SPD 145',           # total do personagem
+    'HP 3,456',
+])
+def test_out_of_range_rejected(parser, line):
+    assert parser.parse_line(line) is None
+
+
+def test_out_of_range_kept_without_validation():
+    record = StatParser(validate=False).parse_line('CRIT Rate 99.0%')
+    assert (record.key, record.value) == ('crit_rate', 99.0)
+    assert not StatParser().in_range(record)
+
+
+@pytest.mark.parametrize('line, key, value', [
+    ('HP 3,456', 'hp', 3456.0),          # separador de milhar, não percentual
+    ('PV 12,345', 'hp', 12345.0),
+])
+def test_thousands_separator(line, key, value):
+    record = StatParser(validate=False).parse_line(line)
+    assert (record.key, record.value, record.is_percent) == (key, value, key.endswith('_pct'))
+
+
+def test_unknown_name_rejected(parser):
+    assert parser.parse_line('Nível 80') is None
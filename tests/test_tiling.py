@@ -0,0 +1,64 @@
+# tests/test_tiling.py
+"""tile_grid + merge_tile_boxes: emendas entre tiles sem duplicar nem fundir objetos"""
+
+import numpy as np
+
+from src.detector.tiling import tile_grid, merge_tile_boxes
+
+
+SHAPE = (100, 200, 3)
+
+
+def tiles():
+    # Dois tiles de 120px com 40px de sobreposição: emenda em x = 80..120
+    grid = tile_grid(SHAPE[0], SHAPE[1], tile_size=120, overlap=0.2)
+    assert grid == [(0, 0, 120, 100), (80, 0, 200, 100)]
+    return grid
+
+
+def to_tile(boxes, tile):
+    """Caixas globais [x1, y1, x2, y2, conf, cls] -> coordenadas do tile, recortadas nele"""
+    tx1, ty1, tx2, ty2 = tile
+    rows = np.array(boxes, dtype=np.float32).reshape(-1, 6).copy()
+    rows[:, [0, 2]] = rows[:, [0, 2]].clip(tx1, tx2) - tx1
+    rows[:, [1, 3]] = rows[:, [1, 3]].clip(ty1, ty2) - ty1
+    return rows[(rows[:, 2] > rows[:, 0]) & (rows[:, 3] > rows[:, 1])]
+
+
+def test_tile_grid_covers_image():
+    grid = tile_grid(2160, 3840, tile_size=1280, overlap=0.2)
+    assert min(t[0] for t in grid) == 0 and max(t[2] for t in grid) == 3840
+    assert min(t[1] for t in grid) == 0 and max(t[3] for t in grid) == 2160
+    assert all(t[2] - t[0] == 1280 and t[3] - t[1] == 1280 for t in grid)
+
+
+def test_box_cut_by_seam_merges_into_one():
+    grid = tiles()
+    # Objeto em x 100..140: o tile 0 só vê até 120 (pedaço cortado, mais confiante)
+    first = to_tile([[100, 20, 140, 40, 0.95, 1]], grid[0])
+    second = to_tile([[100, 20, 140, 40, 0.80, 1]], grid[1])
+
+    merged = merge_tile_boxes([first, second], grid, SHAPE)
+    assert len(merged) == 1
+    # Fica a caixa inteira (do tile 1), não o pedaço
+    np.testing.assert_allclose(merged[0, :4], [100, 20, 140, 40])
+
+
+def test_adjacent_objects_stay_separate():
+    grid = tiles()
+    # Dois ícones lado a lado dentro da sobreposição: cada um aparece nos dois tiles
+    objects = [[85, 20, 99, 40, 0.9, 1], [101, 20, 115, 40, 0.9, 1]]
+    rows = [to_tile(objects, tile) for tile in grid]
+
+    merged = merge_tile_boxes(rows, grid, SHAPE)
+    assert len(merged) == 2
+    np.testing.assert_allclose(sorted(merged[:, 0]), [85, 101])
+
+
+def test_other_class_is_not_suppressed():
+    grid = tiles()
+    rows = [to_tile([[20, 20, 60, 40, 0.9, 0], [22, 22, 58, 38, 0.8, 3]], grid[0]),
+            np.zeros((0, 6))]
+
+    merged = merge_tile_boxes(rows, grid, SHAPE)
+    assert sorted(merged[:, 5]) == [0, 3]